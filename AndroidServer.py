@@ -21,22 +21,28 @@
 ###################################################################
 import asyncio
 import json
+import time
 
 from json import JSONDecodeError
+from typing import Dict
 
 import websockets
 from websockets.exceptions import ConnectionClosedError
 
-from Common import logger
+from AsyncExecutor import AsyncExecutor, AsyncFacade
+from Common import logger, get_log_level
 from ConfigStore import ConfigStore
-from Constants import CONST_THERMO_STATE, CONST_TEMP_HISTORY
+from Constants import CONST_THERMO_STATE, CONST_TEMP_HISTORY, CONST_METRICS, CONST_PROFILE, PROFILE_TARGET_SERVER
 from Constants import CONST_THERMO_RELAY, CONST_THERMO_TEMPERATURE, CONST_TEMP_NOW, CONST_THERMO_SWITCH
-from Constants import WARNING, INFO, FINE, FINER, FINEST
-from DS18B20 import DS18B20
+from Constants import WARNING, INFO, FINE, FINER, FINEST, ZONE_DEFAULT, ASYNC_CALL_TIMEOUT
 from DatabaseDAO import DatabaseDAO
-from GPIO import GPIO
+from Metrics import MetricsRegistry
+from Profiler import Profiler
+from TemperatureSampler import TemperatureSampler
+from ThermoControl import ThermoControl
 from Thermostat import Thermostat
 from WeatherDAO import WeatherDAO
+from Zone import Zone
 
 
 def init_state_response() -> json:
@@ -81,15 +87,17 @@ class AndroidServer:
     1.0.0. | 24.02.2018 - First version
     """
 
-    def __init__(self, config: ConfigStore, dao: DatabaseDAO, gpio: GPIO, sensor: DS18B20):
+    def __init__(self, config: ConfigStore, dao: DatabaseDAO, zones: Dict[str, Zone], sampler: TemperatureSampler,
+                 control: ThermoControl):
         """
         Initialise and start the thread which listens for connections and act on requests.
 
         Args:
             config: Config Store
             dao:    Database Access Object: MySQL database
-            gpio:   The interface to external peripheral
-            sensor: USB temperature sensor
+            zones:  The heating zones. The app shows and sets the zone ZONE_DEFAULT, or the first zone.
+            sampler: The latest readings of the temperature sensors
+            control: The heating control, run straight away when the app changes the thermostat settings
         Return:
             none
         Created:
@@ -98,23 +106,70 @@ class AndroidServer:
         self.CLASS = "AndroidServer"
         self.config = config
         self.dao = dao
-        self.gpio = gpio
-        self.thermo_sensor = sensor
+        self.zones = zones
+        self.zone = zones.get(ZONE_DEFAULT) or next(iter(zones.values()))
+        self.sampler = sampler
+        self.control = control
+        self.metrics = MetricsRegistry()
+        self.profiler = Profiler()
+        self.weather = WeatherDAO(self.config, self.dao)
+
+        # The sensors, relays, database and config file block, hence the coroutines await them on a thread pool.
+        self.executor = AsyncExecutor()
+        self.async_config = AsyncFacade(self.config, self.executor)
+        self.async_dao = AsyncFacade(self.dao, self.executor)
+        self.async_weather = AsyncFacade(self.weather, self.executor)
+
+        # Set when the host or port in [android.server] changes, to re-open the websocket.
+        self.loop = None
+        self.restart = None
+        self.config.subscribe('android.server', "host", self.on_address_change)
+        self.config.subscribe('android.server', "port", self.on_address_change)
+
         logger(FINER, self.CLASS, "Android server initialised.")
 
+    async def run_control(self):
+        """
+        Runs the heating control and waits until it has set the heating state, hence the response shows the state
+        the control decided.
+        """
+        future = self.control.request_control()
+        if future is None:
+            return
+        try:
+            await asyncio.wait_for(asyncio.wrap_future(future), ASYNC_CALL_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger(WARNING, self.CLASS, "The heating control did not run within {} seconds.", ASYNC_CALL_TIMEOUT)
+
+    def on_address_change(self, snapshot):
+        """
+        Called by the config store (from its own thread) when the websocket host or port changes.
+        """
+        if self.loop is not None:
+            logger(INFO, self.CLASS, "Websocket address changed to '{}:{}', re-opening..",
+                   snapshot.android_host, snapshot.android_port)
+            self.loop.call_soon_threadsafe(self.restart.set)
+
     async def main(self):
-        def_host = ""
-        def_port = "9741"
-
-        logger(FINER, self.CLASS,
-               "Opening WebSocket on port: {}..".format(self.config.getAndroidServer("port", def_port)))
-        server = await websockets.serve(
-            self.process_request,
-            self.config.getAndroidServer("host", def_host),
-            int(self.config.getAndroidServer("port", def_port))
-        )
-        logger(FINER, self.CLASS, "Websocket created.".format(self.config.getAndroidServer("port", def_port)))
-        await server.wait_closed()
+        self.loop = asyncio.get_running_loop()
+        self.restart = asyncio.Event()
+
+        while True:
+            snapshot = self.config.snapshot
+
+            logger(FINER, self.CLASS, "Opening WebSocket on port: {}..", snapshot.android_port)
+            server = await websockets.serve(
+                self.process_request,
+                snapshot.android_host,
+                snapshot.android_port
+            )
+            logger(FINER, self.CLASS, "Websocket created.")
+
+            await self.restart.wait()
+            self.restart.clear()
+
+            server.close()
+            await server.wait_closed()
 
     if __name__ == "__main__":
         asyncio.run(main())
@@ -132,7 +187,7 @@ class AndroidServer:
             json:           The HTTP request JSON
         Modified: 08.04.2018
         """
-        logger(FINER, self.CLASS, "Loading request string: {}".format(request_string))
+        logger(FINER, self.CLASS, "Loading request string: {}", request_string)
 
         try:
             json_request = json.loads(request_string)
@@ -161,7 +216,9 @@ class AndroidServer:
             if not json_request["name"] == CONST_THERMO_STATE and \
                     not json_request["name"] == CONST_TEMP_HISTORY and \
                     not json_request["name"] == CONST_THERMO_TEMPERATURE and \
-                    not json_request["name"] == CONST_THERMO_SWITCH:
+                    not json_request["name"] == CONST_THERMO_SWITCH and \
+                    not json_request["name"] == CONST_METRICS and \
+                    not json_request["name"] == CONST_PROFILE:
                 logger(WARNING, self.CLASS, "Invalid JSON: Unrecognised element name: {}".format(json_request["name"]))
                 return False
         except KeyError:
@@ -203,23 +260,19 @@ class AndroidServer:
 
         # Get the thermostat relay state
         json_response[CONST_THERMO_RELAY] = str(thermostat.get_thermo_state())
-        logger(FINEST, self.CLASS, "State->{}: {}".format(
-            CONST_THERMO_RELAY, str(json_response[CONST_THERMO_RELAY]).lower()))
+        logger(FINEST, self.CLASS, "State->{}: {}", CONST_THERMO_RELAY, json_response[CONST_THERMO_RELAY].lower())
 
         # Get the thermostat switch position
         json_response[CONST_THERMO_SWITCH] = str(thermostat.get_thermo_switch())
-        logger(FINEST, self.CLASS, "State->{}: {}".format(
-            CONST_THERMO_SWITCH, json_response[CONST_THERMO_SWITCH]))
+        logger(FINEST, self.CLASS, "State->{}: {}", CONST_THERMO_SWITCH, json_response[CONST_THERMO_SWITCH])
 
         # Get the thermostat temperature value for the Always ON setting (timeStart="00:00" and timeEnd="00:00":
         json_response[CONST_THERMO_TEMPERATURE] = str(thermostat.get_thermo_manual_temperature())
-        logger(FINEST, self.CLASS,
-               "DAO result: thermostat->manual_temp[{}]".format(thermostat.get_thermo_manual_temperature()))
+        logger(FINEST, self.CLASS, "DAO result: thermostat->manual_temp[{}]", json_response[CONST_THERMO_TEMPERATURE])
 
         # Get the current room temperature
         json_response[CONST_TEMP_NOW] = str(thermostat.get_temperature_now())
-        logger(FINEST, self.CLASS, "State->{}: {}".
-               format(CONST_TEMP_NOW, json_response[CONST_TEMP_NOW]))
+        logger(FINEST, self.CLASS, "State->{}: {}", CONST_TEMP_NOW, json_response[CONST_TEMP_NOW])
 
         # Get the historical room temperature
         json_response[CONST_TEMP_HISTORY] = thermostat.get_temperature_history()
@@ -234,11 +287,59 @@ class AndroidServer:
         json_response = json.loads(json_response)
 
         # Logging up to the first couple of historical temperatures as they usually come in hundreds (~900).
-        response_log = (json.dumps(json_response)[:400] + '..(truncated)') if len(json.dumps(json_response)) > 400 else json.dumps(json_response)
-        logger(FINEST, self.CLASS, "Sending response: size[{}]: {}".format(len(json.dumps(json_response)), response_log))
+        # Serialising the full response is expensive, hence only done when FINEST logging is on.
+        if FINEST <= get_log_level():
+            response_log = json.dumps(json_response)
+            logger(FINEST, self.CLASS, "Sending response: size[{}]: {}", len(response_log),
+                   (response_log[:400] + '..(truncated)') if len(response_log) > 400 else response_log)
 
         return json_response
 
+    def build_metrics_response(self, json_request: json) -> json:
+        """
+        Builds the response to the metrics request: the snapshot of all in-process metrics.
+        The request {"name": "metrics", "action": "set", "value": "dump"} also writes the metrics to the file
+        set by the [metrics] file property.
+
+        Args:
+            json_request:   JSON Request object from the client
+        Returns:
+            JSON:           The metrics snapshot
+        Created:
+            17/10/2026
+        """
+        json_response = {CONST_METRICS: self.metrics.snapshot()}
+
+        if json_request["action"] == "set" and json_request["value"] == "dump":
+            try:
+                json_response["file"] = self.metrics.dump()
+            except (IOError, OSError) as e:
+                logger(WARNING, self.CLASS, "Failed to write the metrics: {}", e)
+                json_response["error"] = str(e)
+
+        return json_response
+
+    def build_profile_response(self, json_request: json) -> json:
+        """
+        Builds the response to the profile request, starting the profiling of the target given as value:
+            {"name": "profile", "action": "set", "value": "thermo|server"}
+
+        Args:
+            json_request:   JSON Request object from the client
+        Returns:
+            JSON:           The profiler status
+        Created:
+            17/10/2026
+        """
+        if json_request["action"] == "set":
+            try:
+                return {CONST_PROFILE: self.profiler.arm(str(json_request["value"]).lower())}
+            except ValueError as e:
+                logger(WARNING, self.CLASS, "Failed to start profiling: {}", e)
+                return {CONST_PROFILE: self.profiler.get_status(), "error": str(e)}
+
+        return {CONST_PROFILE: self.profiler.get_status()}
+
     async def process_request(self, websocket: websockets):
         """
         Determines and fires the action based on the request
@@ -252,58 +353,74 @@ class AndroidServer:
         """
         try:
             async for request_string in websocket:
+                time_start = time.perf_counter()
                 json_request = self.get_json_from_request(request_string)
 
-                logger(FINEST, self.CLASS, "JSON request: {}".format(json_request))
+                logger(FINEST, self.CLASS, "JSON request: {}", json_request)
 
                 if json_request is None or not self.validate_request(json_request):
+                    self.metrics.counter("websocket_invalid_requests").inc()
                     return None
 
                 logger(FINEST, self.CLASS, "Request validated.")
 
-                # Upon receiving any request, to be up-to-date with the latest weather history,
-                # we retrieve and save the latest missing weather information.
-                dao_hw = WeatherDAO(self.config, self.dao)
-                dao_hw.retrieve_and_store_weather_history()
-
-                logger(FINE, self.CLASS, "Processing request: {}".format(json.dumps(json_request)))
-
-                # Based on the received request, we will update the Thermostat object accordingly
-                # build and send the response back to the client.
-                if json_request["name"] == CONST_THERMO_SWITCH:
-                    self.config.setBoilerryServer(CONST_THERMO_SWITCH, str(json_request["value"]))
-
-                    if int(json_request["value"]) > 0:
-                        # Process the newly received settings immediately
-                        self.gpio.temperature_to_relay_state(thermostat.get_thermo_manual_temperature(),
-                                                             thermostat.get_temperature_now())
-                        """
-                        if not self.thermostat.is_alive():
-                            self.thermostat.start()
-                        """
-                    else:
-                        # self.thermostat.stop()
-                        self.gpio.setRelayState(False)
-
-                # At some point, we would be able to set temperature for time slots
-                # Time slot 00:00-00:00 is the temperature for the "Always On" state of the master switch.
-                if json_request["name"] == CONST_THERMO_TEMPERATURE:
-                    self.dao.set_thermostat(json_request["value"], "00:00", "00:00")
-
-                    # Process the newly received settings immediately
-                    self.gpio.temperature_to_relay_state(thermostat.get_thermo_manual_temperature(),
-                                                         thermostat.get_temperature_now())
-
-                # Before building the request, we create the Thermostat object which will initialise
-                # with the latest state known to the server, as well as querying the DB and sensors.
-                # The Thermostat object is sort of a cache, helping out not to retrieve data too often.
-                thermostat = Thermostat(self.dao, self.gpio, self.thermo_sensor)
-
-                # Regardless of the request/command that was sent to the server (us),
-                # we respond with the full state of the system
-                await websocket.send(json.dumps(self.build_state_response(thermostat)))
-                logger(FINE, self.CLASS, "Response sent: {}".format(CONST_THERMO_STATE))
+                # Diagnostics requests are answered straight away, without touching the sensors or the database.
+                if json_request["name"] == CONST_METRICS:
+                    await websocket.send(json.dumps(self.build_metrics_response(json_request)))
+                elif json_request["name"] == CONST_PROFILE:
+                    await websocket.send(json.dumps(self.build_profile_response(json_request)))
+                elif self.profiler.armed:
+                    with self.profiler.profile(PROFILE_TARGET_SERVER):
+                        await self.handle_request(websocket, json_request)
+                else:
+                    await self.handle_request(websocket, json_request)
+
+                self.metrics.histogram("websocket_request_ms", json_request["name"]).observe(
+                    (time.perf_counter() - time_start) * 1000)
         except ConnectionClosedError as cce:
-            logger(FINE, self.CLASS, "Connection closed by client: {}".format(cce))
+            logger(FINE, self.CLASS, "Connection closed by client: {}", cce)
         except Exception as e:
-            logger(WARNING, self.CLASS, "Unexpected error: {}".format(e))
+            logger(WARNING, self.CLASS, "Unexpected error: {}", e)
+
+    async def handle_request(self, websocket: websockets, json_request: json):
+        """
+        Applies the validated request and responds with the full state of the system.
+
+        Args:
+            websocket:      The websocket to respond to.
+            json_request:   Validated JSON Request object from the client
+        Return:
+            none
+        Created:
+            17/10/2026
+        """
+        # Upon receiving any request, to be up-to-date with the latest weather history,
+        # we retrieve and save the latest missing weather information.
+        await self.async_weather.retrieve_and_store_weather_history()
+
+        logger(FINE, self.CLASS, "Processing request: {}", json_request)
+
+        # Based on the received request, we store the new settings first.
+        if json_request["name"] == CONST_THERMO_SWITCH:
+            await self.async_config.setBoilerryServer(CONST_THERMO_SWITCH, str(json_request["value"]))
+
+        # At some point, we would be able to set temperature for time slots
+        # Time slot 00:00-00:00 is the temperature for the "Always On" state of the master switch.
+        if json_request["name"] == CONST_THERMO_TEMPERATURE:
+            await self.async_dao.set_thermostat(json_request["value"], "00:00", "00:00", zone=self.zone.name)
+
+        # Before building the request, we create the Thermostat object which will initialise
+        # with the latest state known to the server, as well as querying the DB and sensors.
+        # The Thermostat object is sort of a cache, helping out not to retrieve data too often.
+        thermostat = await self.executor.run("Thermostat", Thermostat, self.dao, self.zone, self.sampler)
+
+        # Process the newly received settings immediately. The control sets the heating state for the thermostat
+        # mode, as on every control tick, hence the app never overrides the timed or predictive decision.
+        if json_request["name"] in (CONST_THERMO_SWITCH, CONST_THERMO_TEMPERATURE):
+            await self.run_control()
+            thermostat.refresh_thermo_state()
+
+        # Regardless of the request/command that was sent to the server (us),
+        # we respond with the full state of the system
+        await websocket.send(json.dumps(self.build_state_response(thermostat)))
+        logger(FINE, self.CLASS, "Response sent: {}", CONST_THERMO_STATE)
@@ -0,0 +1,116 @@
+#!/usr/bin/python
+###################################################################
+# Heating system control with Raspberry Pi
+# -----------------------------------------------------------------
+# (C) Copyright VAYAK Ltd (info@vayak.com). 2026
+# All Rights Reserved
+#
+# THIS IS UNPUBLISHED PROPRIETARY SOURCE CODE
+# The copyright notice above does not evidence any
+# actual or intended publication of such source code.
+#
+# RESTRICTED RIGHTS:
+# This file may have been supplied under a license.
+# It may be used, disclosed, and/or copied only as permitted
+# under such license agreement. Any copy must contain the
+# above copyright notice and this restricted rights notice.
+# Use, copying, and/or disclosure of the file is strictly
+# prohibited unless otherwise provided in the license agreement.
+###################################################################
+import asyncio
+import functools
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from Common import logger
+from ConfigStore import Singleton
+from Constants import WARNING, FINEST, ASYNC_EXECUTOR_WORKERS, ASYNC_CALL_TIMEOUT
+from Metrics import MetricsRegistry
+
+
+class AsyncExecutor(metaclass=Singleton):
+    """
+    Runs the blocking calls of the websocket server (sensors, relays, database, config file) on a bounded pool
+    of threads, so that one slow call does not stall the event loop, hence every other websocket frame and ping.
+
+    Created: 17/10/2026
+    """
+
+    def __init__(self, workers: int = ASYNC_EXECUTOR_WORKERS):
+        self.CLASS = "AsyncExecutor"
+        self.metrics = MetricsRegistry()
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="AsyncExecutor")
+
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.metrics.add_collector("async_executor", self.get_stats)
+
+    def get_stats(self) -> dict:
+        return {"workers": self.workers, "pending": self.pending}
+
+    async def run(self, label: str, func, *args, call_timeout: float = ASYNC_CALL_TIMEOUT, **kwargs):
+        """
+        Runs the blocking function on the pool and waits for its result without blocking the event loop.
+
+        Args:
+            label:          Name of the call, for the metrics.
+            func:           The blocking function.
+            args:           Its positional arguments.
+            call_timeout:   Time in seconds to wait for the result. The call itself cannot be interrupted, but the
+                            caller gets asyncio.TimeoutError rather than waiting on a stuck sensor or database.
+            kwargs:         Its keyword arguments.
+        Returns:
+            The result of the function.
+        """
+        with self.lock:
+            self.pending += 1
+
+        time_start = time.perf_counter()
+        try:
+            future = asyncio.get_running_loop().run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+            return await asyncio.wait_for(future, call_timeout)
+        except asyncio.TimeoutError:
+            logger(WARNING, self.CLASS, "Call {} did not finish within {} seconds.", label, call_timeout)
+            self.metrics.counter("async_call_timeouts", label).inc()
+            raise
+        finally:
+            with self.lock:
+                self.pending -= 1
+            self.metrics.histogram("async_call_ms", label).observe((time.perf_counter() - time_start) * 1000)
+            logger(FINEST, self.CLASS, "Call {} done, {} pending.", label, self.pending)
+
+    def stop(self):
+        self.executor.shutdown(wait=False)
+
+
+class AsyncFacade:
+    """
+    Awaitable view of a blocking component: every method of the component becomes a coroutine,
+    run on the AsyncExecutor. For example:
+        dao = AsyncFacade(DatabaseDAO())
+        manual_temperature = await dao.get_thermostat_manual()
+
+    Created: 17/10/2026
+    """
+
+    def __init__(self, component, executor: AsyncExecutor = None):
+        self.component = component
+        self.executor = executor or AsyncExecutor()
+        self.name = type(component).__name__
+
+    def __getattr__(self, method_name: str):
+        method = getattr(self.component, method_name)
+        if not callable(method):
+            return method
+
+        label = "{}.{}".format(self.name, method_name)
+
+        async def call(*args, **kwargs):
+            return await self.executor.run(label, method, *args, **kwargs)
+
+        # Cache the coroutine function, so the lookup is done only once per method.
+        setattr(self, method_name, call)
+        return call
@@ -0,0 +1,277 @@
+#!/usr/bin/python
+###################################################################
+# Heating system control with Raspberry Pi
+# -----------------------------------------------------------------
+# (C) Copyright VAYAK Ltd (info@vayak.com). 2026
+# All Rights Reserved
+#
+# THIS IS UNPUBLISHED PROPRIETARY SOURCE CODE
+# The copyright notice above does not evidence any
+# actual or intended publication of such source code.
+#
+# RESTRICTED RIGHTS:
+# This file may have been supplied under a license.
+# It may be used, disclosed, and/or copied only as permitted
+# under such license agreement. Any copy must contain the
+# above copyright notice and this restricted rights notice.
+# Use, copying, and/or disclosure of the file is strictly
+# prohibited unless otherwise provided in the license agreement.
+###################################################################
+"""
+Compares control policies on the recorded history of a zone, before switching the thermostat mode:
+
+    BOILERRY_HOME=/opt/boilerry-server python3 Backtest.py --from 2025-10-01 --to 2026-04-01
+"""
+import argparse
+import time
+
+from datetime import datetime
+from typing import List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+from Common import logger
+from Constants import INFO, FINE, ZONE_DEFAULT, PREHEAT_MAX_MINUTES, BACKTEST_STEP, BACKTEST_COMFORT_TOLERANCE
+from ThermalModel import ThermalModel
+from ThermoSchedule import ThermoSchedule, MINUTES_PER_WEEK
+
+MODE_MANUAL = 1
+MODE_TIMED = 2
+MODE_PREDICTIVE = 3
+
+# 01/01/1970 was a Thursday, the day 3 of the week counted from Monday.
+EPOCH_MINUTE_OF_WEEK = 3 * 24 * 60
+
+
+class Policy(NamedTuple):
+    """
+    A control policy to backtest:
+        mode:       MODE_MANUAL keeps 'setpoint', MODE_TIMED and MODE_PREDICTIVE follow the thermostat settings.
+        setpoint:   The temperature of MODE_MANUAL.
+        hysteresis: Heat below the setting minus hysteresis, stop at the setting plus hysteresis.
+        preheat:    Start heating for the next rise of the setting in time to reach it (PreheatOptimizer).
+        horizon:    MODE_PREDICTIVE: heat if the room, unheated, would fall below the setting within horizon seconds.
+    """
+    name: str
+    mode: int
+    setpoint: float = 0.0
+    hysteresis: float = 0.0
+    preheat: bool = False
+    horizon: float = 0.0
+
+
+def default_policies(manual_temperature: float) -> List[Policy]:
+    """
+    The policies compared by default: the manual setting at a few temperatures, and the timed and predictive modes,
+    each with a few hysteresis bands, with and without preheat.
+    """
+    policies = []
+    for hysteresis in (0.0, 0.25, 0.5, 1.0):
+        for offset in (-1.0, 0.0, 1.0):
+            setpoint = manual_temperature + offset
+            policies.append(Policy("manual {:g} h{:g}".format(setpoint, hysteresis), MODE_MANUAL, setpoint, hysteresis))
+        for preheat in (False, True):
+            policies.append(Policy("timed h{:g}{}".format(hysteresis, " preheat" if preheat else ""),
+                                   MODE_TIMED, hysteresis=hysteresis, preheat=preheat))
+    for horizon in (15, 30, 60, 120):
+        for preheat in (False, True):
+            policies.append(Policy("predictive {}m{}".format(horizon, " preheat" if preheat else ""),
+                                   MODE_PREDICTIVE, preheat=preheat, horizon=horizon * 60))
+    return policies
+
+
+class Backtest:
+    """
+    Replays the recorded outside conditions of a zone under several control policies at once.
+
+    The room is simulated by the thermal model fitted on the same history, every BACKTEST_STEP seconds, in closed
+    form. The policies are the columns of the state arrays, hence every step is a handful of NumPy operations
+    whatever the number of policies, and a year of history takes seconds. The comfort is measured against the
+    thermostat settings of the zone, whatever the policy.
+
+    Created: 17/10/2026
+    """
+
+    def __init__(self, rows: Sequence[Tuple], schedule: ThermoSchedule, model: ThermalModel = None):
+        """
+        Args:
+            rows:       Tuples of (datetime, time_state_on, room, temperature, wspd) ordered by datetime,
+                        as given by DatabaseDAO.get_temperature_rows().
+            schedule:   The compiled thermostat settings of the zone.
+            model:      The thermal model of the zone. Default: fitted on the rows.
+        """
+        self.CLASS = "Backtest"
+        self.schedule = schedule
+
+        if model is None:
+            model = ThermalModel()
+            model.update(list(rows))
+        if not model.is_ready():
+            raise ValueError("Not enough history to fit the thermal model: {} records".format(len(rows)))
+        self.model = model
+
+        data = np.array([[row[0].timestamp(), row[1] or 0, row[2],
+                          np.nan if row[3] is None else row[3], np.nan if row[4] is None else row[4]] for row in rows])
+        self.recorded_time, self.recorded_on, self.recorded_room, outdoor, wind = data.T
+        self.time_first = rows[0][0]
+
+        # The control steps, with the weather interpolated between the (hourly) records.
+        self.time = np.arange(self.recorded_time[0], self.recorded_time[-1], BACKTEST_STEP)
+        self.outdoor = self.interpolate(outdoor)
+        self.wind = np.nan_to_num(self.interpolate(wind))
+
+        # The thermostat settings at every step, the time until their next change and the next setting.
+        minute = (np.datetime64(self.time_first, 'm').astype(np.int64) + EPOCH_MINUTE_OF_WEEK
+                  + ((self.time - self.time[0]) // 60).astype(np.int64)) % MINUTES_PER_WEEK
+        table = np.array(schedule.table)
+        change_in, change_to = self.next_changes(table)
+        self.thermo = table[minute]
+        self.change_in = change_in[minute] * 60.0 - (self.time - self.time[0]) % 60
+        self.change_to = change_to[minute]
+
+    def interpolate(self, values: np.ndarray) -> np.ndarray:
+        known = np.isfinite(values)
+        if not known.any():
+            return np.zeros_like(self.time)
+        return np.interp(self.time, self.recorded_time[known], values[known])
+
+    @staticmethod
+    def next_changes(table: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        For every minute of the week, the minutes until the thermostat setting changes and the setting it changes to.
+        A setting that never changes is reported as changing in a week, to itself.
+        """
+        change_in = np.full(MINUTES_PER_WEEK, float(MINUTES_PER_WEEK))
+        change_to = table.copy()
+        # Two rounds around the week, backwards, carry the next change over Sunday midnight.
+        for minute in reversed(range(2 * MINUTES_PER_WEEK - 1)):
+            current, following = minute % MINUTES_PER_WEEK, (minute + 1) % MINUTES_PER_WEEK
+            if table[following] != table[current]:
+                change_in[current], change_to[current] = 1, table[following]
+            elif change_in[following] < MINUTES_PER_WEEK:
+                change_in[current], change_to[current] = change_in[following] + 1, change_to[following]
+        return change_in, change_to
+
+    def run(self, policies: Sequence[Policy]) -> List[dict]:
+        """
+        Runs the policies over the history.
+
+        Returns:
+            list:   The results per policy: the heating hours, the relay cycles, the degree-hours below the thermostat
+                    settings and the hours below them by more than BACKTEST_COMFORT_TOLERANCE.
+        """
+        time_start = time.perf_counter()
+        count = len(policies)
+
+        mode = np.array([policy.mode for policy in policies])
+        manual = mode == MODE_MANUAL
+        predictive = mode == MODE_PREDICTIVE
+        setpoint = np.array([policy.setpoint for policy in policies], dtype=float)
+        hysteresis = np.array([policy.hysteresis for policy in policies], dtype=float)
+        preheat = np.array([policy.preheat for policy in policies])
+        horizon = np.array([policy.horizon for policy in policies], dtype=float)
+
+        loss, wind_loss, gain, internal = self.model.parameters
+        rate = loss + wind_loss * self.wind
+        steady_off = self.outdoor + internal / rate
+        steady_on = self.outdoor + (gain + internal) / rate
+        decay = np.exp(-rate * BACKTEST_STEP)
+
+        room = np.full(count, self.recorded_room[0])
+        heating = np.zeros(count, dtype=bool)
+        seconds_on = np.zeros(count)
+        cycles = np.zeros(count, dtype=np.int64)
+        discomfort = np.zeros(count)
+        violations = np.zeros(count)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for step in range(len(self.time)):
+                thermo = self.thermo[step]
+                target = np.where(manual, setpoint, thermo)
+
+                # Preheat: the time needed to heat up to the next setting, against the time left until it.
+                if self.change_to[step] > thermo and self.change_in[step] <= PREHEAT_MAX_MINUTES * 60:
+                    reachable = steady_on[step] > self.change_to[step]
+                    needed = np.log((steady_on[step] - room) / (steady_on[step] - self.change_to[step])) / rate[step]
+                    due = preheat & ~manual & ((needed >= self.change_in[step]) | ~reachable) & (room < self.change_to[step])
+                    target = np.where(due, self.change_to[step], target)
+
+                # Heat below the band, stop above it, keep the state within it.
+                switch = np.where(room < target - hysteresis, True, np.where(room >= target + hysteresis, False, heating))
+                # Predictive: heat if the room, unheated, would fall below the setting within the horizon.
+                coasted = steady_off[step] + (room - steady_off[step]) * np.exp(-rate[step] * horizon)
+                switch = np.where(predictive, coasted < target, switch)
+
+                cycles += switch & ~heating
+                heating = switch
+                seconds_on += heating * BACKTEST_STEP
+
+                steady = np.where(heating, steady_on[step], steady_off[step])
+                room_next = steady + (room - steady) * decay[step]
+                below = thermo - (room + room_next) / 2
+                discomfort += np.maximum(below, 0.0) * BACKTEST_STEP / 3600
+                violations += (below > BACKTEST_COMFORT_TOLERANCE) * BACKTEST_STEP / 3600
+                room = room_next
+
+        time_ms = (time.perf_counter() - time_start) * 1000
+        logger(FINE, self.CLASS, "Backtested {} policies over {} steps in {:.0f} ms.", count, len(self.time), time_ms)
+
+        return [{
+            "policy": policy.name,
+            "heating_hours": round(float(seconds_on[index]) / 3600, 1),
+            "relay_cycles": int(cycles[index]),
+            "discomfort_degree_hours": round(float(discomfort[index]), 1),
+            "violation_hours": round(float(violations[index]), 1)
+        } for index, policy in enumerate(policies)]
+
+    def recorded(self) -> dict:
+        """
+        The results of what was recorded, for comparison: the heating time of the records and the comfort of the
+        recorded room temperature.
+        """
+        thermo = np.interp(self.recorded_time, self.time, self.thermo)
+        period = np.diff(self.recorded_time, append=self.recorded_time[-1])
+        below = thermo - self.recorded_room
+        return {
+            "policy": "recorded",
+            "heating_hours": round(float(self.recorded_on.sum()) / 3600, 1),
+            "relay_cycles": None,
+            "discomfort_degree_hours": round(float((np.maximum(below, 0.0) * period).sum()) / 3600, 1),
+            "violation_hours": round(float(((below > BACKTEST_COMFORT_TOLERANCE) * period).sum()) / 3600, 1)
+        }
+
+
+if __name__ == "__main__":
+    from ConfigStore import ConfigStore
+    from DatabaseDAO import DatabaseDAO
+
+    parser = argparse.ArgumentParser(description="Backtests the control policies on the recorded temperatures.")
+    parser.add_argument("--from", dest="since", required=True, type=lambda text: datetime.strptime(text, "%Y-%m-%d"),
+                        help="Start of the history, YYYY-MM-DD")
+    parser.add_argument("--to", dest="until", default=None, type=lambda text: datetime.strptime(text, "%Y-%m-%d"),
+                        help="End of the history, YYYY-MM-DD. Default: now")
+    parser.add_argument("--zone", default=ZONE_DEFAULT, help="Heating zone. Default: " + ZONE_DEFAULT)
+    arguments = parser.parse_args()
+
+    config = ConfigStore()
+    zone_config = config.snapshot.zones.get(arguments.zone)
+    if zone_config is None:
+        parser.error("Unknown zone: {}".format(arguments.zone))
+
+    dao = DatabaseDAO()
+    thermo_schedule = ThermoSchedule()
+    thermostat = dao.get_thermostat(arguments.zone)
+    if thermostat is None:
+        parser.error("Failed to read the thermostat settings of zone: {}".format(arguments.zone))
+    thermo_schedule.compile(thermostat)
+    history = dao.get_temperature_rows(arguments.since, arguments.zone, zone_config.sensors, arguments.until)
+
+    backtest = Backtest(history, thermo_schedule)
+    results = [backtest.recorded()] + backtest.run(default_policies(thermo_schedule.manual_temperature))
+
+    logger(INFO, "Backtest", "Backtested {} records of zone '{}': {}", len(history), arguments.zone, results)
+    print("{:<28} {:>10} {:>8} {:>12} {:>10}".format("policy", "heating_h", "cycles", "discomfort", "violation_h"))
+    for result in results:
+        print("{:<28} {:>10} {:>8} {:>12} {:>10}".format(result["policy"], result["heating_hours"],
+                                                         "-" if result["relay_cycles"] is None else result["relay_cycles"],
+                                                         result["discomfort_degree_hours"], result["violation_hours"]))
@@ -28,21 +28,28 @@ from ConfigStore import ConfigStore
 from Constants import CRITICAL
 from DatabaseDAO import DatabaseDAO
 from DS18B20 import DS18B20
-from GPIO import GPIO
+from TemperatureSampler import TemperatureSampler
 from ThermoControl import ThermoControl
+from Zone import Zone
 
 config = ConfigStore()
 dao_db = DatabaseDAO()
-gpio = GPIO()
 sensor = DS18B20()
 
+# Start reading the temperature sensors in the background
+sampler = TemperatureSampler(sensor)
+sampler.start()
+
+# Every zone has its own relays, and all relay changes of a zone go through its relay controller
+zones = {name: Zone(zone_config, dao_db, sampler) for name, zone_config in config.snapshot.zones.items()}
+
 # Start motion recording
 #motion_recorder = MotionRecorder(GPIO_PIN_PIR)
 #motion_recorder.start()
 
 # Start the thermostat control
 try:
-    thermostat = ThermoControl(dao_db, gpio, sensor)
+    thermostat = ThermoControl(dao_db, zones, sampler)
     thermostat.start()
 except Exception as e:
     logger(CRITICAL, "Boilerry", "Failed to start the Thermostat controller: {}. Exiting..".format(e))
@@ -50,5 +57,5 @@ except Exception as e:
     sys.exit(1)
 
 # Start Android server
-server = AndroidServer(config, dao_db, gpio, sensor)
+server = AndroidServer(config, dao_db, zones, sampler, thermostat)
 asyncio.run(server.main())
@@ -0,0 +1,102 @@
+#!/usr/bin/python
+###################################################################
+# Heating system control with Raspberry Pi
+# -----------------------------------------------------------------
+# (C) Copyright VAYAK Ltd (info@vayak.com). 2026
+# All Rights Reserved
+#
+# THIS IS UNPUBLISHED PROPRIETARY SOURCE CODE
+# The copyright notice above does not evidence any
+# actual or intended publication of such source code.
+#
+# RESTRICTED RIGHTS:
+# This file may have been supplied under a license.
+# It may be used, disclosed, and/or copied only as permitted
+# under such license agreement. Any copy must contain the
+# above copyright notice and this restricted rights notice.
+# Use, copying, and/or disclosure of the file is strictly
+# prohibited unless otherwise provided in the license agreement.
+###################################################################
+import threading
+import time
+
+from datetime import datetime, timedelta
+
+_clock = None
+
+
+class SystemClock:
+    """
+    The real time: the monotonic clock for the periods and deadlines, and the wall clock for the schedules.
+    """
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def now(self) -> datetime:
+        return datetime.now()
+
+    def wait(self, condition: threading.Condition, timeout: float = None) -> bool:
+        """
+        Waits on the condition (held by the caller) until notified or for the timeout.
+
+        Returns:
+            bool:   False if the timeout has expired, true otherwise.
+        """
+        return condition.wait(timeout)
+
+
+class VirtualClock:
+    """
+    Simulated time, which only moves forward when advanced. Waiting for a timeout advances the clock to its end
+    straight away, hence a thread scheduling its work by deadlines (the EventScheduler) runs through the simulated
+    time as fast as it can do the work.
+
+    Created: 17/10/2026
+    """
+
+    def __init__(self, start: datetime = None):
+        """
+        Args:
+            start:  The wall clock time at the start. Default: now.
+        """
+        self.start = start or datetime.now()
+        self.elapsed = 0.0
+        self.lock = threading.Lock()
+
+    def monotonic(self) -> float:
+        return self.elapsed
+
+    def now(self) -> datetime:
+        return self.start + timedelta(seconds=self.elapsed)
+
+    def advance(self, seconds: float):
+        if seconds > 0:
+            with self.lock:
+                self.elapsed += seconds
+
+    def wait(self, condition: threading.Condition, timeout: float = None) -> bool:
+        if timeout is None:
+            # Nothing due in the simulated time, only another thread can wake us up.
+            return condition.wait()
+        self.advance(timeout)
+        return False
+
+
+def get_clock():
+    """
+    Returns the clock used by the control: the SystemClock, unless set_clock() was called.
+    """
+    global _clock
+    if _clock is None:
+        _clock = SystemClock()
+    return _clock
+
+
+def set_clock(clock):
+    """
+    Replaces the clock used by the control, e.g. with a VirtualClock for the simulation.
+    Set it before creating the components.
+    """
+    global _clock
+    _clock = clock
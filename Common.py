@@ -1,31 +1,36 @@
 #!/usr/bin/python
+import atexit
+import threading
+
 from datetime import timezone, datetime
 from dateutil.parser import parse
-from time import gmtime, strftime, sleep
 
 from Constants import *
-from ConfigStore import ConfigStore
+from Clock import get_clock
+from LogWriter import LogWriter
+from Metrics import MetricsRegistry
+
+_log_writer = None
+_log_writer_lock = threading.Lock()
 
 
 def read_temperature_now(self, sensor: str = "sensor_1") -> float:
     """
-    Retrieves the room temperature reading from the sensor
+    Retrieves the latest room temperature reading of the sensor, as sampled in the background.
+    If the sensor has not been read yet since the start, waits up to the sensor timeout for the first reading.
 
     Args:
-        self:       The caller.
+        self:       The caller, with the 'sampler' attribute.
         sensor:     Which sensor to read, as defined in the boilerry.ini file
     Returns:
-        float:      The room temperature reading
+        float:      The room temperature reading, or SENSOR_FAILURE_TEMPERATURE if there is no valid reading.
     Created:
         08/02/2024
     """
-    thermo_units = self.config.setBoilerryServer(CONST_TEMP_UNITS, "C")
-    room_temperature = self.thermo_sensor.getTemp(
-        self.config.getSensor(sensor + "_id"),
-        self.config.getSensor(sensor + "_timeout"),
-        thermo_units
-    )
-    return float(room_temperature)
+    snapshot = self.config.snapshot
+    sensor_config = snapshot.sensors.get(sensor)
+    wait = sensor_config.timeout if sensor_config else 0
+    return float(self.sampler.read(sensor, snapshot.temp_units, wait=wait))
 
 
 def validateDateTime(datetime_text: str) -> bool:
@@ -46,15 +51,11 @@ def validateDateTime(datetime_text: str) -> bool:
 
 def getCurrentTime() -> str:
     # return str(strftime("%Y-%m-%dT%H:%M:%S", gmtime()))
-    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    return get_clock().now().strftime("%Y-%m-%d %H:%M:%S")
 
 
 def getCurrentDate() -> str:
-    return str(strftime("%Y-%m-%d", gmtime()))
-
-
-def getCurrentTimeMinutes() -> int:
-    return int(strftime("%M", gmtime()))
+    return get_clock().now().strftime("%Y-%m-%d")
 
 
 def hhmm_to_timestamp(hh_mm: str) -> float:
@@ -67,7 +68,7 @@ def hhmm_to_timestamp(hh_mm: str) -> float:
         Today's datetime repressing the time specified by the HH_MM string
     """
     dt = datetime.strptime(hh_mm, "%H:%M")
-    dt_now = datetime.now()
+    dt_now = get_clock().now()
     dt = dt.replace(year=dt_now.year, month=dt_now.month, day=dt_now.day)
     return dt.timestamp()
 
@@ -110,43 +111,70 @@ def timestampToDate(timestamp: int) -> str:
     return timestampToLocaLTime(timestamp).strftime("%Y-%m-%d")
 
 
-def sleep_to_next_minute(sleep_interval: int) -> None:
+def logger(level: int, caller: str, message: str, *args):
     """
-    Ensures the sleeping ends at the first second of the new minute. For example, if we start sleeping for a minute
-    at 18:47:55, we will end sleeping at 18:48:00. Yes we slept less than 60 seconds, but we woke up at the beginning
-    of the next minute.
-    This is to ensure that the MOD calculation for when to take recording is not mislead. I.e. We run the loop every
-    minute, while the processing may take up to a second. If we start processing at 14:00:00, by the time Close to the end of the hour, we could easily check if
-    we need to record the temperature 1 second later, not detecting that it was that minute when it should have happened.
+    Logs message to the screen or log file in a readable format.
+
+    The message is only formatted with the given arguments when the level is enabled, hence on the hot paths
+    prefer logger(FINEST, self.CLASS, "Value: {}", value) over pre-formatting the message.
+    The writing itself happens in the background LogWriter thread.
 
     Args:
-        sleep_interval:     Time in seconds to sleep
+        level:      The logging level in which the message should appear.
+        caller:     The name of the class that prints the log information.
+        message:    The Log message, or its format string if arguments are provided.
+        args:       Optional arguments to format the message with.
+    Returns:
+        none
     """
-    sleep_start_minute = getCurrentTimeMinutes()
+    log_writer = _log_writer or start_log_writer()
+
+    if level > log_writer.get_level():
+        return
+
+    if args:
+        message = message.format(*args)
 
-    while (sleep_start_minute + sleep_interval - 1) == getCurrentTimeMinutes():
-        sleep(1)
+    log_writer.write(level, caller, message)
 
 
-def logger(level: int, caller: str, message: str):
+def get_log_level() -> int:
     """
-    Logs message to the screen or log file in a readable format
+    Returns the cached log level threshold, allowing the callers to skip building expensive log messages.
 
-    Args:
-        level:      The logging level in which the message should appear.
-        caller:     The name of the class that prints the log information.
-        message:    The Log message.
     Returns:
-        none
+        int:    Index of the log level in LOG_LEVELS.
+    """
+    return (_log_writer or start_log_writer()).get_level()
+
+
+def start_log_writer() -> LogWriter:
+    """
+    Starts the background log writer on the first logged message.
+
+    Returns:
+        LogWriter:  The running log writer.
     """
-    config = ConfigStore()
-    log_level = config.getLogLevel()
-    log_out = config.getLogFile()
-
-    if level <= log_level:
-        if log_out == "stdout":
-            print("{} {: >9} {: >15} {}".format(getCurrentTime(), LOG_LEVELS[level], caller, message))
-        else:
-            with open(log_out, "a") as file_runtime:
-                file_runtime.write(
-                    "{} {: >9} {: >15} {}\n".format(getCurrentTime(), LOG_LEVELS[level], caller, message))
+    global _log_writer
+
+    with _log_writer_lock:
+        if _log_writer is None:
+            log_writer = LogWriter()
+            log_writer.start()
+            atexit.register(log_writer.stop)
+            MetricsRegistry().add_collector("log", log_writer.get_stats)
+            _log_writer = log_writer
+
+    return _log_writer
+
+
+def stop_log_writer() -> None:
+    """
+    Writes out all the queued log messages and stops the background log writer.
+    """
+    global _log_writer
+
+    with _log_writer_lock:
+        if _log_writer is not None:
+            _log_writer.stop()
+            _log_writer = None
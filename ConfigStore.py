@@ -18,11 +18,28 @@
 # prohibited unless otherwise provided in the license agreement.
 ###################################################################
 import configparser
-import time
+import ctypes
 import os
-import pathlib
+import re
+import select
+import struct
+import threading
 
-from Constants import CONFIG_UPDATE_PERIOD, LOG_LEVELS
+from datetime import datetime, time
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Callable, Dict, List, Mapping, NamedTuple, Optional, Tuple
+
+from Constants import CONFIG_WATCH_PERIOD, LOG_LEVELS, ZONE_DEFAULT
+
+# Linux inotify: the flags of inotify_init1() and of the events (sys/inotify.h), and the header of an event,
+# followed by the name of the file.
+IN_CLOEXEC = 0o2000000
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+INOTIFY_EVENT = struct.Struct("iIII")
 
 
 class Singleton(type):
@@ -37,11 +54,209 @@ class Singleton(type):
         return cls._instances[cls]
 
 
+class SensorConfig(NamedTuple):
+    """
+    Settings of one temperature sensor: sensor_<N>_id, sensor_<N>_timeout and sensor_<N>_period in [temperature.sensor].
+    """
+    name: str
+    id: str
+    timeout: int
+    period: int = 60
+
+
+class ZoneConfig(NamedTuple):
+    """
+    Settings of one heating zone, the [zone.<name>] section: the sensors measuring its room temperature,
+    and its pair of relays. Without any zone sections, the single zone ZONE_DEFAULT is made of sensor_1
+    and the relays of [pin.gpio].
+    """
+    name: str
+    sensors: Tuple[str, ...]
+    relay_1: Optional[int]
+    relay_2: Optional[int]
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """
+    Immutable, already parsed and validated view of the INI config file.
+    A new snapshot is published every time the file changes, hence the callers can keep a reference to the values
+    for the duration of an operation, and read them with a single attribute lookup.
+    Invalid values are replaced by their defaults and reported in 'errors'.
+    """
+    # [logging]
+    log_level: int = LOG_LEVELS.index("INFO")
+    log_file: str = "stdout"
+    log_buffer_size: int = 64 * 1024
+    log_flush_interval: float = 10.0
+    log_queue_size: int = 10000
+    log_rotate: str = "size"
+    log_max_size: int = 1024 * 1024
+    log_max_total_size: int = 10 * 1024 * 1024
+
+    # [metrics]
+    metrics_file: str = "metrics.json"
+    metrics_dump_interval: int = 0
+
+    # [profiling]
+    profiling_target: str = "none"
+    profiling_mode: str = "cprofile"
+    profiling_iterations: int = 5
+    profiling_interval: float = 0.01
+    profiling_time_limit: int = 300
+    profiling_output_dir: str = "profiles"
+
+    # [database]
+    db_backend: str = "mysql"
+    db_sqlite_file: str = "boilerry.db"
+    db_journal_file: str = "write_behind.jsonl"
+    db_flush_interval: float = 30.0
+    db_batch_size: int = 500
+
+    # [weather]
+    weather_api: str = ""
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    unit_speed: str = "kph"
+    unit_temperature: str = "C"
+    min_days_history: int = 1
+    min_hours_since_last_record: int = 2
+    time_to_retrieve_weather_history: Optional[time] = None
+
+    # [temperature.sensor]
+    sensors: Mapping[str, SensorConfig] = field(default_factory=lambda: MappingProxyType({}))
+    sensor_max_age: int = 180
+    w1_devices: str = "/sys/bus/w1/devices"
+
+    # [pin.gpio]
+    gpio_motion_1: Optional[int] = None
+    gpio_relay_1: Optional[int] = None
+    gpio_relay_2: Optional[int] = None
+
+    # [zone.<name>]
+    zones: Mapping[str, ZoneConfig] = field(default_factory=lambda: MappingProxyType({}))
+
+    # [android.server]
+    android_host: str = ""
+    android_port: int = 9741
+    android_max_invalid_requests: int = 5
+
+    # [boilerry.server]
+    thermo_switch: int = 1
+    temp_units: str = "C"
+    temp_record_interval: int = 30
+    control_interval: int = 60
+    predictive_horizon: int = 30
+    motion_period_no_occupants: int = 30
+    motion_time_between_writes: int = 10
+
+    errors: Tuple[str, ...] = ()
+
+
+class ConfigWatcher(threading.Thread):
+    """
+    Watches the INI config file for changes and reloads the config store when it changes.
+
+    On Linux, the kernel notifies the changes (inotify), hence the config is reloaded as soon as the file is written,
+    without polling. The directory of the file is watched, as editors usually replace the file rather than writing
+    to it. Elsewhere, or when inotify is not available, the file is checked every CONFIG_WATCH_PERIOD seconds for
+    a change of its modification time, inode or size.
+    """
+
+    def __init__(self, config_store):
+        super().__init__(name="ConfigWatcher", daemon=True)
+        self.config_store = config_store
+        self.stopped = threading.Event()
+
+        # Written to by stop(), to wake up the thread waiting on the inotify events.
+        self.wakeup_read, self.wakeup_write = os.pipe()
+
+    def run(self):
+        inotify = self.open_inotify()
+        if inotify is None:
+            self.poll()
+            return
+
+        try:
+            self.watch(inotify)
+        finally:
+            os.close(inotify)
+
+        # The watch was removed, e.g. the directory was deleted or unmounted.
+        self.poll()
+
+    def open_inotify(self) -> Optional[int]:
+        """
+        Returns:
+            int:    The inotify file descriptor watching the directory of the config file, or None if not available.
+        """
+        try:
+            libc = ctypes.CDLL(None, use_errno=True)
+            inotify = libc.inotify_init1(IN_CLOEXEC)
+        except (OSError, AttributeError):
+            return None
+        if inotify < 0:
+            print("Failed to watch the configuration file: {}. Checking it every {} seconds."
+                  .format(os.strerror(ctypes.get_errno()), CONFIG_WATCH_PERIOD))
+            return None
+
+        directory = os.path.dirname(self.config_store.file)
+        if libc.inotify_add_watch(inotify, os.fsencode(directory), IN_CLOSE_WRITE | IN_MOVED_TO) < 0:
+            print("Failed to watch the configuration directory '{}': {}. Checking it every {} seconds."
+                  .format(directory, os.strerror(ctypes.get_errno()), CONFIG_WATCH_PERIOD))
+            os.close(inotify)
+            return None
+        return inotify
+
+    def watch(self, inotify: int):
+        """
+        Reloads the config whenever the file is written or replaced, until stopped or the watch is removed.
+        """
+        file_name = os.fsencode(os.path.basename(self.config_store.file))
+
+        # A change made before the watch was added.
+        self.config_store.readConfig(watcher=True)
+
+        while not self.stopped.is_set():
+            readable, _, _ = select.select([inotify, self.wakeup_read], [], [])
+            if inotify not in readable:
+                continue
+
+            changed = False
+            events = os.read(inotify, 4096)
+            offset = 0
+            while offset + INOTIFY_EVENT.size <= len(events):
+                _, mask, _, length = INOTIFY_EVENT.unpack_from(events, offset)
+                name = events[offset + INOTIFY_EVENT.size:offset + INOTIFY_EVENT.size + length].rstrip(b"\0")
+                offset += INOTIFY_EVENT.size + length
+
+                if mask & IN_IGNORED:
+                    return
+                # The other files of the directory (e.g. the logs) are not of interest, unless events were lost.
+                changed = changed or name == file_name or bool(mask & IN_Q_OVERFLOW)
+
+            if changed:
+                self.config_store.readConfig(watcher=True)
+
+    def poll(self):
+        while not self.stopped.is_set():
+            self.config_store.readConfig(watcher=True)
+            self.stopped.wait(CONFIG_WATCH_PERIOD)
+
+    def stop(self):
+        self.stopped.set()
+        os.write(self.wakeup_write, b"\0")
+
+
 class ConfigStore(metaclass=Singleton):
     """
-    On-demand pull of the settings from the file config store,
+    Change driven store of the settings from the file config store,
     allowing the user to update them without the need to restart the application.
 
+    The file is only re-read when it changes on disk. Each (re)load publishes an immutable, typed ConfigSnapshot
+    in the 'snapshot' attribute, which is what the components should read.
+    The get*() methods returning the raw strings are kept for the less frequently used settings.
+
     Created: 20/03/1024
     """
 
@@ -56,7 +271,7 @@ class ConfigStore(metaclass=Singleton):
         Returns:
             none
 
-        Modified: [20/03/2024]
+        Modified: [20/03/2024, 17/10/2026]
         """
         super().__init__()
         self.CLASS = "ConfigStore"
@@ -75,21 +290,238 @@ class ConfigStore(metaclass=Singleton):
             print("Config file not found: {}".format(self.file))
             exit(1)
 
+        self.lock = threading.RLock()
         self.config = configparser.ConfigParser()
-        self.config_read_time = 0
+        self.snapshot = ConfigSnapshot()
+        self.file_signature = None
+
+        # The raw values of the last loaded file, {section: {property: value}}, to detect what has changed.
+        self.values: Dict[str, Dict[str, str]] = {}
+        self.subscriptions: List[Tuple[str, Optional[str], Callable[[ConfigSnapshot], None]]] = []
 
-    def readConfig(self):
+        self.readConfig()
+
+        self.watcher = ConfigWatcher(self)
+        self.watcher.start()
+
+    def readConfig(self, watcher: bool = False, force: bool = False):
         """
-        Read the config no nore often than every minute
+        Re-read the config file if it has changed since it was last read, and publish a new snapshot.
+
+        Args:
+            watcher:    True when called by the ConfigWatcher. The other callers rely on the watcher
+                        to keep the config up-to-date, as long as it is running.
+            force:      Re-read the file even if it looks unchanged.
         """
-        if self.config_read_time + CONFIG_UPDATE_PERIOD <= int(time.time()):
-            self.config_read_time = int(time.time())
+        if not watcher and not force and self.file_signature is not None and self.watcher.is_alive():
+            return
+
+        try:
+            file_stat = os.stat(self.file)
+            file_signature = (file_stat.st_mtime_ns, file_stat.st_ino, file_stat.st_size)
+        except OSError:
+            file_signature = None
+
+        if file_signature == self.file_signature and not force:
+            return
+
+        with self.lock:
+            config = configparser.ConfigParser()
             try:
-                """ TODO: provide a path to the ini file"""
                 with open(self.file) as file:
-                    self.config.read_file(file)
-            except IOError:
-                print("Failed to read configuration file '{}'. Using defaults.".format(self.file))
+                    config.read_file(file)
+            except (IOError, configparser.Error) as e:
+                print("Failed to read configuration file '{}': {}. Keeping the previous settings.".format(self.file, e))
+                self.file_signature = file_signature
+                return
+
+            snapshot = self.parse_snapshot(config)
+            for error in snapshot.errors:
+                print("Invalid configuration in '{}': {}. Using the default value.".format(self.file, error))
+
+            values = {section: dict(config[section]) for section in config.sections()}
+            notify = [callback for section, property_name, callback in self.subscriptions
+                      if self.values and self.has_changed(self.values, values, section, property_name)]
+
+            self.config = config
+            self.snapshot = snapshot
+            self.file_signature = file_signature
+            self.values = values
+
+        # The subscribers are notified outside the lock, so that they can read the config store.
+        for callback in notify:
+            try:
+                callback(snapshot)
+            except Exception as e:
+                print("Config change subscriber {} failed: {}".format(callback, e))
+
+    @staticmethod
+    def has_changed(values_old: dict, values_new: dict, section: str, property_name: Optional[str]) -> bool:
+        """
+        Checks if a property (or any property of the section) has a different value in the new config.
+        """
+        section_old = values_old.get(section, {})
+        section_new = values_new.get(section, {})
+        if property_name is None:
+            return section_old != section_new
+        return section_old.get(property_name) != section_new.get(property_name)
+
+    def subscribe(self, section: str, property_name: Optional[str], callback: Callable[[ConfigSnapshot], None]):
+        """
+        Registers a function to be called with the new snapshot when the value of a property changes in the file.
+        The function is called from the ConfigWatcher thread (or the thread changing the config), hence it should
+        only take over the new values or wake up its component, rather than do any lengthy processing.
+
+        Args:
+            section:        The section of the INI config file, e.g. 'boilerry.server'.
+            property_name:  The property in the section, or None for a change of any property in the section.
+            callback:       Function called with the new ConfigSnapshot.
+        """
+        with self.lock:
+            self.subscriptions.append((section, property_name.lower() if property_name else None, callback))
+
+    def unsubscribe(self, callback: Callable[[ConfigSnapshot], None]):
+        """
+        Removes all the subscriptions of the function.
+        """
+        with self.lock:
+            self.subscriptions = [subscription for subscription in self.subscriptions if subscription[2] != callback]
+
+    @staticmethod
+    def parse_snapshot(config: configparser.ConfigParser) -> ConfigSnapshot:
+        """
+        Parses and validates the INI config into a typed snapshot.
+
+        Args:
+            config:     The parsed INI config file.
+        Returns:
+            ConfigSnapshot: The typed settings, with defaults for the missing and invalid values.
+        """
+        defaults = ConfigSnapshot()
+        errors = []
+
+        def value(section: str, property_name: str, default, parse=str, valid=None):
+            if not config.has_section(section):
+                return default
+            raw_value = config[section].get(property_name)
+            if raw_value is None or raw_value.strip() == "":
+                return default
+            try:
+                parsed_value = parse(raw_value.strip())
+            except ValueError:
+                errors.append("[{}] {} = {}".format(section, property_name, raw_value))
+                return default
+            if valid is not None and not valid(parsed_value):
+                errors.append("[{}] {} = {}".format(section, property_name, raw_value))
+                return default
+            return parsed_value
+
+        def positive(number) -> bool:
+            return number >= 0
+
+        def above_zero(number) -> bool:
+            return number > 0
+
+        sensors = {}
+        if config.has_section('temperature.sensor'):
+            for property_name in config['temperature.sensor']:
+                match = re.fullmatch(r"(sensor_\d+)_id", property_name)
+                sensor_id = config['temperature.sensor'].get(property_name, "").strip()
+                if match and sensor_id:
+                    sensor = match.group(1)
+                    sensors[sensor] = SensorConfig(
+                        sensor, sensor_id,
+                        value('temperature.sensor', sensor + "_timeout", 30, int, positive),
+                        value('temperature.sensor', sensor + "_period", 60, int, lambda period: period > 0))
+
+        zones = {}
+        for section in config.sections():
+            if not section.startswith("zone."):
+                continue
+            zone = section[len("zone."):]
+            zone_sensors = tuple(sensor.strip() for sensor in value(section, "sensors", "").split(",") if sensor.strip())
+            relay_1 = value(section, "relay_1", None, int, positive)
+            relay_2 = value(section, "relay_2", None, int, positive)
+            if not zone or not zone_sensors or relay_1 is None or relay_2 is None:
+                errors.append("[{}] requires: sensors, relay_1, relay_2".format(section))
+                continue
+            zones[zone] = ZoneConfig(zone, zone_sensors, relay_1, relay_2)
+
+        if not zones:
+            zones[ZONE_DEFAULT] = ZoneConfig(ZONE_DEFAULT, ("sensor_1",),
+                                             value('pin.gpio', "relay_1", defaults.gpio_relay_1, int, positive),
+                                             value('pin.gpio', "relay_2", defaults.gpio_relay_2, int, positive))
+
+        return ConfigSnapshot(
+            log_level=value('logging', "level", defaults.log_level, lambda level: LOG_LEVELS.index(level.upper())),
+            log_file=value('logging', "file", defaults.log_file),
+            log_buffer_size=value('logging', "buffer_size_kb", defaults.log_buffer_size // 1024, int, positive) * 1024,
+            log_flush_interval=value('logging', "flush_interval", defaults.log_flush_interval, float, positive),
+            log_queue_size=value('logging', "queue_size", defaults.log_queue_size, int, positive),
+            log_rotate=value('logging', "rotate", defaults.log_rotate, str.lower, lambda rotate: rotate in ("size", "daily")),
+            log_max_size=value('logging', "max_size_kb", defaults.log_max_size // 1024, int, positive) * 1024,
+            log_max_total_size=value('logging', "max_total_size_kb", defaults.log_max_total_size // 1024, int, positive) * 1024,
+
+            metrics_file=value('metrics', "file", defaults.metrics_file),
+            metrics_dump_interval=value('metrics', "dump_interval", defaults.metrics_dump_interval, int, positive) * 60,
+
+            profiling_target=value('profiling', "target", defaults.profiling_target, str.lower),
+            profiling_mode=value('profiling', "mode", defaults.profiling_mode, str.lower),
+            profiling_iterations=value('profiling', "iterations", defaults.profiling_iterations, int, positive),
+            profiling_interval=value('profiling', "interval_ms", defaults.profiling_interval * 1000, int, positive) / 1000,
+            profiling_time_limit=value('profiling', "time_limit", defaults.profiling_time_limit, int, positive),
+            profiling_output_dir=value('profiling', "output_dir", defaults.profiling_output_dir),
+
+            db_backend=value('database', "backend", defaults.db_backend, str.lower,
+                             lambda backend: backend in ("mysql", "sqlite")),
+            db_sqlite_file=value('database', "sqlite_file", defaults.db_sqlite_file),
+            db_journal_file=value('database', "journal_file", defaults.db_journal_file),
+            db_flush_interval=value('database', "flush_interval", defaults.db_flush_interval, float, above_zero),
+            db_batch_size=value('database', "batch_size", defaults.db_batch_size, int, above_zero),
+
+            weather_api=value('weather', "api", defaults.weather_api),
+            latitude=value('weather', "latitude", defaults.latitude, float, lambda latitude: -90 <= latitude <= 90),
+            longitude=value('weather', "longitude", defaults.longitude, float, lambda longitude: -180 <= longitude <= 180),
+            unit_speed=value('weather', "unit_speed", defaults.unit_speed),
+            unit_temperature=value('weather', "unit_temperature", defaults.unit_temperature),
+            min_days_history=value('weather', "min_days_history", defaults.min_days_history, int, positive),
+            min_hours_since_last_record=value('weather', "min_hours_since_last_record",
+                                              defaults.min_hours_since_last_record, int, positive),
+            time_to_retrieve_weather_history=value('weather', "time_to_retrieve_weather_history",
+                                                   defaults.time_to_retrieve_weather_history,
+                                                   lambda hh_mm_ss: datetime.strptime(hh_mm_ss, "%H:%M:%S").time()),
+
+            sensors=MappingProxyType(sensors),
+            sensor_max_age=value('temperature.sensor', "max_age", defaults.sensor_max_age, int, lambda age: age > 0),
+            w1_devices=value('temperature.sensor', "w1_devices", defaults.w1_devices),
+
+            gpio_motion_1=value('pin.gpio', "motion_1", defaults.gpio_motion_1, int, positive),
+            gpio_relay_1=value('pin.gpio', "relay_1", defaults.gpio_relay_1, int, positive),
+            gpio_relay_2=value('pin.gpio', "relay_2", defaults.gpio_relay_2, int, positive),
+
+            zones=MappingProxyType(zones),
+
+            android_host=value('android.server', "host", defaults.android_host),
+            android_port=value('android.server', "port", defaults.android_port, int, lambda port: 0 < port < 65536),
+            android_max_invalid_requests=value('android.server', "max_invalid_requests",
+                                               defaults.android_max_invalid_requests, int, positive),
+
+            thermo_switch=value('boilerry.server', "thermo_switch", defaults.thermo_switch, int,
+                                lambda thermo_switch: 0 <= thermo_switch <= 3),
+            temp_units=value('boilerry.server', "temp_units", defaults.temp_units, str.upper,
+                             lambda units: units in ("C", "F")),
+            temp_record_interval=value('boilerry.server', "temp_record_interval", defaults.temp_record_interval, int),
+            control_interval=value('boilerry.server', "control_interval", defaults.control_interval, int,
+                                   lambda interval: interval > 0),
+            predictive_horizon=value('boilerry.server', "predictive_horizon", defaults.predictive_horizon, int,
+                                     lambda horizon: horizon > 0),
+            motion_period_no_occupants=value('boilerry.server', "motion_period_no_occupants",
+                                             defaults.motion_period_no_occupants, int, positive),
+            motion_time_between_writes=value('boilerry.server', "motion_time_between_writes",
+                                             defaults.motion_time_between_writes, int, positive),
+
+            errors=tuple(errors)
+        )
 
     def getLogLevel(self) -> int:
         """
@@ -232,6 +664,10 @@ class ConfigStore(metaclass=Singleton):
             none
         Modified: [25.03.2024]
         """
-        self.config['boilerry.server'][property_name.lower()] = property_value
-        with open(self.file, 'w') as config_file:
-            self.config.write(config_file)
+        with self.lock:
+            self.config['boilerry.server'][property_name.lower()] = property_value
+            with open(self.file, 'w') as config_file:
+                self.config.write(config_file)
+
+            # Publish the new settings straight away, rather than waiting for the watcher.
+            self.readConfig(force=True)
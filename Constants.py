@@ -7,17 +7,28 @@ Configuration settings are stores in boilerry.ini
 APP_NAME = "boilerry"
 
 """
-Database settings are intentionally hardcoded here as they will only change
-if we are migrating to another database server type. The user has no valid reason
-to change the database settings.
+Database settings of the MySQL backend are intentionally hardcoded here as they will only change
+if we are migrating to another database server. The user has no valid reason
+to change the database settings. The backend itself is selected in the [database] section of boilerry.ini.
 """
-DB_TYPE = "MySQL"
 DB_HOST = "localhost"
 DB_PORT = 3306
 DB_NAME = "boilerry"
 DB_USER = "boser"
 DB_PASS = "S1r3n3"
 
+# Directory of the versioned schema migration scripts, next to the modules, and the time (in seconds) to wait for
+# another process migrating the schema
+MIGRATIONS_DIRECTORY = "migrations"
+MIGRATIONS_LOCK_TIMEOUT = 60
+
+# Schema of the SQLite backend, next to the modules, and the time (in seconds) to wait for the database file lock
+SQLITE_SCHEMA_FILE = "create_database_sqlite.sql"
+SQLITE_BUSY_TIMEOUT = 10
+
+# Longest time (in seconds) the write-behind journal waits before it tries again a database which keeps failing
+WRITE_BEHIND_MAX_BACKOFF = 300
+
 CRITICAL = 0
 WARNING = 1
 INFO = 2
@@ -28,15 +39,64 @@ FINEST = 5
 # Location where the log should be directed to. Two fixed values: [file|stdout]
 LOG_SINK = "file"
 LOG_LEVELS = ["CRITICAL", "WARNING", "INFO", "FINE", "FINER", "FINEST"]
+# Maximum number of queued log messages written to the sink with a single flush
+LOG_BATCH_SIZE = 100
+
+# Upper bounds (in milliseconds) of the latency histogram buckets
+METRICS_LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+# Number of threads running the blocking calls of the websocket server, and the time (in seconds) to wait for one
+ASYNC_EXECUTOR_WORKERS = 4
+ASYNC_CALL_TIMEOUT = 30
+
+# Frequency (in seconds) with which the config file is checked for changes,
+# where the file system does not notify the changes (no inotify)
+CONFIG_WATCH_PERIOD = 1
+
+# Number of heating transitions kept in memory for the heating time statistics
+RELAY_JOURNAL_SIZE = 1024
+
+# Frequency (in seconds) with which the heating transitions are written to the database
+RELAY_JOURNAL_FLUSH_PERIOD = 60
+
+# Time (in seconds) after its deadline, after which a scheduled event is reported as missed
+EVENT_LATE_TOLERANCE = 1
 
-# Frequency with which the settings will be re-read from the file and database
-CONFIG_UPDATE_PERIOD = 60
+# Frequency (in seconds) with which the relays are read back and compared to the heating state kept in memory
+GPIO_AUDIT_PERIOD = 300
+
+# Time (in seconds) the control waits for a relay command to be applied, before it leaves the relays as they are
+RELAY_COMMAND_TIMEOUT = 10
 
 # HEATING_STATE_ON    -> GPIO_PIN_RELAY_1[1] && GPIO_PIN_RELAY_2[1]
 HEATING_STATE_ON = True
 # HEATING_MODE_OFF   -> GPIO_PIN_RELAY_1[0] && GPIO_PIN_RELAY_2[1]
 HEATING_STATE_OFF = False
 
+# Temperature maintained when the thermostat has no setting yet
+THERMO_DEFAULT_TEMPERATURE = 16.0
+
+# Thermal model: the records used for the first fit (days), and the frequency of the updates (seconds)
+MODEL_HISTORY_DAYS = 180
+MODEL_UPDATE_PERIOD = 3600
+# Minimum number of record pairs to fit the model, and the longest time (seconds) between two records of a pair
+MODEL_MIN_ROWS = 48
+MODEL_MAX_GAP = 2 * 3600
+# Weight of the previous records, applied for every new record, and the relative ridge term of the fit
+MODEL_FORGETTING = 0.9995
+MODEL_REGULARISATION = 1e-6
+
+# Preheat: the furthest rise of the thermostat setting planned for (minutes), and the step of the start times (seconds)
+PREHEAT_MAX_MINUTES = 6 * 60
+PREHEAT_STEP = 60
+
+# The heating zone of the [pin.gpio] relays, when no [zone.<name>] sections are configured
+ZONE_DEFAULT = "main"
+
+# Backtest: the control step (seconds), and the tolerance (degrees) below the thermostat setting counted as a violation
+BACKTEST_STEP = 300
+BACKTEST_COMFORT_TOLERANCE = 0.5
+
 # Operating mode of the heating system
 HEATING_MODE_MANUAL = 1
 HEATING_MODE_TIMED = 2
@@ -49,7 +109,30 @@ CONST_THERMO_RELAY = "thermo_relay"
 CONST_THERMO_TEMPERATURE = "thermo_temperature"
 
 # Temperature sensor
+# Value returned when the temperature could not be read
+SENSOR_FAILURE_TEMPERATURE = -273
+# Status of the latest sensor reading kept by the TemperatureSampler
+SENSOR_READING_OK = "ok"
+SENSOR_READING_STALE = "stale"
+SENSOR_READING_FAILED = "failed"
+SENSOR_READING_NONE = "none"
+# Maximum number of temperature sensors read in parallel
+SENSOR_READ_WORKERS = 3
+# Frequency (in seconds) with which the 1-Wire bus is scanned for plugged in and removed sensors
+W1_RESCAN_PERIOD = 60
+# Sensor ID standing for the N-th sensor found on the 1-Wire bus, for sensor_<N>_id
+W1_SENSOR_AUTO = "auto"
 CONST_TEMP_RECORD_INTERVAL = "temp_record_interval"
 CONST_TEMP_NOW = "temp_now"
 CONST_TEMP_HISTORY = "temp_history"
 CONST_TEMP_UNITS = "temp_units"
+
+# Diagnostics
+CONST_METRICS = "metrics"
+CONST_PROFILE = "profile"
+
+# Profiling targets: the control loop iterations and the websocket requests
+PROFILE_TARGET_THERMO = "thermo"
+PROFILE_TARGET_SERVER = "server"
+PROFILE_TARGETS = (PROFILE_TARGET_THERMO, PROFILE_TARGET_SERVER)
+PROFILE_MODES = ("cprofile", "sampling")
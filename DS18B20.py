@@ -17,10 +17,17 @@
 # Use, copying, and/or disclosure of the file is strictly
 # prohibited unless otherwise provided in the license agreement.
 ###################################################################
+import os
 import time
 
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable
+
 from Common import logger
-from Constants import FINE, FINEST, FINER, WARNING
+from Constants import FINE, FINEST, FINER, WARNING, SENSOR_FAILURE_TEMPERATURE, SENSOR_READ_WORKERS
+from ConfigStore import ConfigStore, SensorConfig
+from Metrics import MetricsRegistry
+from OneWireRegistry import OneWireRegistry, parse_w1_slave
 
 
 class DS18B20:
@@ -28,38 +35,50 @@ class DS18B20:
     Provides interface to temperature sensor DS18B20
     Created: 31.01.2018
     """
-    def __init__(self):
-        self.CLASS = "DS18B20"
-
-        # File containing the temperature sensor data. The sensor will periodically write data there,
-        # we just need to read it.
-        self.sensor_path = "/sys/bus/w1/devices/"
-        self.sensor_output = "/w1_slave"
-
-    def readFileLineByLine(self, file_path: str):
+    def __init__(self, devices_path: str = None):
         """
-        Function to read the content of the sensor data file.
-
         Args:
-            file_path:  Full path to the file to be read.
-
-        Returns:
-            Content of the file line by line
+            devices_path:   The 1-Wire devices directory. Default: [temperature.sensor] w1_devices property.
         """
-        logger(FINE, self.CLASS, "Reading file: {}".format(file_path))
+        self.CLASS = "DS18B20"
+        self.config = ConfigStore()
+        self.metrics = MetricsRegistry()
 
-        file_handle = open(file_path, 'r')
-        file_lines = file_handle.readlines()
+        # Directory with a sub-directory per sensor, containing the temperature sensor data file w1_slave.
+        # The sensors are looked up once and their files are kept open, we just need to re-read them.
+        self.sensor_path = devices_path or self.config.snapshot.w1_devices
+        self.registry = OneWireRegistry(self.sensor_path)
+        self.registry.scan()
+        if devices_path is None:
+            self.config.subscribe('temperature.sensor', "w1_devices", self.on_devices_change)
 
-        file_handle.close()
+        # Writing 'trigger' there starts the temperature conversion on all sensors of the bus at once.
+        self.bulk_read = "w1_bus_master1/therm_bulk_read"
 
-        logger(FINEST, self.CLASS, "File content: {}".format(file_lines))
+        # The sensors are read in parallel, each conversion takes about 750 ms.
+        self.executor = ThreadPoolExecutor(max_workers=SENSOR_READ_WORKERS, thread_name_prefix="DS18B20")
 
-        return file_lines
+    def on_devices_change(self, snapshot):
+        """
+        Called by the config store when the 1-Wire devices directory changes: look the sensors up there.
+        """
+        registry = OneWireRegistry(snapshot.w1_devices)
+        registry.scan()
+        self.registry, registry = registry, self.registry
+        self.sensor_path = snapshot.w1_devices
+        # The reads in progress on the old registry keep their files open until they are done.
+        registry.close()
+
+    def resolveSensor(self, sensor: SensorConfig) -> str:
+        """
+        Returns the ID of the configured sensor, looking up the sensors set to 'auto' on the bus.
+        """
+        index = int(sensor.name.rpartition("_")[2]) if sensor.name.rpartition("_")[2].isdigit() else 0
+        return self.registry.resolve(sensor.id, index) or sensor.id
 
     def getTemp(self, sensor_id: str, timeout: int, temp_units: str = 'C') -> float:
         """
-        Function to parse the content of the file line by line and return the temperature:
+        Function to read the sensor and return the temperature:
             - First line gives status for successful read by the last three chars (YES).
             - Second line gives us the actual temperature value.
 
@@ -71,39 +90,96 @@ class DS18B20:
         Returns:
             The measured temperature as a float value
         """
-        logger(FINER, self.CLASS, "Reading sensor {} using [{}] metrics and timeout of {} seconds.".format(
-            sensor_id, temp_units, timeout))
+        logger(FINER, self.CLASS, "Reading sensor {} using [{}] metrics and timeout of {} seconds.",
+               sensor_id, temp_units, timeout)
 
-        timeout = timeout * 2
+        time_start = time.perf_counter()
         curr_run = 0
-        file_path = self.sensor_path + sensor_id + self.sensor_output
-        file_lines = self.readFileLineByLine(file_path)
 
-        # Keep re-reading the sensor output file until we have a good reading status
-        while file_lines[0].strip()[-3:] != "YES":
-            logger(FINER, self.CLASS, "On run {} we read status: {}".format(curr_run, file_lines[0].strip()[-3]))
-            time.sleep(0.5)
-            file_lines = self.readFileLineByLine(file_path)
+        try:
+            thermo_value = parse_w1_slave(self.registry.read(sensor_id))
+
+            # Keep re-reading the sensor until we have a good reading status
+            while thermo_value is None:
+                if time.perf_counter() - time_start > timeout:
+                    logger(WARNING, self.CLASS, "Sensor {} failed to read temperature within timeout of {} seconds.",
+                           sensor_id, timeout)
+                    self.metrics.counter("sensor_failures", sensor_id).inc()
+                    self.metrics.histogram("sensor_read_ms", sensor_id).observe((time.perf_counter() - time_start) * 1000)
+                    return SENSOR_FAILURE_TEMPERATURE
+
+                logger(FINER, self.CLASS, "On run {} sensor {} failed the CRC check.", curr_run, sensor_id)
+                time.sleep(0.5)
+                curr_run += 1
+                self.metrics.counter("sensor_retries", sensor_id).inc()
+                thermo_value = parse_w1_slave(self.registry.read(sensor_id))
+        except OSError as e:
+            logger(WARNING, self.CLASS, "Sensor {} failed to read temperature: {}", sensor_id, e)
+            self.metrics.counter("sensor_failures", sensor_id).inc()
+            return SENSOR_FAILURE_TEMPERATURE
 
-            if curr_run > timeout:
-                logger(WARNING, self.CLASS, "Sensor {} failed to read temperature within timeout of {} seconds.".format(
-                    sensor_id, timeout))
-                return -273
+        if temp_units == "F":
+            temperature = thermo_value / 1000.0 * 9.0 / 5.0 + 32.0
+        else:
+            temperature = thermo_value / 1000.0
 
-            curr_run += 1
+        self.metrics.histogram("sensor_read_ms", sensor_id).observe((time.perf_counter() - time_start) * 1000)
+        logger(FINE, self.CLASS, "Sensor {} measured {} degrees.", sensor_id, temperature)
 
-        thermo_output = file_lines[1].find('t=')
+        return temperature
 
-        if thermo_output != -1:
-            thermo_string = file_lines[1].strip()[thermo_output + 2:]
-        else:
-            thermo_string = 0.0
+    def triggerBulkConversion(self) -> bool:
+        """
+        Starts the temperature conversion on all sensors of the bus at once, if the w1_therm driver supports it.
+        The following reads of the sensors then return the converted values, without waiting on a conversion each.
 
-        if temp_units == "F":
-            temperature = float(thermo_string) * 9.0 / 5.0 + 32.0
-        else:
-            temperature = float(thermo_string) / 1000.0
+        Returns:
+            bool:   True if the conversion was triggered, false otherwise.
+        """
+        try:
+            with open(os.path.join(self.sensor_path, self.bulk_read), 'w') as file_trigger:
+                file_trigger.write("trigger\n")
+            return True
+        except (IOError, OSError) as e:
+            logger(FINEST, self.CLASS, "Bulk conversion not available: {}", e)
+            return False
+
+    def getTemps(self, sensors: Iterable[SensorConfig], temp_units: str = 'C') -> Dict[str, float]:
+        """
+        Reads the temperature of several sensors in parallel, hence at the cost of about a single conversion.
+        A sensor which fails to read within its own timeout is returned as SENSOR_FAILURE_TEMPERATURE,
+        without affecting the other results.
 
-        logger(FINE, self.CLASS, "Sensor {} measured {} degrees.".format(sensor_id, temperature))
+        Args:
+            sensors:    Settings of the sensors to read.
+            temp_units: [C]elsius or [F]ahrenheit. Default: [C]
 
-        return temperature
+        Returns:
+            dict:       The measured temperatures, {sensor name: temperature}.
+        """
+        sensors = list(sensors)
+        if not sensors:
+            return {}
+
+        if len(sensors) > 1:
+            self.triggerBulkConversion()
+
+        time_start = time.monotonic()
+        self.registry.rescan_if_due()
+        futures = {sensor: self.executor.submit(self.getTemp, self.resolveSensor(sensor), sensor.timeout, temp_units)
+                   for sensor in sensors}
+
+        temperatures = {}
+        for sensor, future in futures.items():
+            # getTemp gives up retrying after 'timeout' seconds.
+            time_left = time_start + sensor.timeout + 1 - time.monotonic()
+            try:
+                temperatures[sensor.name] = future.result(max(0.0, time_left))
+            except Exception as e:
+                logger(WARNING, self.CLASS, "Sensor {} ({}) failed to read temperature: {}", sensor.name, sensor.id, e)
+                self.metrics.counter("sensor_failures", sensor.id).inc()
+                temperatures[sensor.name] = SENSOR_FAILURE_TEMPERATURE
+
+        logger(FINER, self.CLASS, "Read {} sensors in {:.3f} seconds: {}",
+               len(sensors), time.monotonic() - time_start, temperatures)
+        return temperatures
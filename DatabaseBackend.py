@@ -0,0 +1,100 @@
+#!/usr/bin/python
+###################################################################
+# Heating system control with Raspberry Pi
+# -----------------------------------------------------------------
+# (C) Copyright VAYAK Ltd (info@vayak.com). 2026
+# All Rights Reserved
+#
+# THIS IS UNPUBLISHED PROPRIETARY SOURCE CODE
+# The copyright notice above does not evidence any
+# actual or intended publication of such source code.
+#
+# RESTRICTED RIGHTS:
+# This file may have been supplied under a license.
+# It may be used, disclosed, and/or copied only as permitted
+# under such license agreement. Any copy must contain the
+# above copyright notice and this restricted rights notice.
+# Use, copying, and/or disclosure of the file is strictly
+# prohibited unless otherwise provided in the license agreement.
+###################################################################
+from typing import List, Sequence, Tuple
+
+
+class DatabaseBackend:
+    """
+    The storage engine behind the DatabaseDAO, selected by the 'backend' property of the [database] section.
+
+    The DatabaseDAO writes its queries once, in the SQL common to the engines and with the %s placeholders of the
+    DB-API 'format' paramstyle (a literal % written as %%). The backend runs them, and builds the few expressions
+    which differ between the engines, hence all the DatabaseDAO methods behave the same on every backend.
+
+    Created: 17/10/2026
+    """
+
+    def migrate(self) -> int:
+        """
+        Brings the database schema up to date.
+
+        Returns:
+            int:    The schema version, or -1 if it could not be brought up to date.
+        """
+        raise NotImplementedError
+
+    def execute(self, query: str, params: Tuple = None) -> List[dict]:
+        """
+        Executes the SQL statement.
+
+        Args:
+            query:      SQL query to execute.
+            params:     Tuple containing the SQL query parameters.
+        Returns:
+            list:       The result rows, as dictionaries of the column values.
+        Raises:
+            Exception:  If the connection or the execution fails.
+        """
+        raise NotImplementedError
+
+    def execute_many(self, query: str, params: List[Tuple]) -> int:
+        """
+        Executes the same SQL statement for many rows of parameters at once, all or none.
+
+        Args:
+            query:      SQL query to execute.
+            params:     List of tuples containing the SQL query parameters, one per row.
+        Returns:
+            int:        Number of the affected rows.
+        Raises:
+            Exception:  If the connection or the execution fails.
+        """
+        raise NotImplementedError
+
+    def hour_of(self, column: str) -> str:
+        """
+        Returns the SQL expression of the start of the hour of the datetime column, as 'YYYY-MM-DD HH:00:00'.
+        """
+        raise NotImplementedError
+
+    def upsert(self, table: str, columns: Sequence[str], keys: Sequence[str]) -> str:
+        """
+        Returns the statement inserting a row of the columns into the table, or updating the other columns of the
+        row with the same keys, if there is one.
+        """
+        raise NotImplementedError
+
+
+def get_backend(snapshot) -> DatabaseBackend:
+    """
+    Creates the storage engine selected in the config. The modules of the engines are only imported when selected,
+    hence a device using SQLite does not need the MySQL client libraries.
+
+    Args:
+        snapshot:   ConfigSnapshot with the database settings.
+    Returns:
+        DatabaseBackend:    The storage engine.
+    """
+    if snapshot.db_backend == "sqlite":
+        from SQLiteBackend import SQLiteBackend
+        return SQLiteBackend(snapshot.db_sqlite_file)
+
+    from MySQLBackend import MySQLBackend
+    return MySQLBackend()
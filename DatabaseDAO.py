@@ -18,22 +18,27 @@
 # prohibited unless otherwise provided in the license agreement.
 ###################################################################
 import json
+import threading
 import time
 
-import pymysql
-
-from datetime import datetime
-from dbutils.persistent_db import PersistentDB
-from typing import List, Tuple
+from datetime import datetime, timedelta
+from dateutil.parser import parse
+from typing import List, Sequence, Tuple
 
 from Common import logger, timestampToDatetime, validateDateTime
-from Constants import CRITICAL, WARNING, FINE, FINER, FINEST, INFO
-from Constants import DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASS
+from Constants import WARNING, FINE, FINER, FINEST, INFO
+from Constants import THERMO_DEFAULT_TEMPERATURE, ZONE_DEFAULT
+from Clock import get_clock
+from ConfigStore import ConfigStore
+from DatabaseBackend import get_backend
+from Metrics import MetricsRegistry, sql_label
+from WriteBehindJournal import WriteBehindJournal
 
 
 class DatabaseDAO:
     """
-    Provides interface to MySQL database
+    Provides interface to the database, stored by the backend selected in the [database] section: a MySQL server,
+    or an embedded SQLite file.
 
     Created: 31.01.2018
     """
@@ -46,20 +51,32 @@ class DatabaseDAO:
             Database connection pool
         """
         self.CLASS = "DatabaseDAO"
+        self.metrics = MetricsRegistry()
+        self.sql_errors = self.metrics.counter("sql_errors")
+
+        # Incremented on every change of the thermostat table, for the compiled schedules to know they are outdated.
+        self.thermostat_version = 0
+
+        self.backend = get_backend(ConfigStore().snapshot)
+
+        # Bring the schema up to date before the first query.
+        self.backend.migrate()
+
+        # The weather of the hour of a temperature record: weather_hourly is keyed by the start of the hour.
+        self.weather_hour_join = "w.hour = " + self.backend.hour_of("t.datetime")
 
-        logger(FINER, self.CLASS,
-               "Connecting to database: host[{}], port[{}], name[{}], user[{}], pass[*****]."
-               .format(DB_HOST, DB_PORT, DB_NAME, DB_USER))
-        self.db_pool = PersistentDB(
-            creator=pymysql,
-            host=DB_HOST,
-            port=DB_PORT,
-            user=DB_USER,
-            password=DB_PASS,
-            database=DB_NAME,
-            charset='utf8',
-            autocommit=True
-        )
+        # The statements writing the batches of the WriteBehindJournal records, per table.
+        self.write_behind_queries = {
+            "temperature": "INSERT INTO temperature "
+                           "(datetime, zone, time_state_on, unit_speed, unit_temperature, sensor_1, sensor_2, sensor_3) "
+                           "VALUES (%s, %s, %s, %s, %s, %s, %s, %s)",
+            "presence": self.backend.upsert("presence", ("sensor", "motionFirst", "motionLast", "activityRanking"),
+                                            ("sensor", "motionFirst"))
+        }
+
+        # Started with the first record to write, hence the DAOs only reading (e.g. the backtests) leave it alone.
+        self.journal = None
+        self.journal_lock = threading.Lock()
 
     def dbu_send(self, query: str, params: Tuple = None) -> Tuple:
         """
@@ -68,26 +85,112 @@ class DatabaseDAO:
         Args:
             query:          SQL query to execute.
             params:         Tuple containing the SQL query parameters.
-        Returns:            The SQL execution result
+        Returns:            The SQL execution result, empty if the execution failed.
         Created:            25/03/2025
         """
-        connection = self.db_pool.connection()
         try:
-            cursor = connection.cursor(pymysql.cursors.DictCursor)
-            logger(FINEST, self.CLASS, "SQL: {}, Parameters: {}".format(query, params))
+            return self.dbu_execute(query, params)
+        except Exception as e:
+            logger(WARNING, self.CLASS, "SQL execution error: {}", e)
+            return ()
+
+    def dbu_execute(self, query: str, params: Tuple = None) -> List[dict]:
+        """
+        Executes the SQL statement, as dbu_send(), but raises the errors, for the callers which have to tell a failed
+        query from a query without results.
+
+        Args:
+            query:          SQL query to execute.
+            params:         Tuple containing the SQL query parameters.
+        Returns:
+            list:           The result rows, as dictionaries of the column values.
+        Raises:
+            Exception:      If the connection or the execution fails.
+        Created:            17/10/2026
+        """
+        try:
+            logger(FINEST, self.CLASS, "SQL: {}, Parameters: {}", query, params)
             time_start = time.perf_counter_ns()
-            cursor.execute(query, params)
-            result = cursor.fetchall()
-            logger(FINEST, self.CLASS,
-                   "SQL executed in {} ms.".format((time.perf_counter_ns() - time_start) // 1000000))
+            result = self.backend.execute(query, params)
+            time_ms = (time.perf_counter_ns() - time_start) / 1000000
+            self.metrics.histogram("sql_ms", sql_label(query)).observe(time_ms)
+            logger(FINEST, self.CLASS, "SQL executed in {} ms.", int(time_ms))
+            return result
+        except Exception:
+            self.sql_errors.inc()
+            raise
+
+    def dbu_send_many(self, query: str, params: List[Tuple]) -> bool:
+        """
+        Executes the same SQL statement for many rows of parameters at once. For INSERT ... VALUES statements,
+        the MySQL backend sends all the rows in a single multi-row statement.
+
+        Args:
+            query:          SQL query to execute.
+            params:         List of tuples containing the SQL query parameters, one per row.
+        Returns:
+            bool:           True if executed successfully, false otherwise.
+        Created:            17/10/2026
+        """
+        try:
+            self.dbu_execute_many(query, params)
+            return True
         except Exception as e:
-            logger(WARNING, self.CLASS, "SQL execution error: {}".format(e))
-        finally:
-            # Note that despite we close the connection here, it will still be alive for reuse
-            # until this thread is alive
-            cursor.close()
-            connection.close()
-        return result
+            logger(WARNING, self.CLASS, "SQL execution error: {}", e)
+            return False
+
+    def dbu_execute_many(self, query: str, params: List[Tuple]) -> int:
+        """
+        Executes the same SQL statement for many rows of parameters at once, as dbu_send_many(), but raises the
+        errors, for the callers keeping the rows to try again, e.g. the WriteBehindJournal.
+
+        Args:
+            query:          SQL query to execute.
+            params:         List of tuples containing the SQL query parameters, one per row.
+        Returns:
+            int:            Number of the affected rows.
+        Raises:
+            Exception:      If the connection or the execution fails.
+        Created:            17/10/2026
+        """
+        try:
+            logger(FINEST, self.CLASS, "SQL: {}, Rows: {}", query, len(params))
+            time_start = time.perf_counter_ns()
+            rows = self.backend.execute_many(query, params)
+            time_ms = (time.perf_counter_ns() - time_start) / 1000000
+            self.metrics.histogram("sql_ms", sql_label(query)).observe(time_ms)
+            logger(FINEST, self.CLASS, "SQL executed for {} rows in {} ms.", len(params), int(time_ms))
+            return rows
+        except Exception:
+            self.sql_errors.inc()
+            raise
+
+    def write_behind(self, table: str, row: list):
+        """
+        Queues a record to be written to the table by the WriteBehindJournal, without waiting on the database.
+
+        Args:
+            table:  The table of the record, one of the 'write_behind_queries'.
+            row:    The parameters of the INSERT statement of the table.
+        Created:    17/10/2026
+        """
+        with self.journal_lock:
+            if self.journal is None or not self.journal.running:
+                self.journal = WriteBehindJournal.get(self)
+        self.journal.append(table, row)
+
+    def write_batch(self, table: str, rows: List[list]):
+        """
+        Writes a batch of the WriteBehindJournal records to the table, in a single multi-row statement.
+
+        Args:
+            table:      The table of the records, one of the 'write_behind_queries'.
+            rows:       The parameters of the INSERT statement of the table, one list per record.
+        Raises:
+            Exception:  If the write fails, for the journal to keep the records.
+        Created:        17/10/2026
+        """
+        self.dbu_execute_many(self.write_behind_queries[table], [tuple(row) for row in rows])
 
     def get_last_weather_record_timestamp(self, min_days_history: int) -> float:
         """
@@ -111,10 +214,11 @@ class DatabaseDAO:
         """
         # Check the timestamp of the last weather record so that we can retrieve the history starting from then.
         last_weather_record_timestamp = 0.0
-        query = "SELECT datetime FROM temperature WHERE temperature IS NOT NULL ORDER BY datetime DESC LIMIT 1"
+        query = "SELECT hour FROM weather_hourly ORDER BY hour DESC LIMIT 1"
 
         for result in self.dbu_send(query):
-            last_weather_record_timestamp = int(result.get('datetime').timestamp())
+            if result.get('hour') is not None:
+                last_weather_record_timestamp = int(result.get('hour').timestamp())
 
         last_weather_record_string = datetime.fromtimestamp(last_weather_record_timestamp).strftime('%Y-%m-%d %H:%M:%S')
         # Check for data availability and continuity over the past 24 hours (see the explanation in the DocString).
@@ -141,11 +245,12 @@ class DatabaseDAO:
                               last_weather_record_timestamp,
                               weather_history: List[Tuple[str, str, float, float, float, str, str, str]]) -> None:
         """
-        Function to populate all property temperature readings with historical weather data.
+        Function to store the historical weather data in the weather_hourly table, one record per hour.
 
-        The weather history comes at an hourly period, while the property temperature is recorded more often.
-        Therefore, we would end up with duplicate weather records for a bunch of property temperature readings
-        that fall within the same hour... hence the 'strange' date comparison in the SQL statement here.
+        The weather history comes at an hourly period, while the property temperature is recorded more often,
+        hence the weather is not copied into the temperature records, but joined to them on the hour when reading.
+        The measurements are inserted in a single multi-row statement, and a measurement of an hour already stored
+        replaces it, e.g. when the latest hour was stored before the Weather API had its final values.
 
         Args:
             last_weather_record_timestamp:
@@ -161,61 +266,66 @@ class DatabaseDAO:
             logger(FINE, self.CLASS, "No weather history provided.")
             return None
 
-        logger(FINER, self.CLASS, "Updating data with {} weather history measurements.".format(len(weather_history)))
+        logger(FINER, self.CLASS, "Storing {} weather history measurements.".format(len(weather_history)))
+
+        # We get the full 24-hour data set, but we want to store only the hours since the 'last_weather_record_timestamp',
+        # including the hour of the last record, as it may have been stored incomplete.
+        points = []
+        for unit_speed, unit_temperature, temperature, windchill, wspd, _, measured, _ in weather_history:
+            if last_weather_record_timestamp <= measured.timestamp():
+                hour = datetime(measured.year, measured.month, measured.day, measured.hour)
+                points.append((hour, unit_speed, unit_temperature,
+                               *(None if value is None or value != value else float(value)
+                                 for value in (temperature, windchill, wspd))))
+        if not points:
+            return None
 
-        query = """UPDATE temperature 
-        SET unit_speed = %s, unit_temperature = %s, temperature = %s, windchill = %s, wspd = %s 
-        WHERE DATE_FORMAT(datetime, %s) = DATE_FORMAT(%s, %s)"""
+        query = self.backend.upsert("weather_hourly",
+                                    ("hour", "unit_speed", "unit_temperature", "temperature", "windchill", "wspd"),
+                                    ("hour",))
 
         time_start = time.perf_counter_ns()
-        for measurement in weather_history:
-            # We get the full 24-hour data set,
-            # but we want to update only the rows newer than the 'last_weather_record_timestamp'.
-            if last_weather_record_timestamp < measurement[6].timestamp():
-                self.dbu_send(query, measurement)
-
-        logger(FINE, self.CLASS, "Updated indoor temperature data with {} weather measurements in {} ms.".format(
-            len(weather_history),
-            (time.perf_counter_ns() - time_start) // 1000000))
+        self.dbu_send_many(query, points)
+        time_ms = (time.perf_counter_ns() - time_start) / 1000000
+        self.metrics.histogram("weather_store_ms").observe(time_ms)
+        logger(FINE, self.CLASS, "Stored {} hourly weather measurements in {} ms.", len(points), int(time_ms))
 
-    def get_temperature_history(self, period_start: str = None, period_end: str = None) -> str:
+    def get_temperature_history(self, period_start: str = None, period_end: str = None, zone: str = ZONE_DEFAULT) -> str:
         """
         Function to retrieve the temperature for the Always ON thermostat setting.
 
         Args:
             period_start:   Timestamp in the format "dd/mm/yyyy hh/mm"
             period_end:     Timestamp in the format "dd/mm/yyyy hh/mm"
+            zone:           The heating zone of the records.
 
         Returns:            The temperature readings for the past period as a JSON string
         Created:            31/03/2024
         """
+        # The period goes as parameters, hence the same query runs on every backend. Default: the past 2 days.
+        time_now = get_clock().now().replace(microsecond=0)
         if not period_start or not validateDateTime(period_start):
             logger(FINER, self.CLASS,
                    "Retrieving historical temperature failed to recognise start period: {}".format(period_start))
-            period_start = "NOW() - INTERVAL 2 DAY"
+            period_start = time_now - timedelta(days=2)
         else:
-            period_start = "\"{}\"".format(period_start)
+            period_start = self.parse_datetime(period_start)
 
         if not period_end or not validateDateTime(period_end):
             logger(FINER, self.CLASS,
                    "Retrieving historical temperature failed to recognise end period: {}".format(period_end))
-            period_end = "NOW()"
+            period_end = time_now
         else:
-            period_end = "\"{}\"".format(period_end)
+            period_end = self.parse_datetime(period_end)
 
-        """
-        That doesnt work as the NOW() gets encapsulated in quotes and MySQL does not recognise it as a function.
-        -----------------------------------------------
-        query = "SELECT value, unit, datetime FROM temperature WHERE sensor = %s AND datetime >= %s AND datetime <= %s".format(
-            sensor, period_start, period_end
-        )
-        logger(FINEST, self.CLASS, "SQL: {} -> sensor[{}], period_start[{}], period_end[{}].".format(
-            query, sensor, period_start, period_end))
-        """
-        query = "SELECT * FROM temperature WHERE datetime >= {} AND datetime <= {}".format(period_start, period_end)
+        query = "SELECT t.datetime, t.time_state_on, w.unit_speed, " \
+                "COALESCE(w.unit_temperature, t.unit_temperature) AS unit_temperature, " \
+                "w.temperature, w.windchill, w.wspd, t.sensor_1, t.sensor_2, t.sensor_3 " \
+                "FROM temperature t LEFT JOIN weather_hourly w ON " + self.weather_hour_join + \
+                " WHERE t.datetime >= %s AND t.datetime <= %s AND t.zone = %s ORDER BY t.datetime"
 
         temperature_history_data = []
-        for rs in self.dbu_send(query):
+        for rs in self.dbu_send(query, (period_start, period_end, zone)):
             temperature_data_string = "{" + """ "datetime": "{}", "time_state_on": "{}", "unit_speed": "{}", "unit_temperature": "{}", "temperature": "{}", "windchill": "{}", "wspd": "{}", "sensor_1": "{}", "sensor_2": "{}", "sensor_3": "{}" """.format(
                 rs.get('datetime'), rs.get('time_state_on'), rs.get('unit_speed'), rs.get('unit_temperature'),
                 rs.get('temperature'), rs.get('windchill'), rs.get('wspd'), rs.get('sensor_1'), rs.get('sensor_2'),
@@ -236,8 +346,57 @@ class DatabaseDAO:
 
         return temperature_history_data
 
+    @staticmethod
+    def parse_datetime(datetime_text: str) -> datetime:
+        """
+        Parses the datetime given by the client: "yyyy-mm-dd hh:mm:ss", or the day first, e.g. "dd/mm/yyyy hh:mm".
+        """
+        try:
+            return datetime.fromisoformat(datetime_text)
+        except ValueError:
+            return parse(datetime_text, dayfirst=True)
+
+    def get_temperature_rows(self, since: datetime, zone: str = ZONE_DEFAULT, sensors: Sequence[str] = ("sensor_1",),
+                             until: datetime = None) -> List[Tuple[datetime, int, float, float, float]]:
+        """
+        Function to retrieve the temperature records of the zone for the thermal model and the backtests: the room
+        temperature (the average of the zone sensors), the heating time and the outside weather.
+
+        Args:
+            since:      Only the records after this time.
+            zone:       The heating zone of the records.
+            sensors:    The sensors of the zone: sensor_1 | sensor_2 | sensor_3
+            until:      Only the records up to this time. Default: all.
+        Returns:
+            list:       Tuples of (datetime, time_state_on, room, temperature, wspd), ordered by datetime.
+        Created:
+            17/10/2026
+        """
+        sensors = [sensor for sensor in sensors if sensor in ("sensor_1", "sensor_2", "sensor_3")]
+        if not sensors:
+            return []
+
+        query = "SELECT t.datetime, t.time_state_on, w.temperature, w.wspd, t.sensor_1, t.sensor_2, t.sensor_3 " \
+                "FROM temperature t LEFT JOIN weather_hourly w ON " + self.weather_hour_join + \
+                " WHERE t.datetime > %s AND t.zone = %s"
+        params = (since, zone)
+        if until is not None:
+            query += " AND t.datetime <= %s"
+            params += (until,)
+        query += " ORDER BY t.datetime"
+
+        rows = []
+        for rs in self.dbu_send(query, params):
+            readings = [rs.get(sensor) for sensor in sensors if rs.get(sensor) is not None]
+            if readings:
+                rows.append((rs.get('datetime'), rs.get('time_state_on'), sum(readings) / len(readings),
+                             rs.get('temperature'), rs.get('wspd')))
+        logger(FINER, self.CLASS, "Retrieved {} temperature records of zone '{}' since {}.", len(rows), zone, since)
+        return rows
+
     def save_temperature(self, seconds_heating_on: int, unit: str,
-                         sensor_1: float = None, sensor_2: float = None, sensor_3: float = None):
+                         sensor_1: float = None, sensor_2: float = None, sensor_3: float = None,
+                         zone: str = ZONE_DEFAULT):
         """
         Function to save temperature reading from the sensor.
 
@@ -247,17 +406,33 @@ class DatabaseDAO:
             sensor_1:           Measured temperature by sensor_1.
             sensor_2:           Measured temperature by sensor_2.
             sensor_3:           Measured temperature by sensor_3.
+            zone:               The heating zone, whose heating time this is.
 
         Returns:
             none
         """
-        logger(FINE, self.CLASS, "Saving temperature measurement: time_state_on[{}], unit[{}], s1[{}], s2[{}], s3[{}]."
-               .format(seconds_heating_on, unit, sensor_1, sensor_2, sensor_3))
+        logger(FINE, self.CLASS, "Saving temperature measurement: zone[{}], time_state_on[{}], unit[{}], s1[{}], s2[{}], s3[{}]."
+               .format(zone, seconds_heating_on, unit, sensor_1, sensor_2, sensor_3))
+
+        # Written by the journal thread, hence the time of the reading goes with the record.
+        self.write_behind("temperature", [get_clock().now().strftime("%Y-%m-%d %H:%M:%S"), zone, seconds_heating_on,
+                                          'mph', unit, sensor_1, sensor_2, sensor_3])
+
+    def save_relay_transitions(self, transitions: List[Tuple[datetime, bool, str, str]]) -> bool:
+        """
+        Function to save the switches of the heating relays, in bulk.
 
-        query = "INSERT INTO temperature (time_state_on, unit_speed, unit_temperature, sensor_1, sensor_2, sensor_3) VALUES (%s, %s, %s, %s, %s, %s)"
-        data = (seconds_heating_on, 'mph', unit, sensor_1, sensor_2, sensor_3)
+        Args:
+            transitions:    List of (datetime, state, source, zone) of the transitions.
+        Returns:
+            bool:           True if saved successfully, false otherwise.
+        Created:
+            17/10/2026
+        """
+        logger(FINE, self.CLASS, "Saving {} relay transitions.", len(transitions))
 
-        self.dbu_send(query, data)
+        query = "INSERT INTO relay_transition (datetime, state, source, zone) VALUES (%s, %s, %s, %s)"
+        return self.dbu_send_many(query, transitions)
 
     def save_motion(self, sensor: str, motion_first: int, motion_last: int, activity_ranking: str):
         """
@@ -272,9 +447,7 @@ class DatabaseDAO:
         Returns:
             none
 
-        TODO 1:   Create the database table
-
-        TODO 2:   Here I assume that the database and the server are time and zone synchronised.
+        TODO:     Here I assume that the database and the server are time and zone synchronised.
                   In an implementation where the database is on remote server, this method (as well as
                   all other components should be modified to use the database timestamp and not the server one.
 
@@ -286,61 +459,60 @@ class DatabaseDAO:
         logger(FINE, self.CLASS, "Saving detected motion: sensor[{}], motionFirst[{}], motionLast[{}]."
                .format(sensor, motion_first_datetime, motion_last_datetime))
 
-        # Check if we have already started a record period with this start motion timestamp
-        query = "SELECT * FROM presence WHERE sensor = %s AND motionFirst = %s"
-        data = (sensor, motion_first_datetime)
-        logger(FINEST, self.CLASS, "SQL: {} -> sensor[{}], motionFirst[{}]."
-               .format(query, sensor, motion_first_datetime))
-
-        if self.dbu_send(query, data) is None:
-            # We are starting a new motion period
-            query = "INSERT INTO presence (sensor, motionFirst, motionLast, activityRanking) VALUES (%s, %s, %s, %s)"
-            data = (sensor, motion_first_datetime, motion_last_datetime, activity_ranking)
-            logger(FINEST, self.CLASS,
-                   "SQL: {} -> sensor[{}], motionFirst[{}], motionLast[{}], activityRanking[{}]."
-                   .format(query, sensor, motion_first_datetime, motion_last_datetime, activity_ranking))
-        else:
-            # We are updating an existing motion record period
-            query = "UPDATE presence SET motionLast = %s, activityRanking = %s WHERE sensor = %s AND motionFirst = %s"
-            data = (motion_last_datetime, activity_ranking, sensor, motion_first_datetime)
-            logger(FINEST, self.CLASS,
-                   "SQL: {} -> motionLast[{}], activityRanking[{}], sensor[{}], motionFirst[{}]."
-                   .format(query, motion_last_datetime, activity_ranking, sensor, motion_first_datetime))
+        # A new motion period is inserted, and the following records of the same period (the same sensor and first
+        # motion) update its last motion and ranking.
+        self.write_behind("presence", [sensor, motion_first_datetime, motion_last_datetime, activity_ranking])
 
-        self.dbu_send(query, data)
-
-    def get_thermostat_manual(self) -> int:
+    def get_thermostat_manual(self, zone: str = ZONE_DEFAULT) -> int:
         """
         Function to retrieve the temperature for the Always ON thermostat setting.
 
+        Args:       zone: The heating zone.
         Returns:    The temperature for Always ON thermostat setting.
         Created:    08/02/2024
         """
-        therm_default = 16.0
-        query = "SELECT temperature FROM thermostat WHERE timeStart = \"00:00\" AND timeEnd = \"00:00\""
-        therm_setting = list(self.dbu_send(query))
+        therm_default = THERMO_DEFAULT_TEMPERATURE
+        query = "SELECT temperature FROM thermostat WHERE timeStart = '00:00' AND timeEnd = '00:00' AND zone = %s"
+        try:
+            therm_setting = list(self.dbu_execute(query, (zone,)))
+        except Exception as e:
+            # The setting is not known, hence it is not initialised either.
+            logger(WARNING, self.CLASS, "Failed to retrieve 'thermostat Always ON temperature': {}", e)
+            return int(therm_default)
 
         if therm_setting:
             logger(FINE, self.CLASS, "Retrieved: 'thermostat Always ON temperature' -> {}".format(therm_setting))
             return int(therm_setting[0].get('temperature'))
         else:
             # This is the first time the server is being started, hence we add a default temperature.
-            query = "INSERT INTO thermostat VALUES ('all', {}, \"00:00\", \"00:00\")".format(therm_default)
-            self.dbu_send(query)
-            logger(INFO, self.CLASS, "Initialised: 'thermostat Always ON temperature' -> {}".format(therm_default))
+            query = "INSERT INTO thermostat (zone, day_of_week, temperature, timeStart, timeEnd) " \
+                    "VALUES (%s, 'all', %s, '00:00', '00:00')"
+            try:
+                self.dbu_execute(query, (zone, therm_default))
+                self.thermostat_version += 1
+                logger(INFO, self.CLASS, "Initialised: 'thermostat Always ON temperature' -> {}".format(therm_default))
+            except Exception as e:
+                logger(WARNING, self.CLASS, "Failed to initialise 'thermostat Always ON temperature': {}", e)
             return int(therm_default)
 
-    def get_thermostat(self):
+    def get_thermostat(self, zone: str = ZONE_DEFAULT):
         """
         Function to retrieve the thermostat settings.
 
-        Returns:    List of results of temperature time slots.
+        Args:       zone: The heating zone.
+        Returns:    List of results of temperature time slots, or None if the query failed.
         Created:    10.12.2023
         """
         thermostat_settings = []
-        query = "SELECT * FROM thermostat"
+        query = "SELECT * FROM thermostat WHERE zone = %s"
 
-        for value in self.dbu_send(query):
+        try:
+            rows = self.dbu_execute(query, (zone,))
+        except Exception as e:
+            logger(WARNING, self.CLASS, "Failed to retrieve the thermostat settings of zone '{}': {}", zone, e)
+            return None
+
+        for value in rows:
             logger(FINER, self.CLASS, "Retrieved: {}".format(value))
             'Tuple(dayOfWeek-temperature-timeStart-timeEnd)'
             thermostat_settings.append(tuple(
@@ -348,39 +520,50 @@ class DatabaseDAO:
 
         return thermostat_settings
 
-    def set_thermostat_manual(self, temperature: int):
+    def set_thermostat_manual(self, temperature: int, zone: str = ZONE_DEFAULT):
         """
         Function to set the thermostat temperature when in manual operation (no timer).
         The manual operation is when the start and end time are both set to `00:00`.
 
         Args:
             temperature:    Temperature to maintain
+            zone:           The heating zone.
         Returns:
             none
         Created:
             06.02.2024
         """
         logger(FINE, self.CLASS, "Saving thermostat for manual operation to: {}.".format(temperature))
-        self.set_thermostat(temperature, "00:00", "00:00")
+        self.set_thermostat(temperature, "00:00", "00:00", zone=zone)
 
-    def set_thermostat(self, temperature: int, time_start: str, time_end: str):
+    def set_thermostat(self, temperature: int, time_start: str, time_end: str, day_of_week: str = "all",
+                       zone: str = ZONE_DEFAULT):
         """
-        Function to set the thermostat temperature.
+        Function to set the thermostat temperature of the time slot, adding the slot if it does not exist yet,
+        in a single upsert on the unique key of the slot.
 
         Args:
             temperature:    Temperature to maintain
             time_start:     Time in Hours:Minutes to start maintaining this temperature
             time_end:       Time in Hours:Minutes to stop maintaining this temperature,
                             falling back to the temperature setting for manual operation, or the next time slot.
+            day_of_week:    mon | tue | wed | thu | fri | sat | sun, or all. Default: all
+            zone:           The heating zone.
         Return:
-            none
+            bool:           True if saved, false otherwise.
         Created:
             01.02.2024
         """
-        logger(FINE, self.CLASS, "Saving thermostat setting: temperature[{}], start[{}], end[{}]."
-               .format(temperature, time_start, time_end))
+        logger(FINE, self.CLASS, "Saving thermostat setting: zone[{}], temperature[{}], start[{}], end[{}], day[{}]."
+               .format(zone, temperature, time_start, time_end, day_of_week))
 
-        query = "UPDATE thermostat SET temperature=%s, timeStart=%s, timeEnd=%s"
-        data = (temperature, time_start, time_end)
+        query = self.backend.upsert("thermostat", ("zone", "day_of_week", "timeStart", "timeEnd", "temperature"),
+                                    ("zone", "day_of_week", "timeStart", "timeEnd"))
+        try:
+            self.dbu_execute(query, (zone, day_of_week, time_start, time_end, temperature))
+        except Exception as e:
+            logger(WARNING, self.CLASS, "Failed to save the thermostat setting: {}", e)
+            return False
 
-        self.dbu_send(query, data)
+        self.thermostat_version += 1
+        return True
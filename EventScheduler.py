@@ -0,0 +1,270 @@
+#!/usr/bin/python
+###################################################################
+# Heating system control with Raspberry Pi
+# -----------------------------------------------------------------
+# (C) Copyright VAYAK Ltd (info@vayak.com). 2026
+# All Rights Reserved
+#
+# THIS IS UNPUBLISHED PROPRIETARY SOURCE CODE
+# The copyright notice above does not evidence any
+# actual or intended publication of such source code.
+#
+# RESTRICTED RIGHTS:
+# This file may have been supplied under a license.
+# It may be used, disclosed, and/or copied only as permitted
+# under such license agreement. Any copy must contain the
+# above copyright notice and this restricted rights notice.
+# Use, copying, and/or disclosure of the file is strictly
+# prohibited unless otherwise provided in the license agreement.
+###################################################################
+import heapq
+import itertools
+import threading
+import time
+
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+from datetime import time as time_of_day
+from typing import Callable, Dict, Optional
+
+from Clock import get_clock
+from Common import logger
+from Constants import WARNING, FINE, FINER, FINEST, EVENT_LATE_TOLERANCE
+from Metrics import MetricsRegistry
+
+
+def seconds_to_next_interval(interval: float, now: datetime = None) -> float:
+    """
+    Returns the seconds until the next multiple of the interval since midnight, e.g. for an interval of 15 minutes,
+    the seconds until the next quarter of an hour.
+
+    Args:
+        interval:   The interval in seconds.
+        now:        The wall clock time. Default: now.
+    """
+    now = now or get_clock().now()
+    seconds = now.hour * 3600 + now.minute * 60 + now.second + now.microsecond / 1000000
+    return interval - seconds % interval
+
+
+def seconds_to_time_of_day(at: time_of_day, now: datetime = None) -> float:
+    """
+    Returns the seconds until the next time the wall clock shows the given time of the day.
+
+    Args:
+        at:     The time of the day.
+        now:    The wall clock time. Default: now.
+    """
+    now = now or get_clock().now()
+    next_run = datetime.combine(now.date(), at)
+    if next_run <= now:
+        next_run += timedelta(days=1)
+    return (next_run - now).total_seconds()
+
+
+class ScheduledEvent:
+    """
+    A callback run by the EventScheduler, either every 'period' seconds, or at the times given by 'next_run',
+    a function returning the seconds until the next run (for the events following the wall clock).
+    """
+
+    def __init__(self, name: str, callback: Callable[[], None], period: float = None,
+                 next_run: Callable[[], float] = None):
+        self.name = name
+        self.callback = callback
+        self.period = period
+        self.next_run = next_run
+        self.deadline = None
+        self.cancelled = False
+
+    def first_deadline(self, time_now: float, delay: float = None) -> float:
+        if delay is not None:
+            return time_now + delay
+        if self.next_run is not None:
+            return time_now + self.next_run()
+        return time_now + self.period
+
+    def next_deadline(self, time_now: float) -> Optional[float]:
+        """
+        Returns the deadline following the current one, skipping the periods already missed, or None if the event
+        runs only once.
+        """
+        if self.next_run is not None:
+            # A small margin, so that we do not run twice for the same wall clock time.
+            return time_now + max(self.next_run(), EVENT_LATE_TOLERANCE)
+        if not self.period:
+            return None
+
+        deadline = self.deadline + self.period
+        if deadline <= time_now:
+            deadline += ((time_now - deadline) // self.period + 1) * self.period
+        return deadline
+
+    def __repr__(self):
+        return "ScheduledEvent({}, period={}, deadline={})".format(self.name, self.period, self.deadline)
+
+
+class EventScheduler:
+    """
+    Runs the registered events at their deadlines, from the thread calling run().
+
+    The events are kept in a heap ordered by their monotonic deadlines, hence the thread sleeps exactly until the next
+    deadline, or until an event is added, changed or triggered from another thread. An event that starts later than
+    EVENT_LATE_TOLERANCE seconds after its deadline is reported as missed, and the missed periods are skipped rather
+    than run in a burst.
+
+    Created: 17/10/2026
+    """
+
+    def __init__(self, name: str):
+        """
+        Args:
+            name:   Name of the scheduler, for the logs and the metrics.
+        """
+        self.CLASS = "EventScheduler"
+        self.name = name
+        self.metrics = MetricsRegistry()
+
+        self.condition = threading.Condition()
+        self.heap = []
+        self.events: Dict[str, ScheduledEvent] = {}
+        self.sequence = itertools.count()
+        self.running = False
+
+    def every(self, name: str, period: float, callback: Callable[[], None], delay: float = None) -> ScheduledEvent:
+        """
+        Runs the callback every 'period' seconds, first after 'delay' seconds (default: one period).
+        An event registered under an existing name replaces it.
+        """
+        return self.add(ScheduledEvent(name, callback, period=period), delay)
+
+    def at_interval(self, name: str, interval: float, callback: Callable[[], None]) -> ScheduledEvent:
+        """
+        Runs the callback at every multiple of the interval (in seconds) on the wall clock, e.g. every quarter of
+        an hour for an interval of 900.
+        """
+        return self.add(ScheduledEvent(name, callback, next_run=lambda: seconds_to_next_interval(interval)))
+
+    def daily(self, name: str, at: time_of_day, callback: Callable[[], None]) -> ScheduledEvent:
+        """
+        Runs the callback every day, when the wall clock shows the given time of the day.
+        """
+        return self.add(ScheduledEvent(name, callback, next_run=lambda: seconds_to_time_of_day(at)))
+
+    def add(self, event: ScheduledEvent, delay: float = None) -> ScheduledEvent:
+        with self.condition:
+            previous = self.events.get(event.name)
+            if previous is not None:
+                previous.cancelled = True
+
+            event.deadline = event.first_deadline(get_clock().monotonic(), delay)
+            self.events[event.name] = event
+            heapq.heappush(self.heap, (event.deadline, next(self.sequence), event))
+            self.condition.notify()
+
+        logger(FINER, self.CLASS, "{}: scheduled {}", self.name, event)
+        return event
+
+    def cancel(self, name: str):
+        with self.condition:
+            event = self.events.pop(name, None)
+            if event is not None:
+                event.cancelled = True
+                logger(FINER, self.CLASS, "{}: cancelled {}", self.name, name)
+
+    def trigger(self, name: str) -> Optional[Future]:
+        """
+        Runs the event as soon as possible, then continues with its regular deadlines.
+
+        Returns:
+            Future:     Done when the triggered run is over, with the result or the error of the callback.
+                        None if there is no such event.
+        """
+        with self.condition:
+            event = self.events.get(name)
+            if event is None:
+                return None
+
+            future = Future()
+            callback = event.callback
+
+            def run_triggered():
+                try:
+                    future.set_result(callback())
+                except Exception as e:
+                    future.set_exception(e)
+                    raise
+
+            heapq.heappush(self.heap, (get_clock().monotonic(), next(self.sequence), ScheduledEvent(name, run_triggered)))
+            self.condition.notify()
+            return future
+
+    def run(self):
+        """
+        Runs the events until stop() is called.
+        """
+        logger(FINE, self.CLASS, "{}: running {} events.", self.name, len(self.events))
+        self.running = True
+
+        while self.running:
+            event = self.wait_for_next()
+            if event is not None:
+                self.run_event(event)
+
+    def wait_for_next(self) -> Optional[ScheduledEvent]:
+        """
+        Sleeps until the next deadline, and returns the event due, or None when woken up for another reason.
+        """
+        with self.condition:
+            while self.heap and self.heap[0][2].cancelled:
+                heapq.heappop(self.heap)
+
+            if not self.heap:
+                get_clock().wait(self.condition)
+                return None
+
+            deadline, _, event = self.heap[0]
+            time_left = deadline - get_clock().monotonic()
+            if time_left > 0:
+                get_clock().wait(self.condition, time_left)
+                return None
+
+            heapq.heappop(self.heap)
+
+            # A triggered run is a one-off copy of the registered event.
+            registered = self.events.get(event.name)
+            if registered is event:
+                time_now = get_clock().monotonic()
+                event.deadline = event.next_deadline(time_now)
+                if event.deadline is None:
+                    del self.events[event.name]
+                else:
+                    heapq.heappush(self.heap, (event.deadline, next(self.sequence), event))
+
+        self.check_lateness(event.name, deadline)
+        return event
+
+    def check_lateness(self, name: str, deadline: float):
+        lateness = get_clock().monotonic() - deadline
+        self.metrics.histogram("event_lateness_ms", name).observe(lateness * 1000)
+
+        if lateness > EVENT_LATE_TOLERANCE:
+            self.metrics.counter("event_missed_deadlines", name).inc()
+            logger(WARNING, self.CLASS, "{}: event '{}' missed its deadline by {:.3f} seconds.",
+                   self.name, name, lateness)
+
+    def run_event(self, event: ScheduledEvent):
+        logger(FINEST, self.CLASS, "{}: running '{}'..", self.name, event.name)
+        time_start = time.perf_counter()
+        try:
+            event.callback()
+        except Exception as e:
+            self.metrics.counter("event_errors", event.name).inc()
+            logger(WARNING, self.CLASS, "{}: event '{}' failed: {}", self.name, event.name, e)
+        finally:
+            self.metrics.histogram("event_ms", event.name).observe((time.perf_counter() - time_start) * 1000)
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify()
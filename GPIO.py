@@ -17,37 +17,96 @@
 # Use, copying, and/or disclosure of the file is strictly
 # prohibited unless otherwise provided in the license agreement.
 ###################################################################
-import RPi.GPIO as RPIGPIO
+import threading
 
+from Clock import get_clock
 from Common import logger
 from ConfigStore import ConfigStore
-from Constants import WARNING, FINE, FINER, HEATING_STATE_OFF, HEATING_STATE_ON
+from Constants import WARNING, FINE, FINER, FINEST, HEATING_STATE_OFF, HEATING_STATE_ON, GPIO_AUDIT_PERIOD, ZONE_DEFAULT
+from Metrics import MetricsRegistry
 
 
 class GPIO:
     """
     Provides interface to relay switches
 
+    The state of the relays is kept in memory (the shadow state), which is what getRelayState() returns.
+    The pins are only written when the state changes, and only read back to verify a change, or on the periodic
+    audit every GPIO_AUDIT_PERIOD seconds, which restores the shadow state if the relays are found otherwise.
+    The relays are switched by the RelayController, which serialises the commands of all threads.
+    There is one GPIO object per heating zone, driving the relay pair of the zone.
+
     Created: 24.02.2018
     """
-    def __init__(self):
+    def __init__(self, zone: str = ZONE_DEFAULT, board=None):
         """
         Initialise the RPI board IO GPIO.
 
+        Args:
+            zone:   The heating zone of the relays, as configured in [zone.<name>].
+            board:  The board IO with the interface of RPi.GPIO. Default: RPi.GPIO, imported here, so that the
+                    control can run off the device with a simulated board.
         Created: 24.02.2018
         """
         self.CLASS = "GPIO"
+        self.zone = zone
+
+        if board is None:
+            import RPi.GPIO as board
+        self.board = board
 
         self.config = ConfigStore()
+        self.metrics = MetricsRegistry()
+        self.gpio_reads = self.metrics.counter("gpio_reads", zone)
+        self.gpio_writes = self.metrics.counter("gpio_writes", zone)
+        self.gpio_writes_skipped = self.metrics.counter("gpio_writes_skipped", zone)
+        self.gpio_audit_mismatches = self.metrics.counter("gpio_audit_mismatches", zone)
+
+        self.lock = threading.RLock()
+        self.relay_1 = None
+        self.relay_2 = None
+        self.state = None
+        self.time_audited = 0.0
 
         # Configure the RPi board IO
         # ===========
-        RPIGPIO.setmode(RPIGPIO.BOARD)
-        RPIGPIO.setwarnings(False)
-        RPIGPIO.setup(self.config.getGpioPin("relay_1"), RPIGPIO.OUT)
-        RPIGPIO.setup(self.config.getGpioPin("relay_2"), RPIGPIO.OUT)
+        self.board.setmode(self.board.BOARD)
+        self.board.setwarnings(False)
+        self.setup_pins(self.config.snapshot)
+        self.config.subscribe('pin.gpio', None, self.setup_pins)
+        self.config.subscribe('zone.' + zone, None, self.setup_pins)
 
-    def getRelayState(self) -> bool:
+    def setup_pins(self, snapshot):
+        """
+        Resolves the relay pins of the zone in the config snapshot, and sets them up as outputs.
+        When the pins change, the current heating state is carried over to the new pins.
+
+        Args:
+            snapshot:   ConfigSnapshot with the GPIO settings.
+        """
+        zone = snapshot.zones.get(self.zone)
+        if zone is None:
+            logger(WARNING, self.CLASS, "Zone '{}' is no longer configured, keeping its relay pins.", self.zone)
+            return
+
+        with self.lock:
+            if (self.relay_1, self.relay_2) == (zone.relay_1, zone.relay_2):
+                return
+
+            logger(FINE, self.CLASS, "Relay pins of zone '{}': relay_1[{}], relay_2[{}]",
+                   self.zone, zone.relay_1, zone.relay_2)
+            self.board.setup(zone.relay_1, self.board.OUT)
+            self.board.setup(zone.relay_2, self.board.OUT)
+            self.relay_1 = zone.relay_1
+            self.relay_2 = zone.relay_2
+
+            if self.state is None:
+                self.state = self.readRelayState()
+                self.time_audited = get_clock().monotonic()
+            else:
+                self.writeRelayState(self.state)
+
+    def readRelayState(self) -> bool:
         """
         Function to read the state of the relays and determine the state:
             HEATING_MODE_ON    -> GPIO_PIN_RELAY_1[1]
@@ -62,29 +121,73 @@ class GPIO:
         Created:
             24.02.2018
         """
-        relay_state_1 = int(RPIGPIO.input(self.config.getGpioPin("relay_1")))
-        relay_state_2 = int(RPIGPIO.input(self.config.getGpioPin("relay_2")))
+        relay_state_1 = int(self.board.input(self.relay_1))
+        relay_state_2 = int(self.board.input(self.relay_2))
+        self.gpio_reads.inc(2)
 
         if relay_state_1 == 0 and relay_state_2 == 1:
-            logger(FINER, self.CLASS,
-                   "Heating state is {} due to relay state of: relay_1[{}]->{}, relay_2[{}]->{}"
-                   .format(HEATING_STATE_OFF,
-                           self.config.getGpioPin("relay_1"), relay_state_1,
-                           self.config.getGpioPin("relay_2"), relay_state_2))
-            return bool(HEATING_STATE_OFF)
+            heating_state = HEATING_STATE_OFF
         else:
-            logger(FINER, self.CLASS,
-                   "Heating state is {} due to relay state of: relay_1[{}]->{}, relay_2[{}]->{}"
-                   .format(HEATING_STATE_ON,
-                           self.config.getGpioPin("relay_1"), relay_state_1,
-                           self.config.getGpioPin("relay_2"), relay_state_2))
-            return bool(HEATING_STATE_ON)
-
-    def setRelayState(self, state: bool):
+            heating_state = HEATING_STATE_ON
+
+        logger(FINER, self.CLASS, "Heating state is {} due to relay state of: relay_1[{}]->{}, relay_2[{}]->{}",
+               heating_state, self.relay_1, relay_state_1, self.relay_2, relay_state_2)
+        return bool(heating_state)
+
+    def writeRelayState(self, state: bool):
+        """
+        Writes the pins of the relays for the heating state:
+            HEATING_MODE_ON    -> GPIO_PIN_RELAY_1[1] && GPIO_PIN_RELAY_2[1]
+            HEATING_MODE_OFF   -> GPIO_PIN_RELAY_1[0] && GPIO_PIN_RELAY_2[1]
+        """
+        logger(FINER, self.CLASS, "Switching heating to {}, relay switches: relay_1[{}]->{}, relay_2[{}]->{}",
+               state, self.relay_1, int(state), self.relay_2, 1)
+        self.board.output(self.relay_1, self.board.HIGH if state else self.board.LOW)
+        self.board.output(self.relay_2, self.board.HIGH)
+        self.gpio_writes.inc(2)
+
+    def getRelayState(self) -> bool:
+        """
+        Returns the heating state, as last set. The relays themselves are only read by the periodic audit.
+
+        Returns:
+            Determine if the heating is ON or OFF
+        Created:
+            24.02.2018
+        """
+        if get_clock().monotonic() - self.time_audited >= GPIO_AUDIT_PERIOD:
+            self.audit()
+
+        logger(FINEST, self.CLASS, "Heating state is {}", self.state)
+        return self.state
+
+    def audit(self) -> bool:
+        """
+        Reads the relays and compares them to the shadow state. If they differ (e.g. the pins were written by
+        another process), the shadow state is written to the relays again.
+
+        Returns:
+            bool:   True if the relays matched the shadow state, false otherwise.
+        """
+        with self.lock:
+            self.time_audited = get_clock().monotonic()
+            state_real = self.readRelayState()
+
+            if state_real == self.state:
+                return True
+
+            logger(WARNING, self.CLASS, "Audit: heating state is {}, but the relays are {}. Restoring..",
+                   self.state, state_real)
+            self.gpio_audit_mismatches.inc()
+            self.writeRelayState(self.state)
+            return False
+
+    def setRelayState(self, state: bool) -> bool:
         """
         Function to set the state of the relays:
             HEATING_MODE_ON    -> GPIO_PIN_RELAY_1[1]
             HEATING_MODE_OFF   -> GPIO_PIN_RELAY_1[0] && GPIO_PIN_RELAY_2[1]
+        The relays are only written, and read back to verify, if the state changes.
 
         NOTE:   Although the function act as there is one On/Off relay, there are in fact two relays to control.
                 The reason is that with two relays we can ensure that the hardware bypasses when the power is off.
@@ -93,49 +196,25 @@ class GPIO:
         Args:
             state:  Value: HEATING_STATE_ON | HEATING_STATE_OFF
         Returns:
-            none
+            bool:   The heating state after the change.
         Config:
             24.02.2018
         """
-        if str(state).lower() == str(HEATING_STATE_OFF).lower():
-            logger(FINER, self.CLASS,
-                   "Switching heating to {}, relay switches: relay_1[{}]->{}, relay_2[{}]->{}"
-                   .format(HEATING_STATE_OFF,
-                           self.config.getGpioPin("relay_1"), 0,
-                           self.config.getGpioPin("relay_2"), 1))
-            RPIGPIO.output(self.config.getGpioPin("relay_1"), RPIGPIO.LOW)
-            RPIGPIO.output(self.config.getGpioPin("relay_2"), RPIGPIO.HIGH)
-        else:
-            logger(FINER, self.CLASS,
-                   "Switching heating to {}, relay switches: relay_1[{}]->{}, relay_2[{}]->{}"
-                   .format(HEATING_STATE_ON,
-                           self.config.getGpioPin("relay_1"), 1,
-                           self.config.getGpioPin("relay_2"), 1))
-            RPIGPIO.output(self.config.getGpioPin("relay_1"), RPIGPIO.HIGH)
-            RPIGPIO.output(self.config.getGpioPin("relay_2"), RPIGPIO.HIGH)
+        state = str(state).lower() != str(HEATING_STATE_OFF).lower()
 
-        state_real = str(self.getRelayState()).lower()
+        with self.lock:
+            if state == self.state:
+                self.gpio_writes_skipped.inc()
+                logger(FINEST, self.CLASS, "Heating already {}.", state)
+                return state
 
-        if str(state).lower() != state_real:
-            logger(WARNING, self.CLASS,
-                   "Failed to set heating to: {}. Returned state: {}".format(state, state_real))
+            self.writeRelayState(state)
 
-        return state_real
+            state_real = self.readRelayState()
+            self.time_audited = get_clock().monotonic()
+            self.state = state_real
 
-    def temperature_to_relay_state(self, thermo_temperature: float, room_temperature: float):
-        """
-        Switch the heating on/off depending on the room temperature.
-        TODO: To extend for multi rooms.
+        if state != state_real:
+            logger(WARNING, self.CLASS, "Failed to set heating to: {}. Returned state: {}", state, state_real)
 
-        Args:
-            thermo_temperature: Temperature to which the thermostat is set to.
-            room_temperature:   Temperature measured by the temperature sensor in the room.
-        """
-        if thermo_temperature <= round(room_temperature):
-            logger(FINE, self.CLASS, "Setting 'Heating state OFF': set[{}] <= measured[{}]".format(
-                thermo_temperature, round(room_temperature)))
-            self.setRelayState(HEATING_STATE_OFF)
-        else:
-            logger(FINE, self.CLASS, "Setting 'Heating state ON': set[{}] > measured[{}]".format(
-                thermo_temperature, round(room_temperature)))
-            self.setRelayState(HEATING_STATE_ON)
+        return state_real
@@ -0,0 +1,359 @@
+#!/usr/bin/python
+###################################################################
+# Heating system control with Raspberry Pi
+# -----------------------------------------------------------------
+# (C) Copyright VAYAK Ltd (info@vayak.com). 2026
+# All Rights Reserved
+#
+# THIS IS UNPUBLISHED PROPRIETARY SOURCE CODE
+# The copyright notice above does not evidence any
+# actual or intended publication of such source code.
+#
+# RESTRICTED RIGHTS:
+# This file may have been supplied under a license.
+# It may be used, disclosed, and/or copied only as permitted
+# under such license agreement. Any copy must contain the
+# above copyright notice and this restricted rights notice.
+# Use, copying, and/or disclosure of the file is strictly
+# prohibited unless otherwise provided in the license agreement.
+###################################################################
+import glob
+import gzip
+import os
+import queue
+import shutil
+import sys
+import threading
+import time
+
+from datetime import datetime
+
+from ConfigStore import ConfigStore
+from Constants import LOG_LEVELS, LOG_BATCH_SIZE, WARNING
+
+
+class LogCompressor(threading.Thread):
+    """
+    Compresses the rotated log files and keeps the total disk usage of the log under the configured limit.
+    Runs in its own thread, so the SD card writes of the compression never delay the log writer.
+
+    Created: 17/10/2026
+    """
+
+    def __init__(self):
+        super().__init__(name="LogCompressor", daemon=True)
+        self.files = queue.SimpleQueue()
+
+    def compress(self, file_path: str, max_total_size: int):
+        """
+        Queue a rotated log file for compression.
+
+        Args:
+            file_path:      The rotated log file.
+            max_total_size: Disk usage limit in bytes for the log file and all its rotated copies.
+        """
+        self.files.put((file_path, max_total_size))
+
+    def run(self):
+        while True:
+            file_path, max_total_size = self.files.get()
+
+            try:
+                with open(file_path, "rb") as file_in, gzip.open(file_path + ".gz", "wb") as file_out:
+                    shutil.copyfileobj(file_in, file_out)
+                os.remove(file_path)
+            except (IOError, OSError) as e:
+                print("Failed to compress log file '{}': {}".format(file_path, e))
+
+            self.enforce_disk_limit(file_path[:file_path.rindex(".")], max_total_size)
+
+    @staticmethod
+    def enforce_disk_limit(log_file: str, max_total_size: int):
+        """
+        Deletes the oldest rotated copies of the log file until the total size is within the limit.
+
+        Args:
+            log_file:       The active log file.
+            max_total_size: Disk usage limit in bytes for the log file and all its rotated copies.
+        """
+        if max_total_size <= 0:
+            return
+
+        # The rotation suffix is a timestamp, hence the name order is also the age order.
+        rotated_files = sorted(glob.glob(glob.escape(log_file) + ".*"))
+        try:
+            total_size = os.path.getsize(log_file) if os.path.exists(log_file) else 0
+            total_size += sum(os.path.getsize(rotated_file) for rotated_file in rotated_files)
+        except OSError:
+            return
+
+        while rotated_files and total_size > max_total_size:
+            oldest_file = rotated_files.pop(0)
+            try:
+                total_size -= os.path.getsize(oldest_file)
+                os.remove(oldest_file)
+            except OSError:
+                pass
+
+
+class LogWriter(threading.Thread):
+    """
+    Background writer for the log messages.
+
+    The callers only check the (cached) log level and put the message on a bounded queue, never waiting on the disk.
+    Building the timestamp and formatting the line happens in this thread. The lines are kept in memory and
+    written to the log file in one go when the buffer is full, when the flush interval expires, or straight away
+    for CRITICAL and WARNING messages. The log file is rotated by size or by day, and the rotated files are
+    compressed by the LogCompressor, keeping the SD card writes few and the disk usage bounded.
+
+    Created: 17/10/2026
+    """
+
+    def __init__(self):
+        """
+        Create the writer and read the initial logging settings.
+
+        Returns:
+            none
+        """
+        super().__init__(name="LogWriter", daemon=True)
+        self.CLASS = "LogWriter"
+        self.config = ConfigStore()
+
+        self.running = True
+
+        self.refresh(self.config.snapshot)
+        self.config.subscribe('logging', None, self.refresh)
+
+        self.messages = queue.Queue(self.config.snapshot.log_queue_size)
+
+        self.buffer = []
+        self.buffer_bytes = 0
+        self.flush_deadline = None
+
+        self.file_handle = None
+        self.file_size = 0
+        self.file_day = None
+
+        self.compressor = LogCompressor()
+        self.compressor.start()
+
+        # Log I/O statistics, allowing the sink latency to be monitored
+        self.dropped = 0
+        self.flushes = 0
+        self.bytes_written = 0
+        self.flush_ms_last = 0.0
+        self.flush_ms_max = 0.0
+
+        # Formatting the timestamp is relatively expensive, hence we do it once per second.
+        self.time_second = 0
+        self.time_string = ""
+
+    def refresh(self, snapshot):
+        """
+        Take over the logging settings from the config snapshot. Called again by the config store whenever
+        the [logging] settings change, so that the check on every logger() call is a plain integer comparison.
+
+        Args:
+            snapshot:   ConfigSnapshot to take the settings from.
+        """
+        self.level = snapshot.log_level
+        self.sink = snapshot.log_file
+        self.buffer_size = snapshot.log_buffer_size
+        self.flush_interval = snapshot.log_flush_interval
+        self.rotate = snapshot.log_rotate
+        self.max_size = snapshot.log_max_size
+        self.max_total_size = snapshot.log_max_total_size
+
+    def get_level(self) -> int:
+        """
+        Returns the cached log level threshold.
+
+        Returns:
+            int:    Index of the log level in LOG_LEVELS.
+        """
+        return self.level
+
+    def write(self, level: int, caller: str, message: str):
+        """
+        Queue an already formatted message for writing. Never blocks: if the queue is full, the message is dropped.
+
+        Args:
+            level:      The logging level in which the message should appear.
+            caller:     The name of the class that prints the log information.
+            message:    The Log message.
+        """
+        try:
+            self.messages.put_nowait((time.time(), level, caller, message))
+        except queue.Full:
+            self.dropped += 1
+
+    def get_stats(self) -> dict:
+        """
+        Returns the log I/O statistics.
+
+        Returns:
+            dict:   Number of flushes, bytes written, dropped messages, and the last and maximum flush time in ms.
+        """
+        return {
+            "queued": self.messages.qsize(),
+            "buffered_bytes": self.buffer_bytes,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+            "bytes_written": self.bytes_written,
+            "flush_ms_last": round(self.flush_ms_last, 3),
+            "flush_ms_max": round(self.flush_ms_max, 3),
+        }
+
+    def run(self):
+        """
+        Wait for messages, buffer them and write them to the sink when due.
+        """
+        while self.running:
+            if self.flush_deadline is None:
+                timeout = None
+            else:
+                timeout = max(0.0, self.flush_deadline - time.monotonic())
+
+            try:
+                batch = [self.messages.get(timeout=timeout)]
+            except queue.Empty:
+                batch = []
+
+            while 0 < len(batch) < LOG_BATCH_SIZE:
+                try:
+                    batch.append(self.messages.get_nowait())
+                except queue.Empty:
+                    break
+
+            urgent = self.buffer_batch(batch)
+
+            if urgent or not self.running or self.sink == "stdout" or self.buffer_bytes >= self.buffer_size or \
+                    (self.flush_deadline is not None and time.monotonic() >= self.flush_deadline):
+                self.flush()
+
+    def buffer_batch(self, batch: list) -> bool:
+        """
+        Format a batch of messages and add them to the in-memory buffer.
+
+        Args:
+            batch:  List of tuples (timestamp, level, caller, message). A None element stops the writer.
+        Returns:
+            bool:   True if the batch contains a message which should be written out immediately.
+        """
+        urgent = False
+        for record in batch:
+            if record is None:
+                self.running = False
+                continue
+
+            line = "{} {: >9} {: >15} {}\n".format(
+                self.format_time(record[0]), LOG_LEVELS[record[1]], record[2], record[3])
+            self.buffer.append(line)
+            self.buffer_bytes += len(line)
+            urgent = urgent or record[1] <= WARNING
+
+        if self.buffer and self.flush_deadline is None:
+            self.flush_deadline = time.monotonic() + self.flush_interval
+
+        return urgent
+
+    def flush(self):
+        """
+        Write the buffered lines to the sink with a single write and flush, rotating the log file if due.
+        """
+        if not self.buffer:
+            self.flush_deadline = None
+            return
+
+        data = "".join(self.buffer)
+        self.buffer = []
+        self.buffer_bytes = 0
+        self.flush_deadline = None
+
+        time_start = time.perf_counter()
+        try:
+            output = self.open_sink()
+            output.write(data)
+            output.flush()
+            self.file_size += len(data)
+            self.bytes_written += len(data)
+        except (IOError, OSError) as e:
+            print("Failed to write to log '{}': {}".format(self.sink, e))
+            self.close_sink()
+
+        self.flush_ms_last = (time.perf_counter() - time_start) * 1000
+        self.flush_ms_max = max(self.flush_ms_max, self.flush_ms_last)
+        self.flushes += 1
+
+    def format_time(self, timestamp: float) -> str:
+        """
+        Returns the log timestamp in the format "%Y-%m-%d %H:%M:%S", reusing the last result within the same second.
+        """
+        second = int(timestamp)
+        if second != self.time_second:
+            self.time_second = second
+            self.time_string = datetime.fromtimestamp(second).strftime("%Y-%m-%d %H:%M:%S")
+        return self.time_string
+
+    def open_sink(self):
+        """
+        Returns the stream to write to, (re)opening the log file if the sink has changed or the file is due rotation.
+        """
+        if self.sink == "stdout":
+            self.close_sink()
+            return sys.stdout
+
+        if self.file_handle is not None and self.file_handle.name != self.sink:
+            self.close_sink()
+
+        if self.file_handle is not None and self.rotation_due():
+            self.rotate_file()
+
+        if self.file_handle is None:
+            self.file_handle = open(self.sink, "a")
+            self.file_size = self.file_handle.tell()
+            self.file_day = datetime.now().date()
+
+        return self.file_handle
+
+    def rotation_due(self) -> bool:
+        if self.rotate == "daily":
+            return datetime.now().date() != self.file_day
+        return 0 < self.max_size <= self.file_size
+
+    def rotate_file(self):
+        """
+        Renames the current log file with a timestamp suffix, and hands it over for compression.
+        """
+        self.close_sink()
+        rotated_file = "{}.{}".format(self.sink, datetime.now().strftime("%Y%m%d-%H%M%S-%f"))
+        try:
+            os.replace(self.sink, rotated_file)
+        except OSError as e:
+            print("Failed to rotate log file '{}': {}".format(self.sink, e))
+            return
+        self.compressor.compress(rotated_file, self.max_total_size)
+
+    def close_sink(self):
+        if self.file_handle is not None:
+            try:
+                self.file_handle.close()
+            except (IOError, OSError):
+                pass
+            self.file_handle = None
+
+    def stop(self, timeout: float = 2.0):
+        """
+        Write all queued messages and stop the writer.
+
+        Args:
+            timeout:    Maximum time in seconds to wait for the queue to be written out.
+        """
+        if self.is_alive():
+            try:
+                self.messages.put(None, timeout=timeout)
+            except queue.Full:
+                pass
+            self.join(timeout)
+        self.close_sink()
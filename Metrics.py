@@ -0,0 +1,222 @@
+#!/usr/bin/python
+###################################################################
+# Heating system control with Raspberry Pi
+# -----------------------------------------------------------------
+# (C) Copyright VAYAK Ltd (info@vayak.com). 2026
+# All Rights Reserved
+#
+# THIS IS UNPUBLISHED PROPRIETARY SOURCE CODE
+# The copyright notice above does not evidence any
+# actual or intended publication of such source code.
+#
+# RESTRICTED RIGHTS:
+# This file may have been supplied under a license.
+# It may be used, disclosed, and/or copied only as permitted
+# under such license agreement. Any copy must contain the
+# above copyright notice and this restricted rights notice.
+# Use, copying, and/or disclosure of the file is strictly
+# prohibited unless otherwise provided in the license agreement.
+###################################################################
+import bisect
+import json
+import os
+import threading
+import time
+
+from typing import Callable, Dict, Tuple
+
+from ConfigStore import ConfigStore, Singleton
+from Constants import METRICS_LATENCY_BUCKETS_MS
+
+
+class Counter:
+    """
+    Monotonically increasing count of events.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.value = 0
+
+    def inc(self, amount: int = 1):
+        with self.lock:
+            self.value += amount
+
+    def snapshot(self) -> int:
+        return self.value
+
+
+class Gauge:
+    """
+    Last observed value of a quantity which may go up and down.
+    """
+
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value: float):
+        self.value = value
+
+    def snapshot(self) -> float:
+        return self.value
+
+
+class Histogram:
+    """
+    Distribution of observed values over fixed buckets, with count, sum, min and max.
+    The buckets are upper bounds, the last (implicit) bucket counts everything above the highest bound.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = METRICS_LATENCY_BUCKETS_MS):
+        self.lock = threading.Lock()
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+            if self.min is None or value < self.min:
+                self.min = value
+            if self.max is None or value > self.max:
+                self.max = value
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            buckets = {"le_{}".format(bound): count for bound, count in zip(self.buckets, self.counts)}
+            buckets["le_inf"] = self.counts[-1]
+            return {
+                "count": self.count,
+                "sum": round(self.sum, 3),
+                "avg": round(self.sum / self.count, 3) if self.count else 0.0,
+                "min": round(self.min, 3) if self.min is not None else None,
+                "max": round(self.max, 3) if self.max is not None else None,
+                "buckets": buckets,
+            }
+
+
+class MetricsRegistry(metaclass=Singleton):
+    """
+    In-process registry of the application's counters, gauges and histograms.
+
+    The metrics are identified by name and an optional label (for example the SQL statement or the request name),
+    and are created on first use. Components should keep a reference to the metrics they update on hot paths.
+
+    Created: 17/10/2026
+    """
+
+    def __init__(self):
+        self.CLASS = "MetricsRegistry"
+        self.config = ConfigStore()
+        self.lock = threading.Lock()
+
+        self.counters: Dict[Tuple[str, str], Counter] = {}
+        self.gauges: Dict[Tuple[str, str], Gauge] = {}
+        self.histograms: Dict[Tuple[str, str], Histogram] = {}
+        self.collectors: Dict[str, Callable[[], dict]] = {}
+
+        self.time_started = time.time()
+        self.time_dumped = time.monotonic()
+
+    def get_metric(self, metrics: dict, metric_class, name: str, label: str):
+        key = (name, label)
+        metric = metrics.get(key)
+        if metric is None:
+            with self.lock:
+                metric = metrics.setdefault(key, metric_class())
+        return metric
+
+    def counter(self, name: str, label: str = "") -> Counter:
+        return self.get_metric(self.counters, Counter, name, label)
+
+    def gauge(self, name: str, label: str = "") -> Gauge:
+        return self.get_metric(self.gauges, Gauge, name, label)
+
+    def histogram(self, name: str, label: str = "") -> Histogram:
+        return self.get_metric(self.histograms, Histogram, name, label)
+
+    def add_collector(self, name: str, collector: Callable[[], dict]):
+        """
+        Register a function returning statistics owned by another component, included in the snapshot under its name.
+
+        Args:
+            name:       Name of the section in the snapshot.
+            collector:  Function returning a JSON serialisable dictionary.
+        """
+        self.collectors[name] = collector
+
+    def snapshot(self) -> dict:
+        """
+        Returns all metrics as a JSON serialisable dictionary:
+            { "uptime": seconds, "counters": {name: {label: value}}, "gauges": {..}, "histograms": {..}, .. }
+        """
+        snapshot = {"uptime": int(time.time() - self.time_started)}
+
+        for section, metrics in (("counters", self.counters), ("gauges", self.gauges),
+                                 ("histograms", self.histograms)):
+            section_data = {}
+            for (name, label), metric in list(metrics.items()):
+                section_data.setdefault(name, {})[label or "total"] = metric.snapshot()
+            snapshot[section] = section_data
+
+        for name, collector in list(self.collectors.items()):
+            try:
+                snapshot[name] = collector()
+            except Exception as e:
+                snapshot[name] = {"error": str(e)}
+
+        return snapshot
+
+    def dump(self, file_path: str = None) -> str:
+        """
+        Writes the metrics snapshot as JSON to a file. The file is replaced atomically.
+
+        Args:
+            file_path:  The file to write to. Default: [metrics] file property.
+        Returns:
+            str:        The file written to.
+        """
+        if not file_path:
+            file_path = self.config.snapshot.metrics_file
+
+        file_temp = file_path + ".tmp"
+        with open(file_temp, "w") as file_metrics:
+            json.dump(self.snapshot(), file_metrics, indent=1)
+        os.replace(file_temp, file_path)
+
+        self.time_dumped = time.monotonic()
+        return file_path
+
+
+def sql_label(query: str) -> str:
+    """
+    Builds a short label for the SQL query, consisting of the statement type and the table name.
+    For example: "SELECT temperature", "UPDATE thermostat".
+
+    Args:
+        query:  SQL query.
+    Returns:
+        str:    Label of the query.
+    """
+    words = query.split(None, 1)
+    if not words:
+        return "unknown"
+
+    statement = words[0].upper()
+    keyword = {"SELECT": " FROM ", "DELETE": " FROM ", "INSERT": " INTO ", "REPLACE": " INTO "}.get(statement)
+
+    if keyword:
+        position = query.upper().find(keyword)
+        if position == -1:
+            return statement
+        table = query[position + len(keyword):].split(None, 1)
+    else:
+        table = words[1].split(None, 1) if len(words) > 1 else []
+
+    return "{} {}".format(statement, table[0].strip("`(") if table else "").strip()
@@ -0,0 +1,91 @@
+#!/usr/bin/python
+###################################################################
+# Heating system control with Raspberry Pi
+# -----------------------------------------------------------------
+# (C) Copyright VAYAK Ltd (info@vayak.com). 2026
+# All Rights Reserved
+#
+# THIS IS UNPUBLISHED PROPRIETARY SOURCE CODE
+# The copyright notice above does not evidence any
+# actual or intended publication of such source code.
+#
+# RESTRICTED RIGHTS:
+# This file may have been supplied under a license.
+# It may be used, disclosed, and/or copied only as permitted
+# under such license agreement. Any copy must contain the
+# above copyright notice and this restricted rights notice.
+# Use, copying, and/or disclosure of the file is strictly
+# prohibited unless otherwise provided in the license agreement.
+###################################################################
+from typing import List, Sequence, Tuple
+
+import pymysql
+
+from dbutils.persistent_db import PersistentDB
+
+from Common import logger
+from Constants import FINER, DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASS
+from DatabaseBackend import DatabaseBackend
+from SchemaMigrator import SchemaMigrator
+
+
+class MySQLBackend(DatabaseBackend):
+    """
+    MySQL (or MariaDB) server storage, with a persistent connection per thread. The schema is brought up to date by
+    the SchemaMigrator.
+
+    Created: 17/10/2026
+    """
+
+    def __init__(self):
+        self.CLASS = "MySQLBackend"
+
+        logger(FINER, self.CLASS,
+               "Connecting to database: host[{}], port[{}], name[{}], user[{}], pass[*****].",
+               DB_HOST, DB_PORT, DB_NAME, DB_USER)
+        self.db_pool = PersistentDB(
+            creator=pymysql,
+            host=DB_HOST,
+            port=DB_PORT,
+            user=DB_USER,
+            password=DB_PASS,
+            database=DB_NAME,
+            charset='utf8',
+            autocommit=True
+        )
+
+    def migrate(self) -> int:
+        return SchemaMigrator(self.db_pool).migrate()
+
+    def execute(self, query: str, params: Tuple = None) -> List[dict]:
+        # Note that despite we close the connection here, it will still be alive for reuse until this thread is alive
+        connection = self.db_pool.connection()
+        cursor = None
+        try:
+            cursor = connection.cursor(pymysql.cursors.DictCursor)
+            cursor.execute(query, params)
+            return cursor.fetchall()
+        finally:
+            if cursor is not None:
+                cursor.close()
+            connection.close()
+
+    def execute_many(self, query: str, params: List[Tuple]) -> int:
+        # For INSERT ... VALUES statements, pymysql sends all the rows in a single multi-row statement.
+        connection = self.db_pool.connection()
+        cursor = None
+        try:
+            cursor = connection.cursor()
+            return cursor.executemany(query, params)
+        finally:
+            if cursor is not None:
+                cursor.close()
+            connection.close()
+
+    def hour_of(self, column: str) -> str:
+        return "DATE_FORMAT({}, '%%Y-%%m-%%d %%H:00:00')".format(column)
+
+    def upsert(self, table: str, columns: Sequence[str], keys: Sequence[str]) -> str:
+        return "INSERT INTO {} ({}) VALUES ({}) ON DUPLICATE KEY UPDATE {}".format(
+            table, ", ".join(columns), ", ".join(["%s"] * len(columns)),
+            ", ".join("{0} = VALUES({0})".format(column) for column in columns if column not in keys))
@@ -0,0 +1,259 @@
+#!/usr/bin/python
+###################################################################
+# Heating system control with Raspberry Pi
+# -----------------------------------------------------------------
+# (C) Copyright VAYAK Ltd (info@vayak.com). 2026
+# All Rights Reserved
+#
+# THIS IS UNPUBLISHED PROPRIETARY SOURCE CODE
+# The copyright notice above does not evidence any
+# actual or intended publication of such source code.
+#
+# RESTRICTED RIGHTS:
+# This file may have been supplied under a license.
+# It may be used, disclosed, and/or copied only as permitted
+# under such license agreement. Any copy must contain the
+# above copyright notice and this restricted rights notice.
+# Use, copying, and/or disclosure of the file is strictly
+# prohibited unless otherwise provided in the license agreement.
+###################################################################
+import errno
+import os
+import re
+import threading
+import time
+
+from typing import Dict, List, Optional
+
+from Common import logger
+from Constants import INFO, WARNING, FINER, FINEST, W1_RESCAN_PERIOD, W1_SENSOR_AUTO
+
+# Device directories of the 1-Wire thermometers handled by the w1_therm driver, e.g. 28-0416a4e258ff
+W1_THERM_DEVICE = re.compile(r"(10|22|28|3b|42)-[0-9a-f]{12}")
+W1_SLAVE_SIZE = 256
+
+
+def parse_w1_slave(payload: bytes) -> Optional[int]:
+    """
+    Parses the content of the w1_slave file, straight from the bytes:
+        72 01 4b 46 7f ff 0e 10 57 : crc=57 YES
+        72 01 4b 46 7f ff 0e 10 57 t=23125
+
+    Args:
+        payload:    Content of the w1_slave file.
+    Returns:
+        int:        The temperature in thousandths of a degree Celsius, or None if the CRC check failed.
+    """
+    line_end = payload.find(b"\n")
+    if line_end < 3 or payload[line_end - 3:line_end] != b"YES":
+        return None
+
+    value_start = payload.find(b"t=", line_end)
+    if value_start == -1:
+        return None
+
+    try:
+        return int(payload[value_start + 2:])
+    except ValueError:
+        return None
+
+
+class SensorHandle:
+    """
+    The open w1_slave file of a sensor. The file is closed once the sensor is removed and no read is using it,
+    hence its descriptor cannot be handed to another sensor while being read.
+    """
+
+    def __init__(self, fd: int):
+        self.fd = fd
+        self.users = 0
+        self.retired = False
+
+
+class OneWireRegistry:
+    """
+    Index of the 1-Wire thermometers found under the sysfs devices directory (/sys/bus/w1/devices).
+
+    The directory is scanned once, and again every W1_RESCAN_PERIOD seconds or when an unknown sensor is asked for,
+    to pick up the hot-plugged and removed sensors. The w1_slave file of every sensor is kept open, and re-read
+    with os.pread() from offset 0, which makes the driver produce a fresh reading.
+
+    A sensor set to 'auto' is pinned to the sensor it was first resolved to, for as long as that sensor is on the bus,
+    hence plugging or unplugging another sensor does not move the readings from one probe to another.
+
+    Created: 17/10/2026
+    """
+
+    def __init__(self, devices_path: str):
+        """
+        Args:
+            devices_path:   The 1-Wire devices directory. Any directory with the same layout will do for testing.
+        """
+        self.CLASS = "OneWireRegistry"
+        self.devices_path = devices_path
+        self.lock = threading.Lock()
+        self.handles: Dict[str, SensorHandle] = {}
+        self.time_scanned = None
+        self.closed = False
+
+        # The sensor each 'auto' sensor is pinned to, by its position in the config.
+        self.auto: Dict[int, str] = {}
+
+    def scan(self) -> List[str]:
+        """
+        Scans the devices directory, opening the newly found sensors and closing the removed ones.
+
+        Returns:
+            list:   IDs of the found sensors, sorted.
+        """
+        try:
+            found = {entry.name for entry in os.scandir(self.devices_path) if W1_THERM_DEVICE.fullmatch(entry.name)}
+        except OSError as e:
+            logger(WARNING, self.CLASS, "Failed to scan the 1-Wire devices in {}: {}", self.devices_path, e)
+            found = set()
+
+        with self.lock:
+            if self.closed:
+                return []
+            self.time_scanned = time.monotonic()
+
+            for sensor_id in set(self.handles) - found:
+                logger(INFO, self.CLASS, "Sensor removed: {}", sensor_id)
+                self.retire(self.handles.pop(sensor_id))
+
+            for sensor_id in found - set(self.handles):
+                try:
+                    fd = os.open(os.path.join(self.devices_path, sensor_id, "w1_slave"), os.O_RDONLY)
+                    self.handles[sensor_id] = SensorHandle(fd)
+                    logger(INFO, self.CLASS, "Sensor found: {}", sensor_id)
+                except OSError as e:
+                    logger(WARNING, self.CLASS, "Failed to open sensor {}: {}", sensor_id, e)
+
+            return sorted(self.handles)
+
+    @staticmethod
+    def retire(handle: SensorHandle):
+        """
+        Closes the file of a removed sensor, or leaves it to the last read using it. Called with the lock held.
+        """
+        handle.retired = True
+        if handle.users == 0:
+            os.close(handle.fd)
+
+    def acquire(self, sensor_id: str) -> Optional[SensorHandle]:
+        with self.lock:
+            handle = self.handles.get(sensor_id)
+            if handle is not None:
+                handle.users += 1
+            return handle
+
+    def release(self, handle: SensorHandle):
+        with self.lock:
+            handle.users -= 1
+            if handle.retired and handle.users == 0:
+                os.close(handle.fd)
+
+    def rescan_if_due(self, period: float = W1_RESCAN_PERIOD):
+        """
+        Scans the devices directory if it has not been scanned for the given period of time.
+        """
+        if self.time_scanned is None or time.monotonic() - self.time_scanned >= period:
+            self.scan()
+
+    def get_sensors(self) -> List[str]:
+        """
+        Returns:
+            list:   IDs of the known sensors, sorted.
+        """
+        self.rescan_if_due()
+        with self.lock:
+            return sorted(self.handles)
+
+    def resolve(self, sensor_id: str, index: int) -> Optional[str]:
+        """
+        Resolves the sensor ID set in the config. The ID 'auto' stands for the index-th sensor found on the bus,
+        in the order of their IDs, hence sensor_1_id = auto on a bus with a single sensor needs no configuration.
+
+        The first resolution of an 'auto' sensor is kept for as long as that sensor is on the bus. Once it is removed,
+        the 'auto' sensor moves to a sensor not taken by another one, with a warning, as its readings then come
+        from another probe.
+
+        Args:
+            sensor_id:  The sensor ID set in the config, or 'auto'.
+            index:      Position of the sensor in the config, starting from 1 (sensor_1).
+        Returns:
+            str:        The sensor ID, or None if there is no such sensor.
+        """
+        if sensor_id != W1_SENSOR_AUTO:
+            return sensor_id
+
+        self.rescan_if_due()
+        with self.lock:
+            pinned = self.auto.get(index)
+            if pinned in self.handles:
+                return pinned
+
+            sensors = sorted(self.handles)
+            taken = {sensor for position, sensor in self.auto.items() if position != index and sensor in self.handles}
+            free = [sensor for sensor in sensors if sensor not in taken]
+            if not free:
+                return None
+
+            if pinned is None and 0 < index <= len(sensors) and sensors[index - 1] in free:
+                resolved = sensors[index - 1]
+            elif pinned is None and index > len(sensors):
+                return None
+            else:
+                resolved = free[0]
+
+            if pinned is not None:
+                logger(WARNING, self.CLASS, "Sensor {} (auto) reassigned from {} to {}, the former was removed.",
+                       index, pinned, resolved)
+            self.auto[index] = resolved
+            return resolved
+
+    def read(self, sensor_id: str) -> bytes:
+        """
+        Reads the w1_slave file of the sensor. This is where the driver waits for the temperature conversion.
+
+        Args:
+            sensor_id:  The sensor to read.
+        Returns:
+            bytes:      Content of the w1_slave file.
+        Raises:
+            OSError:    If the sensor is not on the bus, or failed to read (EBADF once the registry is closed).
+        """
+        if self.closed:
+            raise OSError(errno.EBADF, "Registry of {} is closed".format(self.devices_path))
+
+        handle = self.acquire(sensor_id)
+        if handle is None:
+            # Maybe just plugged in, but do not hammer the bus directory on every read of a missing sensor.
+            self.rescan_if_due(1)
+            handle = self.acquire(sensor_id)
+            if handle is None:
+                raise FileNotFoundError("Sensor {} not found in {}".format(sensor_id, self.devices_path))
+
+        try:
+            payload = os.pread(handle.fd, W1_SLAVE_SIZE, 0)
+        except OSError:
+            # Most likely unplugged: forget the handle, the next read will look for the sensor again.
+            self.scan()
+            raise
+        finally:
+            self.release(handle)
+
+        logger(FINEST, self.CLASS, "Sensor {} payload: {}", sensor_id, payload)
+        return payload
+
+    def close(self):
+        """
+        Closes the sensor files, each once the reads using it are over. The registry cannot be used afterwards.
+        """
+        with self.lock:
+            logger(FINER, self.CLASS, "Closing {} sensors.", len(self.handles))
+            self.closed = True
+            for handle in self.handles.values():
+                self.retire(handle)
+            self.handles.clear()
+            self.time_scanned = None
@@ -0,0 +1,137 @@
+#!/usr/bin/python
+###################################################################
+# Heating system control with Raspberry Pi
+# -----------------------------------------------------------------
+# (C) Copyright VAYAK Ltd (info@vayak.com). 2026
+# All Rights Reserved
+#
+# THIS IS UNPUBLISHED PROPRIETARY SOURCE CODE
+# The copyright notice above does not evidence any
+# actual or intended publication of such source code.
+#
+# RESTRICTED RIGHTS:
+# This file may have been supplied under a license.
+# It may be used, disclosed, and/or copied only as permitted
+# under such license agreement. Any copy must contain the
+# above copyright notice and this restricted rights notice.
+# Use, copying, and/or disclosure of the file is strictly
+# prohibited unless otherwise provided in the license agreement.
+###################################################################
+import time
+
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from Clock import get_clock
+from Common import logger
+from Constants import FINE, FINER, PREHEAT_MAX_MINUTES, PREHEAT_STEP
+from Metrics import MetricsRegistry
+from ThermalModel import ThermalModel
+from ThermoSchedule import ThermoSchedule
+
+
+class PreheatPlan(NamedTuple):
+    """
+    When to start the boiler for the next rise of the thermostat setting: in 'start_in' seconds (0: now), to reach
+    'target' in 'change_in' seconds. 'expected' is the room temperature predicted at the change.
+    """
+    start_in: float
+    change_in: float
+    target: float
+    expected: float
+
+    def is_due(self) -> bool:
+        return self.start_in <= 0
+
+
+class PreheatOptimizer:
+    """
+    Finds the latest time to start the boiler, for the room to reach the next thermostat setting when it starts,
+    rather than heating from the start of the slot (too late) or heating ahead for a fixed time (too early).
+
+    The candidate start times, every PREHEAT_STEP seconds until the change, are evaluated together on the thermal
+    model: until the start the room cools (but no lower than the current setting, which is still maintained), then
+    heats up with the boiler on, both given in closed form. Only the changes within PREHEAT_MAX_MINUTES are planned,
+    hence the work per control tick is bounded by a fixed number of candidates.
+
+    Created: 17/10/2026
+    """
+
+    def __init__(self, model: ThermalModel):
+        """
+        Args:
+            model:  The fitted thermal model of the property.
+        """
+        self.CLASS = "PreheatOptimizer"
+        self.model = model
+        self.metrics = MetricsRegistry()
+
+    def plan(self, schedule: ThermoSchedule, room: float, time_now: datetime = None,
+             outdoor: float = None, wind: float = None) -> Optional[PreheatPlan]:
+        """
+        Plans the start of the boiler for the next rise of the thermostat setting.
+
+        Args:
+            schedule:   The compiled thermostat settings.
+            room:       The room temperature now.
+            time_now:   The time. Default: now.
+            outdoor:    The outside temperature. Default: the latest known to the model.
+            wind:       The wind speed. Default: the latest known to the model.
+        Returns:
+            PreheatPlan:    The plan, or None if there is nothing to preheat for, or the model is not fitted yet.
+        """
+        if not self.model.is_ready():
+            return None
+
+        time_now = time_now or get_clock().now()
+        next_change = schedule.next_change(time_now)
+        if next_change is None:
+            return None
+
+        minutes, target = next_change
+        current = schedule.get_temperature(time_now)
+        if target <= current or minutes > PREHEAT_MAX_MINUTES:
+            return None
+
+        time_start = time.perf_counter()
+        # The change happens at the start of its minute.
+        change_in = minutes * 60 - time_now.second
+        start_in = np.arange(0, change_in, PREHEAT_STEP, dtype=float)
+
+        expected = self.heat_up(room, current, start_in, change_in, outdoor, wind)
+        reached = np.nonzero(expected >= target)[0]
+
+        # If no start is early enough, the best we can do is to start now.
+        best = reached[-1] if len(reached) else 0
+        plan = PreheatPlan(float(start_in[best]), float(change_in), float(target), float(expected[best]))
+
+        self.metrics.histogram("preheat_plan_ms").observe((time.perf_counter() - time_start) * 1000)
+        logger(FINER, self.CLASS, "Preheat for {} in {} minutes: start in {} minutes, expected {:.2f}",
+               target, minutes, round(plan.start_in / 60), plan.expected)
+        if not len(reached):
+            logger(FINE, self.CLASS, "Too late to reach {} in {} minutes, expected {:.2f}.",
+                   target, minutes, plan.expected)
+        return plan
+
+    def heat_up(self, room: float, current: float, start_in: np.ndarray, change_in: float,
+                outdoor: float = None, wind: float = None) -> np.ndarray:
+        """
+        Predicts the room temperature at the change, for every candidate start time.
+
+        Args:
+            room:       The room temperature now.
+            current:    The thermostat setting maintained until the start.
+            start_in:   The candidate start times, in seconds from now.
+            change_in:  The time of the change, in seconds from now.
+        Returns:
+            ndarray:    The room temperature at the change, for each candidate.
+        """
+        outdoor, wind = self.model.get_outdoor(outdoor, wind)
+        rate, steady_off = self.model.steady_state(outdoor, wind, 0.0)
+        _, steady_on = self.model.steady_state(outdoor, wind, 1.0)
+
+        cooled = steady_off + (room - steady_off) * np.exp(-rate * start_in)
+        cooled = np.maximum(cooled, min(room, current))
+        return steady_on + (cooled - steady_on) * np.exp(-rate * (change_in - start_in))
@@ -0,0 +1,257 @@
+#!/usr/bin/python
+###################################################################
+# Heating system control with Raspberry Pi
+# -----------------------------------------------------------------
+# (C) Copyright VAYAK Ltd (info@vayak.com). 2026
+# All Rights Reserved
+#
+# THIS IS UNPUBLISHED PROPRIETARY SOURCE CODE
+# The copyright notice above does not evidence any
+# actual or intended publication of such source code.
+#
+# RESTRICTED RIGHTS:
+# This file may have been supplied under a license.
+# It may be used, disclosed, and/or copied only as permitted
+# under such license agreement. Any copy must contain the
+# above copyright notice and this restricted rights notice.
+# Use, copying, and/or disclosure of the file is strictly
+# prohibited unless otherwise provided in the license agreement.
+###################################################################
+import cProfile
+import os
+import sys
+import threading
+import time
+
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+from Common import logger
+from ConfigStore import ConfigStore, Singleton
+from Constants import WARNING, INFO, FINE, PROFILE_TARGETS, PROFILE_MODES
+
+
+class StackSampler(threading.Thread):
+    """
+    Samples the call stack of another thread at a fixed interval, counting the collapsed stacks
+    in the format used by the flame graph tools: "outer;inner;innermost".
+    """
+
+    def __init__(self, thread_id: int, interval: float, stacks: Counter, deadline: float):
+        super().__init__(name="StackSampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = stacks
+        self.deadline = deadline
+        self.sampling = threading.Event()
+        self.sampling.set()
+
+    def run(self):
+        while self.sampling.is_set() and time.monotonic() < self.deadline:
+            frame = sys._current_frames().get(self.thread_id)
+
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append("{} ({}:{})".format(code.co_name, os.path.basename(code.co_filename), frame.f_lineno))
+                frame = frame.f_back
+
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+            time.sleep(self.interval)
+
+    def stop(self):
+        self.sampling.clear()
+        self.join()
+
+
+class ProfileSession:
+    """
+    Profiling of a number of iterations of one target (the control loop or the websocket requests),
+    accumulated into a single output file.
+    """
+
+    def __init__(self, target: str, mode: str, iterations: int, time_limit: int, interval: float):
+        self.target = target
+        self.mode = mode
+        self.remaining = iterations
+        self.deadline = time.monotonic() + time_limit
+        self.interval = interval
+
+        self.profile = cProfile.Profile() if mode == "cprofile" else None
+        self.stacks = Counter()
+        self.sampler = None
+
+        # Set while an iteration is profiled, as the websocket requests may overlap on the event loop.
+        self.active = False
+
+    def start(self):
+        if self.profile is not None:
+            self.profile.enable()
+        else:
+            self.sampler = StackSampler(threading.get_ident(), self.interval, self.stacks, self.deadline)
+            self.sampler.start()
+
+    def stop(self):
+        if self.profile is not None:
+            self.profile.disable()
+        elif self.sampler is not None:
+            self.sampler.stop()
+            self.sampler = None
+        self.remaining -= 1
+
+    def is_done(self) -> bool:
+        return self.remaining <= 0 or time.monotonic() >= self.deadline
+
+    def write(self, output_dir: str) -> str:
+        """
+        Writes the profile to the output directory: pstats for cProfile, collapsed stacks for sampling.
+
+        Returns:
+            str:    The written file.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        file_name = "{}-{}".format(self.target, datetime.now().strftime("%Y%m%d-%H%M%S"))
+
+        if self.profile is not None:
+            file_path = os.path.join(output_dir, file_name + ".pstats")
+            self.profile.dump_stats(file_path)
+        else:
+            file_path = os.path.join(output_dir, file_name + ".collapsed")
+            with open(file_path, "w") as file_stacks:
+                for stack, count in self.stacks.most_common():
+                    file_stacks.write("{} {}\n".format(stack, count))
+
+        return file_path
+
+
+class Profiler(metaclass=Singleton):
+    """
+    Opt-in profiling of the control loop iterations (target "thermo") or the websocket requests (target "server").
+
+    Profiling is armed by the [profiling] target property at start-up, or by the admin request:
+        {"name": "profile", "action": "set", "value": "thermo|server"}
+    The next 'iterations' of the target are profiled with cProfile, or with the stack sampler, and the result is
+    written to 'output_dir' once done or after 'time_limit' seconds. When not armed, the callers only check
+    the 'armed' attribute, hence profiling costs nothing when it is off.
+
+    Created: 17/10/2026
+    """
+
+    def __init__(self):
+        self.CLASS = "Profiler"
+        self.config = ConfigStore()
+        self.lock = threading.Lock()
+
+        self.armed = False
+        self.sessions = {}
+        self.last_output = {}
+
+        self.arm_from_config(self.config.snapshot)
+        self.config.subscribe('profiling', "target", self.arm_from_config)
+
+    def arm_from_config(self, snapshot):
+        """
+        Starts profiling the target set by the [profiling] target property, if any.
+
+        Args:
+            snapshot:   ConfigSnapshot with the profiling settings.
+        """
+        if snapshot.profiling_target in PROFILE_TARGETS:
+            self.arm(snapshot.profiling_target)
+
+    def arm(self, target: str, mode: str = None, iterations: int = None, time_limit: int = None) -> dict:
+        """
+        Starts profiling the next iterations of the target.
+
+        Args:
+            target:         "thermo" or "server".
+            mode:           "cprofile" or "sampling". Default: [profiling] mode property.
+            iterations:     Number of iterations to profile. Default: [profiling] iterations property.
+            time_limit:     Maximum profiling time in seconds. Default: [profiling] time_limit property.
+        Returns:
+            dict:           The profiler status.
+        """
+        if target not in PROFILE_TARGETS:
+            raise ValueError("Unknown profiling target: {}".format(target))
+
+        snapshot = self.config.snapshot
+        mode = mode or snapshot.profiling_mode
+        iterations = iterations or snapshot.profiling_iterations
+        time_limit = time_limit or snapshot.profiling_time_limit
+        interval = snapshot.profiling_interval
+
+        if mode not in PROFILE_MODES:
+            raise ValueError("Unknown profiling mode: {}".format(mode))
+
+        with self.lock:
+            self.sessions[target] = ProfileSession(target, mode, iterations, time_limit, interval)
+            self.armed = True
+
+        logger(INFO, self.CLASS, "Profiling {} iterations of '{}' using {}, for up to {} seconds.",
+               iterations, target, mode, time_limit)
+        return self.get_status()
+
+    def get_status(self) -> dict:
+        return {
+            "armed": {target: {"mode": session.mode, "remaining": session.remaining}
+                      for target, session in list(self.sessions.items())},
+            "output": dict(self.last_output)
+        }
+
+    @contextmanager
+    def profile(self, target: str):
+        """
+        Profiles the enclosed block if profiling of the target is armed. Callers should only enter this context
+        when the 'armed' attribute is set, to keep the cost of the profiling hook at zero when it is off.
+
+        A block entered while another one of the same target is profiled, e.g. a websocket request arriving while
+        another one awaits, is not profiled, hence every iteration starts and stops the session once. The profile of
+        an awaiting block still includes the other tasks run by the event loop meanwhile.
+
+        Args:
+            target:     "thermo" or "server".
+        """
+        with self.lock:
+            session = self.sessions.get(target)
+            if session is None or session.active:
+                session = None
+            else:
+                session.active = True
+
+        if session is None:
+            yield
+            return
+
+        try:
+            session.start()
+        except ValueError as e:
+            # Only one cProfile can be active at a time in some Python versions.
+            logger(WARNING, self.CLASS, "Failed to start profiling '{}': {}", target, e)
+            session.active = False
+            yield
+            return
+
+        try:
+            yield
+        finally:
+            session.stop()
+            session.active = False
+            if session.is_done():
+                self.finish(target, session)
+
+    def finish(self, target: str, session: ProfileSession):
+        with self.lock:
+            if self.sessions.get(target) is not session:
+                return
+            del self.sessions[target]
+            self.armed = bool(self.sessions)
+
+        try:
+            file_path = session.write(self.config.snapshot.profiling_output_dir)
+            self.last_output[target] = file_path
+            logger(FINE, self.CLASS, "Profile of '{}' written to: {}", target, file_path)
+        except (IOError, OSError) as e:
+            logger(WARNING, self.CLASS, "Failed to write the profile of '{}': {}", target, e)
@@ -0,0 +1,195 @@
+#!/usr/bin/python
+###################################################################
+# Heating system control with Raspberry Pi
+# -----------------------------------------------------------------
+# (C) Copyright VAYAK Ltd (info@vayak.com). 2026
+# All Rights Reserved
+#
+# THIS IS UNPUBLISHED PROPRIETARY SOURCE CODE
+# The copyright notice above does not evidence any
+# actual or intended publication of such source code.
+#
+# RESTRICTED RIGHTS:
+# This file may have been supplied under a license.
+# It may be used, disclosed, and/or copied only as permitted
+# under such license agreement. Any copy must contain the
+# above copyright notice and this restricted rights notice.
+# Use, copying, and/or disclosure of the file is strictly
+# prohibited unless otherwise provided in the license agreement.
+###################################################################
+import queue
+import threading
+
+from concurrent.futures import Future
+from typing import NamedTuple
+
+from Common import logger
+from Constants import WARNING, FINE, FINER, FINEST, HEATING_STATE_OFF, HEATING_STATE_ON
+from Constants import GPIO_AUDIT_PERIOD, RELAY_COMMAND_TIMEOUT
+from GPIO import GPIO
+from Metrics import MetricsRegistry
+from RelayJournal import RelayJournal
+
+
+class RelayCommand(NamedTuple):
+    """
+    Request to switch the heating to 'state', on behalf of 'source'. The applied state is set on the 'future'.
+    """
+    state: bool
+    source: str
+    future: Future
+
+
+class RelayController(threading.Thread):
+    """
+    The only owner of the relays: the control loop and the websocket server queue their commands here, and the
+    controller applies them one at a time from its own thread. A burst of commands queued while the relays are
+    being switched is coalesced into the last one, and every caller gets the state which was actually applied.
+    Every switch of the heating is recorded in the journal. There is one controller per heating zone.
+
+    Created: 17/10/2026
+    """
+
+    def __init__(self, gpio: GPIO):
+        """
+        Create the controller. Call start() to start applying the commands.
+
+        Args:
+            gpio:   The interface to the relays of the zone.
+        """
+        super().__init__(name="RelayController-" + gpio.zone, daemon=True)
+        self.CLASS = "RelayController"
+        self.gpio = gpio
+        self.zone = gpio.zone
+        self.metrics = MetricsRegistry()
+        self.commands = queue.Queue()
+        self.running = True
+
+        self.journal = RelayJournal(self.gpio.getRelayState(), zone=self.zone)
+        self.metrics.add_collector("relay." + self.zone, self.journal.get_stats)
+
+    @staticmethod
+    def temperature_to_state(thermo_temperature: float, room_temperature: float) -> bool:
+        """
+        Returns the heating state for the room temperature: on, if the room is colder than the thermostat setting.
+
+        Args:
+            thermo_temperature: Temperature to which the thermostat is set to.
+            room_temperature:   Temperature measured by the temperature sensor in the room.
+        """
+        return HEATING_STATE_OFF if thermo_temperature <= round(room_temperature) else HEATING_STATE_ON
+
+    def request(self, state: bool, source: str = "") -> Future:
+        """
+        Queues a command to switch the heating on or off.
+        From a coroutine, the result can be awaited with asyncio.wrap_future().
+
+        Args:
+            state:  HEATING_STATE_ON | HEATING_STATE_OFF
+            source: Who asks for the change, for the logs.
+        Returns:
+            Future: Resolved with the heating state once applied.
+        """
+        future = Future()
+        self.commands.put(RelayCommand(bool(state), source, future))
+        return future
+
+    def set_relay_state(self, state: bool, source: str = "", timeout: float = RELAY_COMMAND_TIMEOUT) -> bool:
+        """
+        Switches the heating on or off, and waits for the command to be applied.
+
+        Args:
+            state:      HEATING_STATE_ON | HEATING_STATE_OFF
+            source:     Who asks for the change, for the logs.
+            timeout:    Time in seconds to wait. Default: RELAY_COMMAND_TIMEOUT. None: no limit.
+        Returns:
+            bool:       The heating state after the change.
+        Raises:
+            TimeoutError:   If the command was not applied in time (concurrent.futures.TimeoutError).
+        """
+        return self.request(state, source).result(timeout)
+
+    def temperature_to_relay_state(self, thermo_temperature: float, room_temperature: float, source: str = "") -> bool:
+        """
+        Switch the heating on/off depending on the room temperature, and waits for the command to be applied.
+
+        Args:
+            thermo_temperature: Temperature to which the thermostat is set to.
+            room_temperature:   Temperature measured by the temperature sensor in the room.
+            source:             Who asks for the change, for the logs.
+        Returns:
+            bool:               The heating state after the change.
+        Raises:
+            TimeoutError:       If the command was not applied within RELAY_COMMAND_TIMEOUT.
+        """
+        state = self.temperature_to_state(thermo_temperature, room_temperature)
+        logger(FINE, self.CLASS, "Setting 'Heating state {}' of zone '{}': set[{}], measured[{}]",
+               "ON" if state else "OFF", self.zone, thermo_temperature, round(room_temperature))
+        return self.set_relay_state(state, source)
+
+    def get_relay_state(self) -> bool:
+        """
+        Returns:
+            bool:   The heating state, as last applied.
+        """
+        return self.gpio.getRelayState()
+
+    def run(self):
+        logger(FINE, self.CLASS, "Starting relay control..")
+
+        while self.running:
+            # A failing relay board must not stop the controller, else no command would ever be applied again.
+            try:
+                self.run_once()
+            except Exception as e:
+                self.metrics.counter("relay_errors", self.zone).inc()
+                logger(WARNING, self.CLASS, "Relay control of zone '{}' failed: {}", self.zone, e)
+
+    def run_once(self):
+        """
+        Applies the queued commands, or audits the relays when no command came for GPIO_AUDIT_PERIOD seconds.
+        """
+        try:
+            commands = [self.commands.get(timeout=GPIO_AUDIT_PERIOD)]
+        except queue.Empty:
+            self.gpio.audit()
+            return
+
+        # Take whatever else was queued in the meantime: only the last command counts.
+        while True:
+            try:
+                commands.append(self.commands.get_nowait())
+            except queue.Empty:
+                break
+
+        # The stop() marker has no future.
+        commands = [command for command in commands if command.future is not None]
+        if commands:
+            self.apply(commands)
+
+    def apply(self, commands: list):
+        """
+        Applies the last of the commands, and resolves all of them with the applied state.
+        """
+        command = commands[-1]
+        if len(commands) > 1:
+            self.metrics.counter("relay_commands_coalesced", self.zone).inc(len(commands) - 1)
+            logger(FINER, self.CLASS, "Coalesced {} commands into: {}", len(commands), command)
+
+        try:
+            state = self.gpio.setRelayState(command.state)
+            self.journal.record(state, command.source)
+            logger(FINEST, self.CLASS, "Applied {} from '{}'.", state, command.source)
+            for pending in commands:
+                pending.future.set_result(state)
+        except Exception as e:
+            for pending in commands:
+                pending.future.set_exception(e)
+
+    def stop(self):
+        """
+        Stops the relay control, once the queued commands are applied.
+        """
+        logger(FINER, self.CLASS, "Stopping relay control..")
+        self.running = False
+        self.commands.put(RelayCommand(HEATING_STATE_OFF, "stop", None))
@@ -0,0 +1,195 @@
+#!/usr/bin/python
+###################################################################
+# Heating system control with Raspberry Pi
+# -----------------------------------------------------------------
+# (C) Copyright VAYAK Ltd (info@vayak.com). 2026
+# All Rights Reserved
+#
+# THIS IS UNPUBLISHED PROPRIETARY SOURCE CODE
+# The copyright notice above does not evidence any
+# actual or intended publication of such source code.
+#
+# RESTRICTED RIGHTS:
+# This file may have been supplied under a license.
+# It may be used, disclosed, and/or copied only as permitted
+# under such license agreement. Any copy must contain the
+# above copyright notice and this restricted rights notice.
+# Use, copying, and/or disclosure of the file is strictly
+# prohibited unless otherwise provided in the license agreement.
+###################################################################
+import threading
+
+from collections import deque
+from datetime import datetime
+from typing import List, NamedTuple
+
+from Clock import get_clock
+from Common import logger
+from Constants import FINE, FINER, RELAY_JOURNAL_SIZE, ZONE_DEFAULT
+
+
+class RelayTransition(NamedTuple):
+    """
+    One switch of the heating: at 'monotonic' time (get_clock().monotonic()) and wall clock 'timestamp',
+    the heating went to 'state', on behalf of 'source'.
+    """
+    monotonic: float
+    timestamp: datetime
+    state: bool
+    source: str
+
+
+class RelayJournal:
+    """
+    Ring buffer of the heating transitions, kept in memory for the exact accounting of the heating time,
+    the duty cycle and the number of cycles, and flushed in bulk to the relay_transition table.
+
+    Only the transitions are kept, hence the state at any time is the state of the last transition before it.
+    Once the buffer is full, the oldest transitions are dropped, and the statistics cover the remaining period.
+
+    Created: 17/10/2026
+    """
+
+    def __init__(self, state: bool, size: int = RELAY_JOURNAL_SIZE, zone: str = ZONE_DEFAULT):
+        """
+        Args:
+            state:  The heating state when the journal starts.
+            size:   Maximum number of transitions kept in memory.
+            zone:   The heating zone of the relays.
+        """
+        self.CLASS = "RelayJournal"
+        self.zone = zone
+        self.lock = threading.Lock()
+
+        # The state before the first transition in the buffer, and since when it is known.
+        self.time_start = get_clock().monotonic()
+        self.state_start = bool(state)
+
+        self.transitions = deque(maxlen=size)
+        self.unsaved: List[RelayTransition] = []
+        self.time_counted = self.time_start
+
+    def record(self, state: bool, source: str = "") -> RelayTransition:
+        """
+        Records a transition of the heating. Recording the current state again is ignored.
+
+        Args:
+            state:  The new heating state.
+            source: Who switched the heating, for the statistics.
+        Returns:
+            RelayTransition:    The recorded transition, or None if the state has not changed.
+        """
+        with self.lock:
+            if bool(state) == self.get_state():
+                return None
+
+            if len(self.transitions) == self.transitions.maxlen:
+                dropped = self.transitions[0]
+                self.time_start = dropped.monotonic
+                self.state_start = dropped.state
+
+            transition = RelayTransition(get_clock().monotonic(), get_clock().now(), bool(state), source)
+            self.transitions.append(transition)
+            self.unsaved.append(transition)
+            if len(self.unsaved) > self.transitions.maxlen:
+                del self.unsaved[0]
+
+        logger(FINE, self.CLASS, "Heating of zone '{}' switched {} by '{}'.", self.zone, "ON" if state else "OFF", source)
+        return transition
+
+    def get_state(self) -> bool:
+        return self.transitions[-1].state if self.transitions else self.state_start
+
+    def seconds_on(self, time_from: float, time_to: float = None) -> float:
+        """
+        Computes the exact time the heating was on within a period.
+
+        Args:
+            time_from:  Start of the period, in monotonic time. Limited to the oldest time known to the journal.
+            time_to:    End of the period, in monotonic time. Default: now.
+        Returns:
+            float:      Seconds for which the heating was on.
+        """
+        if time_to is None:
+            time_to = get_clock().monotonic()
+
+        with self.lock:
+            time_from = max(time_from, self.time_start)
+            state = self.state_start
+            time_switched = time_from
+            seconds = 0.0
+
+            for transition in self.transitions:
+                if transition.monotonic >= time_to:
+                    break
+                if transition.monotonic > time_from:
+                    if state:
+                        seconds += transition.monotonic - time_switched
+                    time_switched = transition.monotonic
+                state = transition.state
+
+            if state and time_to > time_switched:
+                seconds += time_to - time_switched
+
+        return seconds
+
+    def take_seconds_on(self) -> int:
+        """
+        Returns the seconds for which the heating was on since the last call, for the time_state_on of the
+        temperature records.
+        """
+        time_now = get_clock().monotonic()
+        seconds = self.seconds_on(self.time_counted, time_now)
+        self.time_counted = time_now
+        return int(round(seconds))
+
+    def get_stats(self, window: float = 3600) -> dict:
+        """
+        Returns the duty cycle (the share of the time the heating was on) and the number of heating cycles per hour,
+        over the last 'window' seconds, or over the period known to the journal if shorter.
+
+        Args:
+            window: The period in seconds.
+        Returns:
+            dict:   The statistics.
+        """
+        time_now = get_clock().monotonic()
+        time_from = max(time_now - window, self.time_start)
+        period = time_now - time_from
+
+        with self.lock:
+            cycles = sum(1 for transition in self.transitions if transition.state and transition.monotonic > time_from)
+
+        seconds_on = self.seconds_on(time_from, time_now)
+        return {
+            "period": round(period),
+            "seconds_on": round(seconds_on),
+            "duty_cycle": round(seconds_on / period, 4) if period > 0 else 0.0,
+            "cycles_per_hour": round(cycles * 3600 / period, 2) if period > 0 else 0.0,
+            "state": self.get_state()
+        }
+
+    def flush(self, dao) -> int:
+        """
+        Writes the transitions recorded since the last flush to the relay_transition table, in one statement.
+        If the write fails, they are kept for the next flush.
+
+        Args:
+            dao:    Database Access Object.
+        Returns:
+            int:    Number of written transitions.
+        """
+        with self.lock:
+            unsaved, self.unsaved = self.unsaved, []
+
+        if not unsaved:
+            return 0
+
+        if not dao.save_relay_transitions([(transition.timestamp, transition.state, transition.source, self.zone)
+                                           for transition in unsaved]):
+            with self.lock:
+                self.unsaved = (unsaved + self.unsaved)[-self.transitions.maxlen:]
+            return 0
+
+        logger(FINER, self.CLASS, "Saved {} relay transitions.", len(unsaved))
+        return len(unsaved)
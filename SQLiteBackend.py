@@ -0,0 +1,127 @@
+#!/usr/bin/python
+###################################################################
+# Heating system control with Raspberry Pi
+# -----------------------------------------------------------------
+# (C) Copyright VAYAK Ltd (info@vayak.com). 2026
+# All Rights Reserved
+#
+# THIS IS UNPUBLISHED PROPRIETARY SOURCE CODE
+# The copyright notice above does not evidence any
+# actual or intended publication of such source code.
+#
+# RESTRICTED RIGHTS:
+# This file may have been supplied under a license.
+# It may be used, disclosed, and/or copied only as permitted
+# under such license agreement. Any copy must contain the
+# above copyright notice and this restricted rights notice.
+# Use, copying, and/or disclosure of the file is strictly
+# prohibited unless otherwise provided in the license agreement.
+###################################################################
+import os
+import re
+import sqlite3
+import threading
+
+from datetime import datetime
+from typing import List, Sequence, Tuple
+
+from Common import logger
+from Constants import CRITICAL, FINE, SQLITE_SCHEMA_FILE, SQLITE_BUSY_TIMEOUT
+from DatabaseBackend import DatabaseBackend
+
+# The %s placeholders (and the %% literals) of the DB-API 'format' paramstyle, translated to the 'qmark' style.
+FORMAT_PARAMETER = re.compile(r"%([s%])")
+
+
+def adapt_datetime(value: datetime) -> str:
+    return value.isoformat(" ")
+
+
+def convert_datetime(value: bytes) -> datetime:
+    return datetime.fromisoformat(value.decode())
+
+
+# The datetime values are stored as text, and read back as datetime from the TIMESTAMP and DATETIME columns,
+# as the MySQL client does.
+sqlite3.register_adapter(datetime, adapt_datetime)
+sqlite3.register_converter("TIMESTAMP", convert_datetime)
+sqlite3.register_converter("DATETIME", convert_datetime)
+
+
+def dict_factory(cursor: sqlite3.Cursor, row: tuple) -> dict:
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+
+class SQLiteBackend(DatabaseBackend):
+    """
+    Embedded storage in a local SQLite file, for a device where running a MySQL server costs too much memory and
+    start-up time. The database is opened in WAL mode, hence the readers (the websocket server) and the writer
+    (the write-behind journal) do not block each other. Every thread gets its own connection.
+
+    The schema is created by create_database_sqlite.sql, the SQLite counterpart of create_database.sql.
+
+    Created: 17/10/2026
+    """
+
+    def __init__(self, file: str):
+        """
+        Args:
+            file:   The database file. Created with the schema if it does not exist.
+        """
+        self.CLASS = "SQLiteBackend"
+        self.file = file
+        self.local = threading.local()
+        logger(FINE, self.CLASS, "Opening database: file[{}].", file)
+
+    def connection(self) -> sqlite3.Connection:
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            # No implicit transactions: every statement commits, as the MySQL connections do (autocommit).
+            connection = sqlite3.connect(self.file, timeout=SQLITE_BUSY_TIMEOUT, isolation_level=None,
+                                         detect_types=sqlite3.PARSE_DECLTYPES)
+            connection.row_factory = dict_factory
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.execute("PRAGMA synchronous = NORMAL")
+            self.local.connection = connection
+        return connection
+
+    @staticmethod
+    def translate(query: str) -> str:
+        return FORMAT_PARAMETER.sub(lambda match: "?" if match.group(1) == "s" else "%", query)
+
+    def migrate(self) -> int:
+        schema = os.path.join(os.path.dirname(os.path.abspath(__file__)), SQLITE_SCHEMA_FILE)
+        try:
+            with open(schema, "r") as script:
+                self.connection().executescript(script.read())
+            return self.execute("SELECT MAX(version) AS version FROM schema_version")[0]["version"]
+        except (IOError, OSError, sqlite3.Error) as e:
+            logger(CRITICAL, self.CLASS, "Failed to create the database schema: {}", e)
+            return -1
+
+    def execute(self, query: str, params: Tuple = None) -> List[dict]:
+        cursor = self.connection().execute(self.translate(query), params or ())
+        try:
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+
+    def execute_many(self, query: str, params: List[Tuple]) -> int:
+        # A single transaction, for a single write of the database file.
+        connection = self.connection()
+        connection.execute("BEGIN")
+        try:
+            cursor = connection.executemany(self.translate(query), params)
+            connection.execute("COMMIT")
+            return cursor.rowcount
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+    def hour_of(self, column: str) -> str:
+        return "strftime('%%Y-%%m-%%d %%H:00:00', {})".format(column)
+
+    def upsert(self, table: str, columns: Sequence[str], keys: Sequence[str]) -> str:
+        return "INSERT INTO {} ({}) VALUES ({}) ON CONFLICT ({}) DO UPDATE SET {}".format(
+            table, ", ".join(columns), ", ".join(["%s"] * len(columns)), ", ".join(keys),
+            ", ".join("{0} = excluded.{0}".format(column) for column in columns if column not in keys))
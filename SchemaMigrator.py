@@ -0,0 +1,162 @@
+#!/usr/bin/python
+###################################################################
+# Heating system control with Raspberry Pi
+# -----------------------------------------------------------------
+# (C) Copyright VAYAK Ltd (info@vayak.com). 2026
+# All Rights Reserved
+#
+# THIS IS UNPUBLISHED PROPRIETARY SOURCE CODE
+# The copyright notice above does not evidence any
+# actual or intended publication of such source code.
+#
+# RESTRICTED RIGHTS:
+# This file may have been supplied under a license.
+# It may be used, disclosed, and/or copied only as permitted
+# under such license agreement. Any copy must contain the
+# above copyright notice and this restricted rights notice.
+# Use, copying, and/or disclosure of the file is strictly
+# prohibited unless otherwise provided in the license agreement.
+###################################################################
+import os
+import re
+import threading
+
+from typing import List, Tuple
+
+import pymysql
+
+from Common import logger
+from Constants import CRITICAL, WARNING, INFO, FINE, FINER, MIGRATIONS_DIRECTORY, MIGRATIONS_LOCK_TIMEOUT
+
+# The migration scripts: NNN_description.sql
+MIGRATION_FILE = re.compile(r"^(\d+)_(\w+)\.sql$")
+
+# MySQL errors telling that the change is already there: a table, column or key which exists, or a column or key
+# which was already dropped. These come from a database created with create_database.sql before it recorded its
+# schema version, or from a migration applied in part, and are skipped.
+ALREADY_APPLIED_ERRORS = {
+    1050,   # Table already exists
+    1060,   # Duplicate column name
+    1061,   # Duplicate key name
+    1068,   # Multiple primary key defined
+    1091,   # Can't DROP column or key, check that it exists
+}
+
+
+class SchemaMigrator:
+    """
+    Brings the database schema up to date, by applying the versioned scripts of the 'migrations' directory which
+    were not applied yet. The applied versions are recorded in the schema_version table. A database created with
+    create_database.sql records the latest version straight away, hence it has nothing to apply.
+
+    The migrations run once per process, when the first DatabaseDAO starts, and under a MySQL named lock, hence
+    two processes starting together (e.g. the server and a backtest) do not apply the same script twice.
+
+    Created: 17/10/2026
+    """
+
+    lock = threading.Lock()
+    version = None
+
+    def __init__(self, db_pool, directory: str = None):
+        """
+        Args:
+            db_pool:    The database connection pool of the DatabaseDAO.
+            directory:  The directory of the migration scripts. Default: 'migrations' next to this module.
+        """
+        self.CLASS = "SchemaMigrator"
+        self.db_pool = db_pool
+        self.directory = directory or os.path.join(os.path.dirname(os.path.abspath(__file__)), MIGRATIONS_DIRECTORY)
+
+    def get_migrations(self) -> List[Tuple[int, str, str]]:
+        """
+        Returns:
+            list:   Tuples of (version, name, path) of the migration scripts, ordered by version.
+        """
+        if not os.path.isdir(self.directory):
+            logger(WARNING, self.CLASS, "No migrations directory: {}", self.directory)
+            return []
+
+        migrations = []
+        for file_name in os.listdir(self.directory):
+            match = MIGRATION_FILE.match(file_name)
+            if match:
+                migrations.append((int(match.group(1)), match.group(2), os.path.join(self.directory, file_name)))
+        return sorted(migrations)
+
+    @staticmethod
+    def parse_statements(path: str) -> List[str]:
+        """
+        Splits the script into its statements, without the comment lines (starting with '#' or '--').
+        """
+        with open(path, "r") as script:
+            lines = [line for line in script if not line.lstrip().startswith(("#", "--"))]
+        return [statement.strip() for statement in "".join(lines).split(";") if statement.strip()]
+
+    def migrate(self) -> int:
+        """
+        Applies the migrations which were not applied yet, in the order of their versions. A migration failing
+        stops the rest, which are tried again at the next start.
+
+        Returns:
+            int:    The schema version after the migrations, or -1 if they could not run.
+        """
+        with SchemaMigrator.lock:
+            if SchemaMigrator.version is not None:
+                return SchemaMigrator.version
+
+            connection = None
+            cursor = None
+            try:
+                connection = self.db_pool.connection()
+                cursor = connection.cursor()
+                cursor.execute("SELECT GET_LOCK('boilerry.schema', %s)", (MIGRATIONS_LOCK_TIMEOUT,))
+                if not cursor.fetchone()[0]:
+                    logger(WARNING, self.CLASS, "Schema is being migrated by another process, not migrating.")
+                    return -1
+
+                try:
+                    version = self.apply(cursor)
+                finally:
+                    cursor.execute("SELECT RELEASE_LOCK('boilerry.schema')")
+                SchemaMigrator.version = version
+                return version
+            except pymysql.MySQLError as e:
+                logger(CRITICAL, self.CLASS, "Schema migration failed: {}", e)
+                return -1
+            finally:
+                if cursor is not None:
+                    cursor.close()
+                if connection is not None:
+                    connection.close()
+
+    def apply(self, cursor) -> int:
+        cursor.execute("CREATE TABLE IF NOT EXISTS schema_version("
+                       "version INT NOT NULL PRIMARY KEY, "
+                       "name VARCHAR(100) NOT NULL, "
+                       "applied TIMESTAMP NOT NULL DEFAULT NOW())")
+        cursor.execute("SELECT version FROM schema_version")
+        applied = {row[0] for row in cursor.fetchall()}
+        version = max(applied, default=0)
+
+        for migration_version, name, path in self.get_migrations():
+            if migration_version in applied:
+                continue
+
+            logger(INFO, self.CLASS, "Applying schema migration {}: {}", migration_version, name)
+            for statement in self.parse_statements(path):
+                try:
+                    cursor.execute(statement)
+                except pymysql.MySQLError as e:
+                    if e.args and e.args[0] in ALREADY_APPLIED_ERRORS:
+                        logger(FINER, self.CLASS, "Already applied, skipping: {}", e)
+                        continue
+                    logger(CRITICAL, self.CLASS, "Schema migration {} failed, not applying the rest: {}",
+                           migration_version, e)
+                    return version
+
+            cursor.execute("INSERT INTO schema_version (version, name) VALUES (%s, %s)", (migration_version, name))
+            version = migration_version
+
+        logger(FINE, self.CLASS, "Database schema is at version {}.", version)
+        return version
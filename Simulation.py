@@ -0,0 +1,354 @@
+#!/usr/bin/python
+###################################################################
+# Heating system control with Raspberry Pi
+# -----------------------------------------------------------------
+# (C) Copyright VAYAK Ltd (info@vayak.com). 2026
+# All Rights Reserved
+#
+# THIS IS UNPUBLISHED PROPRIETARY SOURCE CODE
+# The copyright notice above does not evidence any
+# actual or intended publication of such source code.
+#
+# RESTRICTED RIGHTS:
+# This file may have been supplied under a license.
+# It may be used, disclosed, and/or copied only as permitted
+# under such license agreement. Any copy must contain the
+# above copyright notice and this restricted rights notice.
+# Use, copying, and/or disclosure of the file is strictly
+# prohibited unless otherwise provided in the license agreement.
+###################################################################
+"""
+Runs the heating control off the device, in simulated time: a virtual clock, a simulated room behind every zone
+(read by a simulated DS18B20 and heated through a simulated relay board) and an in-memory database.
+A simulated week of control takes seconds, for regression and performance testing:
+
+    BOILERRY_HOME=/opt/boilerry-server python3 Simulation.py --days 7 --mode 2
+"""
+import argparse
+import dataclasses
+import math
+import random
+import threading
+import time
+
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from Clock import VirtualClock, get_clock, set_clock
+from Common import logger
+from ConfigStore import ConfigStore, SensorConfig, ZoneConfig
+from Constants import INFO, SENSOR_FAILURE_TEMPERATURE, THERMO_DEFAULT_TEMPERATURE
+from EventScheduler import ScheduledEvent
+from TemperatureSampler import TemperatureSampler
+
+# The thermostat settings of every simulated zone: (day_of_week, temperature, timeStart, timeEnd)
+SIMULATION_THERMOSTAT = (
+    ("all", THERMO_DEFAULT_TEMPERATURE, "00:00", "00:00"),
+    ("all", 21.0, "06:30", "08:30"),
+    ("all", 20.0, "17:00", "22:30"),
+)
+
+
+class SimulatedWeather:
+    """
+    The outside temperature following a daily cycle, the warmest at 15:00, with a constant wind.
+    """
+
+    def __init__(self, mean: float = 5.0, amplitude: float = 4.0, wind: float = 10.0):
+        self.mean = mean
+        self.amplitude = amplitude
+        self.wind = wind
+
+    def temperature(self, time_now: datetime) -> float:
+        hours = time_now.hour + time_now.minute / 60 + time_now.second / 3600
+        return self.mean + self.amplitude * math.cos(2 * math.pi * (hours - 15) / 24)
+
+
+class SimulatedRoom:
+    """
+    A room as a lumped RC thermal model, the same as the ThermalModel fits:
+
+        dT/dt = -(loss + wind_loss * wind) * (T - T_out) + gain * heating + internal
+
+    The temperature is advanced lazily, whenever it is read or the heating switches, hence it is exact for the
+    heating, and follows the outside temperature in steps of at most a minute.
+    """
+
+    def __init__(self, weather: SimulatedWeather, temperature: float = 18.0, loss_per_hour: float = 0.1,
+                 wind_loss_per_hour: float = 0.002, gain_per_hour: float = 3.0, internal_per_hour: float = 0.2,
+                 thermo_temperature: Callable[[datetime], float] = None):
+        """
+        Args:
+            weather:            The outside conditions.
+            temperature:        The room temperature at the start.
+            thermo_temperature: The thermostat setting at a time, to account for the comfort.
+        """
+        self.weather = weather
+        self.temperature = temperature
+        self.loss = loss_per_hour / 3600
+        self.wind_loss = wind_loss_per_hour / 3600
+        self.gain = gain_per_hour / 3600
+        self.internal = internal_per_hour / 3600
+        self.thermo_temperature = thermo_temperature
+
+        self.lock = threading.Lock()
+        self.heating = False
+        self.time_updated = get_clock().now()
+        self.seconds_heating = 0.0
+        # Degree-hours below the thermostat setting, and the lowest and highest temperature.
+        self.discomfort = 0.0
+        self.minimum = self.maximum = temperature
+
+    def advance(self, time_now: datetime = None):
+        time_now = time_now or get_clock().now()
+        with self.lock:
+            while self.time_updated < time_now:
+                step = min((time_now - self.time_updated).total_seconds(), 60.0)
+                time_middle = self.time_updated + timedelta(seconds=step / 2)
+
+                outdoor = self.weather.temperature(time_middle)
+                rate = self.loss + self.wind_loss * self.weather.wind
+                steady = outdoor + (self.gain * self.heating + self.internal) / rate
+                self.temperature = steady + (self.temperature - steady) * math.exp(-rate * step)
+
+                if self.heating:
+                    self.seconds_heating += step
+                if self.thermo_temperature is not None:
+                    self.discomfort += max(0.0, self.thermo_temperature(time_middle) - self.temperature) * step / 3600
+                self.minimum = min(self.minimum, self.temperature)
+                self.maximum = max(self.maximum, self.temperature)
+                self.time_updated += timedelta(seconds=step)
+
+    def set_heating(self, heating: bool):
+        self.advance()
+        with self.lock:
+            self.heating = heating
+
+    def read(self) -> float:
+        self.advance()
+        return self.temperature
+
+
+class SimulatedBoard:
+    """
+    A relay board with the interface of RPi.GPIO, for the GPIO class. The heating of a zone is on unless its
+    relay_1 is LOW and relay_2 is HIGH, as GPIO.readRelayState() reads it.
+    """
+    BOARD = 10
+    OUT = 0
+    IN = 1
+    LOW = 0
+    HIGH = 1
+
+    def __init__(self):
+        self.pins: Dict[int, int] = {}
+        self.rooms: Dict[Tuple[int, int], SimulatedRoom] = {}
+
+    def connect(self, zone_config: ZoneConfig, room: SimulatedRoom):
+        self.rooms[(zone_config.relay_1, zone_config.relay_2)] = room
+
+    def setmode(self, mode):
+        pass
+
+    def setwarnings(self, warnings):
+        pass
+
+    def setup(self, pin: int, direction: int):
+        self.pins.setdefault(pin, self.LOW)
+
+    def input(self, pin: int) -> int:
+        return self.pins.get(pin, self.LOW)
+
+    def output(self, pin: int, value: int):
+        self.pins[pin] = value
+        for (relay_1, relay_2), room in self.rooms.items():
+            if pin in (relay_1, relay_2):
+                room.set_heating(not (self.input(relay_1) == self.LOW and self.input(relay_2) == self.HIGH))
+
+
+class SimulatedSensor:
+    """
+    The DS18B20 sensors, with the interface used by the TemperatureSampler: every sensor reads the room of its
+    zone, with the noise and the 1/16 degree resolution of the DS18B20.
+    """
+
+    def __init__(self, noise: float = 0.05, seed: int = 1):
+        self.rooms: Dict[str, SimulatedRoom] = {}
+        self.noise = noise
+        self.random = random.Random(seed)
+
+    def connect(self, zone_config: ZoneConfig, room: SimulatedRoom):
+        for sensor in zone_config.sensors:
+            self.rooms[sensor] = room
+
+    def getTemps(self, sensors: List[SensorConfig], temp_units: str = "C") -> Dict[str, float]:
+        temperatures = {}
+        for sensor in sensors:
+            room = self.rooms.get(sensor.name)
+            if room is None:
+                temperatures[sensor.name] = SENSOR_FAILURE_TEMPERATURE
+                continue
+            temperature = round((room.read() + self.random.gauss(0, self.noise)) * 16) / 16
+            temperatures[sensor.name] = temperature * 9.0 / 5.0 + 32.0 if temp_units == "F" else temperature
+        return temperatures
+
+
+class SimulatedDAO:
+    """
+    In-memory stand-in for the DatabaseDAO, with the methods used by the control. The temperature records get the
+    outside weather straight away, as the join with the weather_hourly table gives it on the device.
+    """
+
+    def __init__(self, weather: SimulatedWeather, thermostat: Sequence[Tuple] = SIMULATION_THERMOSTAT):
+        self.weather = weather
+        self.thermostat = list(thermostat)
+        self.thermostat_version = 1
+        self.temperatures: List[dict] = []
+        self.relay_transitions: List[Tuple] = []
+
+    def get_thermostat(self, zone: str = None):
+        return list(self.thermostat)
+
+    def get_thermostat_manual(self, zone: str = None) -> int:
+        return int(next((row[1] for row in self.thermostat if (row[2], row[3]) == ("00:00", "00:00")),
+                        THERMO_DEFAULT_TEMPERATURE))
+
+    def save_temperature(self, seconds_heating_on: int, unit: str, sensor_1: float = None, sensor_2: float = None,
+                         sensor_3: float = None, zone: str = None):
+        time_now = get_clock().now()
+        self.temperatures.append({
+            "datetime": time_now, "zone": zone, "time_state_on": seconds_heating_on, "unit_temperature": unit,
+            "temperature": self.weather.temperature(time_now), "wspd": self.weather.wind,
+            "sensor_1": sensor_1, "sensor_2": sensor_2, "sensor_3": sensor_3
+        })
+
+    def get_temperature_rows(self, since: datetime, zone: str = None, sensors: Sequence[str] = ("sensor_1",)):
+        rows = []
+        for record in self.temperatures:
+            if record["datetime"] <= since or record["zone"] != zone:
+                continue
+            readings = [record.get(sensor) for sensor in sensors if record.get(sensor) is not None]
+            if readings:
+                rows.append((record["datetime"], record["time_state_on"], sum(readings) / len(readings),
+                             record["temperature"], record["wspd"]))
+        return rows
+
+    def save_relay_transitions(self, transitions: List[Tuple]) -> bool:
+        self.relay_transitions.extend(transitions)
+        return True
+
+
+class Simulation:
+    """
+    Runs the ThermoControl with its zones on simulated hardware and a virtual clock. The control events are run by
+    the EventScheduler as usual, only the clock jumps to every next deadline instead of sleeping until it.
+
+    Created: 17/10/2026
+    """
+
+    def __init__(self, thermo_switch: Optional[int] = None, start: datetime = None, weather: SimulatedWeather = None,
+                 room_temperature: float = 18.0):
+        """
+        Args:
+            thermo_switch:      The thermostat switch to simulate. Default: [boilerry.server] thermo_switch.
+            start:              The simulated wall clock time at the start. Default: now.
+            weather:            The outside conditions. Default: SimulatedWeather().
+            room_temperature:   The temperature of the rooms at the start.
+        """
+        self.CLASS = "Simulation"
+        self.clock = VirtualClock(start)
+        set_clock(self.clock)
+
+        self.config = ConfigStore()
+        if thermo_switch is not None:
+            self.config.snapshot = dataclasses.replace(self.config.snapshot, thermo_switch=thermo_switch)
+
+        self.weather = weather or SimulatedWeather()
+        self.dao = SimulatedDAO(self.weather)
+        self.board = SimulatedBoard()
+        self.sensor = SimulatedSensor()
+        self.sampler = TemperatureSampler(self.sensor)
+
+        # Imported here, as the control loads the whole application.
+        from ThermoControl import ThermoControl
+        from Zone import Zone
+
+        self.rooms: Dict[str, SimulatedRoom] = {}
+        self.zones = {}
+        for name, zone_config in self.config.snapshot.zones.items():
+            room = SimulatedRoom(self.weather, room_temperature)
+            self.board.connect(zone_config, room)
+            self.sensor.connect(zone_config, room)
+            self.rooms[name] = room
+            self.zones[name] = zone = Zone(zone_config, self.dao, self.sampler, self.board)
+            room.thermo_temperature = zone.get_thermo_schedule().get_temperature
+
+        # Every sensor of the zones is simulated, whether it has an id in [temperature.sensor] or not.
+        self.sensors = [self.config.snapshot.sensors.get(sensor) or SensorConfig(sensor, "simulated", 0)
+                        for sensor in self.sensor.rooms]
+
+        # The sensors are sampled by an event of the control, rather than by the sampler thread.
+        self.sample()
+        self.control = ThermoControl(self.dao, self.zones, self.sampler)
+        self.control.events.cancel("weather")
+        self.control.events.cancel("metrics")
+        self.control.events.every("sample", min(sensor.period for sensor in self.sensors), self.sample)
+
+    def sample(self):
+        self.sampler.sample(self.sensors)
+
+    def run(self, days: float) -> dict:
+        """
+        Runs the control for the given simulated time.
+
+        Returns:
+            dict:   The results per zone: the heating time, the number of heating cycles, the discomfort
+                    (degree-hours below the thermostat setting) and the range of the room temperature.
+        """
+        seconds = days * 86400
+        self.control.events.add(ScheduledEvent("simulation_end", self.control.stop), delay=seconds)
+
+        time_start = time.perf_counter()
+        self.control.run()
+        time_real = time.perf_counter() - time_start
+
+        for zone in self.zones.values():
+            zone.stop()
+            zone.relay.journal.flush(self.dao)
+        for room in self.rooms.values():
+            room.advance()
+
+        results = {
+            "simulated_days": days,
+            "real_seconds": round(time_real, 3),
+            "speedup": round(seconds / time_real) if time_real > 0 else None,
+            "zones": {}
+        }
+        for name, room in self.rooms.items():
+            cycles = sum(1 for transition in self.dao.relay_transitions if transition[3] == name and transition[1])
+            results["zones"][name] = {
+                "heating_hours": round(room.seconds_heating / 3600, 2),
+                "heating_cycles": cycles,
+                "discomfort_degree_hours": round(room.discomfort, 2),
+                "temperature_min": round(room.minimum, 2),
+                "temperature_max": round(room.maximum, 2),
+                "thermal_model": self.zones[name].thermal_model.get_stats()
+            }
+
+        logger(INFO, self.CLASS, "Simulated {} days in {:.2f} seconds: {}", days, time_real, results)
+        return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Runs the heating control in simulated time.")
+    parser.add_argument("--days", type=float, default=7, help="Simulated days. Default: 7")
+    parser.add_argument("--mode", type=int, choices=(0, 1, 2, 3), default=None,
+                        help="Thermostat switch. Default: [boilerry.server] thermo_switch")
+    parser.add_argument("--start", type=lambda text: datetime.strptime(text, "%Y-%m-%d"), default=None,
+                        help="Simulated start date, YYYY-MM-DD. Default: today")
+    parser.add_argument("--outdoor", type=float, default=5.0, help="Mean outside temperature. Default: 5")
+    arguments = parser.parse_args()
+
+    simulation = Simulation(arguments.mode, arguments.start, SimulatedWeather(mean=arguments.outdoor))
+    for zone_name, zone_results in simulation.run(arguments.days)["zones"].items():
+        print(zone_name, zone_results)
@@ -0,0 +1,226 @@
+#!/usr/bin/python
+###################################################################
+# Heating system control with Raspberry Pi
+# -----------------------------------------------------------------
+# (C) Copyright VAYAK Ltd (info@vayak.com). 2026
+# All Rights Reserved
+#
+# THIS IS UNPUBLISHED PROPRIETARY SOURCE CODE
+# The copyright notice above does not evidence any
+# actual or intended publication of such source code.
+#
+# RESTRICTED RIGHTS:
+# This file may have been supplied under a license.
+# It may be used, disclosed, and/or copied only as permitted
+# under such license agreement. Any copy must contain the
+# above copyright notice and this restricted rights notice.
+# Use, copying, and/or disclosure of the file is strictly
+# prohibited unless otherwise provided in the license agreement.
+###################################################################
+import threading
+
+from typing import Dict, List, NamedTuple, Optional
+
+from Clock import get_clock
+from Common import logger
+from ConfigStore import ConfigStore, SensorConfig
+from Constants import WARNING, FINE, FINER, FINEST
+from Constants import SENSOR_FAILURE_TEMPERATURE, SENSOR_READING_OK, SENSOR_READING_STALE
+from Constants import SENSOR_READING_FAILED, SENSOR_READING_NONE
+from DS18B20 import DS18B20
+from Metrics import MetricsRegistry
+
+
+class SensorReading(NamedTuple):
+    """
+    The latest reading of a temperature sensor, as kept by the TemperatureSampler.
+
+        sensor:     The sensor name, e.g. "sensor_1".
+        value:      The last successfully measured temperature in Celsius, or None if there is none yet.
+        timestamp:  Monotonic time (Clock.get_clock().monotonic()) of the last successful measurement.
+        status:     SENSOR_READING_OK, or why the value should not be trusted:
+                    SENSOR_READING_STALE  - the value is older than the requested maximum age,
+                    SENSOR_READING_FAILED - the last attempt to read the sensor failed,
+                    SENSOR_READING_NONE   - the sensor has not been read successfully yet.
+        failures:   Number of consecutive failed reads.
+    """
+    sensor: str
+    value: Optional[float]
+    timestamp: float
+    status: str
+    failures: int = 0
+
+    def age(self) -> float:
+        """
+        Returns the age of the value in seconds.
+        """
+        return get_clock().monotonic() - self.timestamp
+
+    def is_valid(self) -> bool:
+        return self.status == SENSOR_READING_OK
+
+
+class TemperatureSampler(threading.Thread):
+    """
+    Reads the configured temperature sensors in the background, each on its own schedule ([temperature.sensor]
+    sensor_<N>_period), and keeps the latest reading of each of them.
+
+    Reading a DS18B20 takes about 750 ms and may retry for seconds on a bad CRC. With the sampler, the control loop
+    and the websocket requests get the latest reading immediately, instead of waiting on the 1-Wire bus.
+
+    Created: 17/10/2026
+    """
+
+    def __init__(self, sensor: DS18B20):
+        """
+        Create the sampler. Call start() to start sampling.
+
+        Args:
+            sensor: The interface to the DS18B20 temperature sensors.
+        """
+        super().__init__(name="TemperatureSampler", daemon=True)
+        self.CLASS = "TemperatureSampler"
+        self.config = ConfigStore()
+        self.metrics = MetricsRegistry()
+        self.thermo_sensor = sensor
+
+        self.lock = threading.Lock()
+        self.readings: Dict[str, SensorReading] = {}
+        self.next_sample: Dict[str, float] = {}
+        self.sampled = threading.Condition(self.lock)
+
+        self.running = True
+        self.wakeup = threading.Event()
+        self.config.subscribe('temperature.sensor', None, self.on_config_change)
+
+    def on_config_change(self, snapshot):
+        """
+        Called by the config store when the sensor settings change: re-plan the sampling straight away.
+        """
+        with self.lock:
+            self.next_sample.clear()
+        self.wakeup.set()
+
+    def run(self):
+        logger(FINE, self.CLASS, "Starting temperature sampling..")
+
+        while self.running:
+            snapshot = self.config.snapshot
+            time_now = get_clock().monotonic()
+
+            # The sensors due at the same time are read in parallel, at the cost of a single conversion.
+            due = [sensor_config for sensor_config in snapshot.sensors.values()
+                   if self.next_sample.get(sensor_config.name, 0.0) <= time_now]
+            if due:
+                self.sample(due)
+                for sensor_config in due:
+                    self.next_sample[sensor_config.name] = get_clock().monotonic() + sensor_config.period
+
+            if not snapshot.sensors:
+                self.wakeup.wait()
+            else:
+                time_next = min(self.next_sample.get(name, 0.0) for name in snapshot.sensors)
+                self.wakeup.wait(max(0.0, time_next - get_clock().monotonic()))
+            self.wakeup.clear()
+
+    def sample(self, sensors: List[SensorConfig]) -> List[SensorReading]:
+        """
+        Read the sensors in parallel and store the results as their latest readings.
+
+        Args:
+            sensors:    Settings of the sensors to read.
+        Returns:
+            list:       The new latest readings.
+        """
+        temperatures = self.thermo_sensor.getTemps(sensors, "C")
+        return [self.store(name, temperature) for name, temperature in temperatures.items()]
+
+    def store(self, sensor: str, temperature: float) -> SensorReading:
+        """
+        Store a measured temperature (in Celsius) as the latest reading of the sensor.
+        The failure value SENSOR_FAILURE_TEMPERATURE keeps the previous value, marking the reading as failed.
+
+        Args:
+            sensor:         The sensor name, e.g. "sensor_1".
+            temperature:    The measured temperature in Celsius.
+        Returns:
+            SensorReading:  The new latest reading.
+        """
+        with self.lock:
+            previous = self.readings.get(sensor)
+
+            if temperature == SENSOR_FAILURE_TEMPERATURE:
+                failures = previous.failures + 1 if previous else 1
+                reading = SensorReading(sensor, previous.value if previous else None,
+                                        previous.timestamp if previous else 0.0, SENSOR_READING_FAILED, failures)
+                logger(WARNING, self.CLASS, "Failed to read {}, {} consecutive failures.", sensor, failures)
+            else:
+                reading = SensorReading(sensor, temperature, get_clock().monotonic(), SENSOR_READING_OK)
+                self.metrics.gauge("temperature", sensor).set(temperature)
+
+            self.readings[sensor] = reading
+            self.sampled.notify_all()
+
+        logger(FINEST, self.CLASS, "Latest reading: {}", reading)
+        return reading
+
+    def get_reading(self, sensor: str, max_age: float = None, wait: float = 0.0) -> SensorReading:
+        """
+        Returns the latest reading of the sensor, without touching the sensor.
+
+        Args:
+            sensor:     The sensor name, e.g. "sensor_1".
+            max_age:    Maximum age in seconds for the reading to be valid. Default: [temperature.sensor] max_age.
+            wait:       Time in seconds to wait for the first reading, if the sensor has not been read yet.
+        Returns:
+            SensorReading:  The reading, with its status telling if the value can be trusted.
+        """
+        if max_age is None:
+            max_age = self.config.snapshot.sensor_max_age
+
+        with self.lock:
+            if sensor not in self.readings and wait > 0:
+                self.sampled.wait_for(lambda: sensor in self.readings, wait)
+            reading = self.readings.get(sensor)
+
+        if reading is None:
+            return SensorReading(sensor, None, 0.0, SENSOR_READING_NONE)
+
+        if reading.value is None:
+            return reading._replace(status=SENSOR_READING_NONE)
+
+        if reading.status == SENSOR_READING_OK and reading.age() > max_age:
+            return reading._replace(status=SENSOR_READING_STALE)
+
+        return reading
+
+    def read(self, sensor: str, temp_units: str = "C", max_age: float = None, wait: float = 0.0) -> float:
+        """
+        Returns the latest temperature of the sensor in the given units, or SENSOR_FAILURE_TEMPERATURE if there is
+        no valid reading. Use get_reading() to find out why the reading is not valid.
+
+        Args:
+            sensor:     The sensor name, e.g. "sensor_1".
+            temp_units: [C]elsius or [F]ahrenheit. Default: [C]
+            max_age:    Maximum age in seconds for the reading to be valid. Default: [temperature.sensor] max_age.
+            wait:       Time in seconds to wait for the first reading, if the sensor has not been read yet.
+        Returns:
+            float:      The temperature.
+        """
+        reading = self.get_reading(sensor, max_age, wait)
+
+        if not reading.is_valid():
+            logger(FINER, self.CLASS, "No valid reading of {}: {}", sensor, reading)
+            return SENSOR_FAILURE_TEMPERATURE
+
+        if temp_units == "F":
+            return reading.value * 9.0 / 5.0 + 32.0
+        return reading.value
+
+    def stop(self):
+        """
+        Stops the sampling.
+        """
+        logger(FINER, self.CLASS, "Stopping temperature sampling..")
+        self.running = False
+        self.wakeup.set()
@@ -0,0 +1,203 @@
+#!/usr/bin/python
+###################################################################
+# Heating system control with Raspberry Pi
+# -----------------------------------------------------------------
+# (C) Copyright VAYAK Ltd (info@vayak.com). 2026
+# All Rights Reserved
+#
+# THIS IS UNPUBLISHED PROPRIETARY SOURCE CODE
+# The copyright notice above does not evidence any
+# actual or intended publication of such source code.
+#
+# RESTRICTED RIGHTS:
+# This file may have been supplied under a license.
+# It may be used, disclosed, and/or copied only as permitted
+# under such license agreement. Any copy must contain the
+# above copyright notice and this restricted rights notice.
+# Use, copying, and/or disclosure of the file is strictly
+# prohibited unless otherwise provided in the license agreement.
+###################################################################
+import math
+import threading
+
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from Common import logger
+from Constants import WARNING, FINE, FINER
+from Constants import MODEL_MIN_ROWS, MODEL_MAX_GAP, MODEL_FORGETTING, MODEL_REGULARISATION
+
+# Number of fitted parameters: loss rate, wind loss rate, heating gain, internal gain
+MODEL_PARAMETERS = 4
+
+
+class ThermalModel:
+    """
+    Lumped RC thermal model of the property, fitted from the temperature table:
+
+        dT/dt = -(loss + wind_loss * wspd) * (T - T_out) + gain * heating + internal
+
+    where T is the room temperature (sensor_1), T_out the outside temperature, wspd the wind speed and heating the
+    share of the time the boiler was on (time_state_on). Between two records, the change of the room temperature is
+    linear in the four parameters, which are fitted by least squares over all pairs of consecutive records.
+
+    The model is updated incrementally: only the normal equations (X'X and X'y, a 4x4 matrix and a vector) are kept,
+    and the new records are added to them, hence solving costs the same after a day as after a year of data. Older
+    records are slowly forgotten (MODEL_FORGETTING per record), for the model to follow the seasons.
+
+    Created: 17/10/2026
+    """
+
+    def __init__(self):
+        self.CLASS = "ThermalModel"
+        self.lock = threading.Lock()
+
+        self.xtx = np.zeros((MODEL_PARAMETERS, MODEL_PARAMETERS))
+        self.xty = np.zeros(MODEL_PARAMETERS)
+        self.rows = 0
+
+        # The parameters: loss, wind_loss, gain, internal (per second), or None until fitted.
+        self.parameters: Optional[np.ndarray] = None
+        self.rmse = None
+
+        # The last record taken into the model, to pair with the first record of the next update.
+        self.last_row: Optional[Tuple[datetime, float, float, float, float]] = None
+        self.last_outdoor: Optional[Tuple[float, float]] = None
+
+    def get_last_datetime(self) -> Optional[datetime]:
+        return self.last_row[0] if self.last_row else None
+
+    def update(self, rows: List[Tuple]) -> int:
+        """
+        Adds the records to the model and fits it again.
+
+        Args:
+            rows:   Tuples of (datetime, time_state_on, sensor_1, temperature, wspd) ordered by datetime,
+                    following the last record already taken, as given by DatabaseDAO.get_temperature_rows().
+        Returns:
+            int:    Number of the record pairs added to the model.
+        """
+        # Records without the outside weather yet are left for the next update, when they will have it.
+        usable = len(rows)
+        while usable > 0 and rows[usable - 1][3] is None:
+            usable -= 1
+        rows = rows[:usable]
+        if self.last_row is not None:
+            rows = [self.last_row] + list(rows)
+        if len(rows) < 2:
+            return 0
+
+        data = np.array([[row[0].timestamp(), row[1], row[2], row[3], row[4]] for row in rows], dtype=float)
+        time, seconds_on, room, outdoor, wind = data.T
+
+        x, y = self.features(np.diff(time), seconds_on[1:], room[:-1], room[1:], outdoor[:-1], wind[:-1])
+        valid = np.isfinite(x).all(axis=1) & np.isfinite(y)
+        x, y = x[valid], y[valid]
+
+        with self.lock:
+            if len(y):
+                # The older the record, the less it weighs.
+                weights = MODEL_FORGETTING ** np.arange(len(y) - 1, -1, -1)
+                self.xtx = self.xtx * MODEL_FORGETTING ** len(y) + (x.T * weights) @ x
+                self.xty = self.xty * MODEL_FORGETTING ** len(y) + (x.T * weights) @ y
+                self.rows += len(y)
+
+            self.last_row = tuple(rows[-1])
+            last_weather = data[np.isfinite(data[:, 3])]
+            if len(last_weather):
+                self.last_outdoor = (last_weather[-1, 3], 0.0 if np.isnan(last_weather[-1, 4]) else last_weather[-1, 4])
+
+        if len(y):
+            self.fit(x, y)
+        return len(y)
+
+    @staticmethod
+    def features(dt: np.ndarray, seconds_on: np.ndarray, room_start: np.ndarray, room_end: np.ndarray,
+                 outdoor: np.ndarray, wind: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Builds the least squares system for the pairs of consecutive records: the change of the room temperature
+        against the loss (T_out - T) * dt, the wind loss wspd * (T_out - T) * dt, the heating time and dt.
+        The records more than MODEL_MAX_GAP seconds apart are not a pair, and get NaN.
+        """
+        dt = np.where((dt > 0) & (dt <= MODEL_MAX_GAP), dt, np.nan)
+        wind = np.nan_to_num(wind)
+        difference = outdoor - room_start
+        x = np.column_stack((difference * dt, wind * difference * dt, np.minimum(seconds_on, dt), dt))
+        return x, room_end - room_start
+
+    def fit(self, x: np.ndarray = None, y: np.ndarray = None):
+        """
+        Solves the normal equations for the parameters. A small ridge term keeps the solution stable while the
+        history is short, e.g. before any windy day or before the heating was ever on.
+        """
+        with self.lock:
+            if self.rows < MODEL_MIN_ROWS:
+                logger(FINER, self.CLASS, "Not enough records to fit the model yet: {}", self.rows)
+                return
+
+            scale = np.maximum(np.diag(self.xtx), 1e-12)
+            regularised = self.xtx + MODEL_REGULARISATION * np.diag(scale)
+            parameters = np.linalg.solve(regularised, self.xty)
+
+        loss, wind_loss, gain, internal = parameters
+        if loss <= 0 or gain <= 0:
+            logger(WARNING, self.CLASS, "Fitted model is not physical (loss {:.3g}, gain {:.3g}), not using it.",
+                   loss, gain)
+            self.parameters = None
+            return
+
+        self.parameters = np.array([loss, max(wind_loss, 0.0), gain, internal])
+        if x is not None and len(y):
+            self.rmse = float(np.sqrt(np.mean((x @ parameters - y) ** 2)))
+        logger(FINE, self.CLASS, "Fitted on {} records: loss[{:.3g}/h], wind_loss[{:.3g}/h], gain[{:.3g} C/h], "
+                                 "internal[{:.3g} C/h], rmse[{}]", self.rows, loss * 3600, wind_loss * 3600,
+               gain * 3600, internal * 3600, self.rmse)
+
+    def is_ready(self) -> bool:
+        return self.parameters is not None
+
+    def steady_state(self, outdoor: float, wind: float, heating: float) -> Tuple[float, float]:
+        """
+        Returns the loss rate (per second) and the temperature the room tends to, with the boiler on for the given
+        share of the time.
+        """
+        loss, wind_loss, gain, internal = self.parameters
+        rate = loss + wind_loss * wind
+        return rate, outdoor + (gain * heating + internal) / rate
+
+    def predict(self, room: float, seconds: float, heating: float, outdoor: float = None, wind: float = None) -> float:
+        """
+        Predicts the room temperature after the given time, with constant outside conditions and heating.
+
+        Args:
+            room:       The room temperature now.
+            seconds:    The time ahead.
+            heating:    Share of the time the boiler is on, 0.0 to 1.0.
+            outdoor:    The outside temperature. Default: the latest known.
+            wind:       The wind speed. Default: the latest known.
+        Returns:
+            float:      The predicted room temperature.
+        """
+        outdoor, wind = self.get_outdoor(outdoor, wind)
+        rate, steady = self.steady_state(outdoor, wind, heating)
+        return steady + (room - steady) * math.exp(-rate * seconds)
+
+    def get_outdoor(self, outdoor: float = None, wind: float = None) -> Tuple[float, float]:
+        last_outdoor, last_wind = self.last_outdoor or (0.0, 0.0)
+        return (last_outdoor if outdoor is None else outdoor), (last_wind if wind is None else wind)
+
+    def get_stats(self) -> dict:
+        if not self.is_ready():
+            return {"ready": False, "rows": self.rows}
+        loss, wind_loss, gain, internal = self.parameters
+        return {
+            "ready": True,
+            "rows": self.rows,
+            "loss_per_hour": round(float(loss) * 3600, 4),
+            "wind_loss_per_hour": round(float(wind_loss) * 3600, 5),
+            "gain_per_hour": round(float(gain) * 3600, 3),
+            "internal_per_hour": round(float(internal) * 3600, 3),
+            "rmse": self.rmse
+        }
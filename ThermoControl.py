@@ -17,15 +17,21 @@
 # Use, copying, and/or disclosure of the file is strictly
 # prohibited unless otherwise provided in the license agreement.
 ###################################################################
-import datetime as dt
 import threading
-from scheduler import Scheduler
+import time
+
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Optional
 
 from Common import *
-from DS18B20 import DS18B20
+from ConfigStore import ConfigStore
 from DatabaseDAO import DatabaseDAO
-from GPIO import GPIO
+from EventScheduler import EventScheduler
+from Metrics import MetricsRegistry
+from Profiler import Profiler
+from TemperatureSampler import TemperatureSampler
 from WeatherDAO import WeatherDAO
+from Zone import Zone
 
 
 class ThermoControl(threading.Thread):
@@ -35,18 +41,16 @@ class ThermoControl(threading.Thread):
     --------------------------------------------
     1.0.0. | 03/02.1024 - Class created
 
-    TODO:   1.) Check for overlapping time periods before adding to the list.
-            2.) Upon adding, re-order the list by time period.
     """
 
-    def __init__(self, dao: DatabaseDAO, gpio: GPIO, sensor: DS18B20):
+    def __init__(self, dao: DatabaseDAO, zones: Dict[str, Zone], sampler: TemperatureSampler):
         """
         Create object and initialize
 
         Args:
             dao:    Database Access Object: MySQL database
-            gpio:   The interface to external peripheral
-            sensor: USB temperature sensor
+            zones:  The heating zones, each with its own relays and thermostat settings
+            sampler: The latest readings of the temperature sensors
 
         Returns:    none
         Modified:   [10/Dec/2023, 24/Mar/2024]
@@ -55,111 +59,177 @@ class ThermoControl(threading.Thread):
         self.CLASS = "ThermoControl"
         self.config = ConfigStore()
         self.dao = dao
-        self.gpio = gpio
-        self.thermo_sensor = sensor
+        self.zones = zones
+        self.sampler = sampler
+        self.metrics = MetricsRegistry()
+        self.profiler = Profiler()
 
-        self.thread_sleep_minutes = 1
         self.running = True
-        self.seconds_heating_on = 0
 
-        self.schedule = None
+        # The zones are evaluated side by side on every control tick.
+        self.executor = ThreadPoolExecutor(max_workers=len(zones), thread_name_prefix="Zone")
+
+        # Every periodic operation is an event with its own deadline, run by this thread.
+        self.events = EventScheduler(self.CLASS)
+        self.weather = WeatherDAO(self.config, self.dao)
+        self.schedule_events(self.config.snapshot)
+        self.schedule_weather(self.config.snapshot)
 
-        # Start periodic retrieval of the outside weather data for faster processing
-        dao_hw = WeatherDAO(self.config, self.dao)
+        self.config.subscribe('boilerry.server', None, self.on_config_change)
+        self.config.subscribe('weather', "time_to_retrieve_weather_history", self.schedule_weather)
+        self.config.subscribe('metrics', "dump_interval", self.schedule_events)
 
-        time_to_execute_prop = self.config.getMetStation("time_to_retrieve_weather_history")
-        if time_to_execute_prop:
-            logger(INFO, "Boilerry", "Starting daily weather data collection for latitude[{}] and longitude[{}] at {} o'clock."
-                   .format(self.config.getMetStation("latitude"), self.config.getMetStation("longitude"), time_to_execute_prop))
+    def schedule_events(self, snapshot):
+        """
+        (Re)schedules the heating control, the temperature recording, the relay journal flush and the metrics dump,
+        with the periods set in the config.
 
-            self.schedule = Scheduler()
-            self.schedule.daily(
-                dt.datetime.strptime(time_to_execute_prop, "%H:%M:%S").time(),
-                dao_hw.retrieve_and_store_weather_history_periodically
+        Args:
+            snapshot:   ConfigSnapshot with the settings.
+        """
+        self.events.every("control", snapshot.control_interval, self.control, delay=0)
+        self.events.every("relay_journal", RELAY_JOURNAL_FLUSH_PERIOD, self.flush_relay_journal)
+        if "thermal_model" not in self.events.events:
+            self.events.every("thermal_model", MODEL_UPDATE_PERIOD, self.update_thermal_model, delay=0)
+
+        # For better presentation, the temperature is recorded on the top of the hour, divided by the interval.
+        if snapshot.temp_record_interval > 0:
+            self.events.at_interval("record_temperature", snapshot.temp_record_interval * 60, self.record_temperature)
+        else:
+            logger(FINER, self.CLASS, "Recording temperature is OFF.")
+            self.events.cancel("record_temperature")
+
+        if snapshot.metrics_file and snapshot.metrics_dump_interval > 0:
+            self.events.every("metrics", snapshot.metrics_dump_interval, self.dump_metrics)
+        else:
+            self.events.cancel("metrics")
+
+    def schedule_weather(self, snapshot):
+        """
+        (Re)schedules the daily retrieval of the weather history at the time set in the config.
+
+        Args:
+            snapshot:   ConfigSnapshot with the weather settings.
+        """
+        if snapshot.time_to_retrieve_weather_history:
+            logger(INFO, "Boilerry", "Starting daily weather data collection for latitude[{}] and longitude[{}] at {} o'clock.",
+                   snapshot.latitude, snapshot.longitude, snapshot.time_to_retrieve_weather_history)
+
+            self.events.daily(
+                "weather",
+                snapshot.time_to_retrieve_weather_history,
+                self.weather.retrieve_and_store_weather_history_periodically
             )
         else:
             logger(WARNING, "Boilerry", "No periodic weather retrieval due to missing 'time_to_retrieve_weather_history' property.")
+            self.events.cancel("weather")
+
+    def on_config_change(self, snapshot):
+        """
+        Called by the config store when the [boilerry.server] settings change: take over the new periods,
+        and re-evaluate the heating state straight away.
+        """
+        logger(FINER, self.CLASS, "Thermostat switch is: {}", snapshot.thermo_switch)
+        self.schedule_events(snapshot)
 
     def run(self):
         """
         Thread to perform the periodic operations to set the boiler state according the settings stored in the database.
         """
         logger(FINE, self.CLASS, "Starting thermostat temperature control..")
+        self.events.run()
+
+    def control(self):
+        """
+        One iteration of the temperature control: set the boiler state according to the settings and the room
+        temperature. Profiled when profiling of the control loop is armed.
+        """
+        time_start = time.perf_counter()
+
+        if self.profiler.armed:
+            with self.profiler.profile(PROFILE_TARGET_THERMO):
+                self.evaluate()
+        else:
+            self.evaluate()
 
-        while self.running:
-            logger(FINEST, self.CLASS, "Checking for scheduled tasks..")
-            self.schedule.exec_jobs()
+        self.metrics.histogram("control_tick_ms").observe((time.perf_counter() - time_start) * 1000)
 
-            logger(FINEST, self.CLASS, "Checking ThermoSwitch state..")
-            thermo_switch = int(self.config.getBoilerryServer(CONST_THERMO_SWITCH, 1))
+    def request_control(self) -> Optional[Future]:
+        """
+        Runs the heating control as soon as possible, e.g. once a setting was changed from the app.
 
-            logger(FINEST, self.CLASS, "Determining the 'Heating state' according to settings & environment..")
+        Returns:
+            Future:     Done when the heating state of every zone is set.
+        """
+        return self.events.trigger("control")
 
-            if thermo_switch == 3:
-                'Do the predictive magic'
+    def dump_metrics(self):
+        try:
+            self.metrics.dump()
+        except (IOError, OSError) as e:
+            logger(WARNING, self.CLASS, "Failed to write the metrics: {}", e)
 
-            if thermo_switch == 2:
-                'Do the timer magic'
+    def flush_relay_journal(self):
+        """
+        The relay transitions are written in bulk.
+        """
+        for zone in self.zones.values():
+            zone.relay.journal.flush(self.dao)
 
-            'Maintain the Always ON temperature'
-            if thermo_switch == 1:
-                thermo_temperature = self.dao.get_thermostat_manual()
-                room_temperature = read_temperature_now(self)
-                self.gpio.temperature_to_relay_state(thermo_temperature, room_temperature)
+    def for_each_zone(self, operation: Callable[[Zone], None]):
+        """
+        Runs the operation for every zone, side by side, hence it takes as long as the slowest zone rather than
+        the sum of them. A single zone is run on this thread, where the profiler can see it.
+        """
+        if len(self.zones) == 1:
+            for zone in self.zones.values():
+                self.run_zone(operation, zone)
+        else:
+            wait([self.executor.submit(self.run_zone, operation, zone) for zone in self.zones.values()])
 
-            'Force switch off the heating'
-            if thermo_switch == 0:
-                logger(FINE, self.CLASS, "Thermostat  OFF")
-                self.gpio.setRelayState(HEATING_STATE_OFF)
-                # self.stop()
+    def run_zone(self, operation: Callable[[Zone], None], zone: Zone):
+        """
+        A failing zone does not hold up the others.
+        """
+        try:
+            operation(zone)
+        except Exception as e:
+            self.metrics.counter("zone_errors", zone.name).inc()
+            logger(WARNING, self.CLASS, "Zone '{}' failed: {}", zone.name, e)
 
-            self.record_temperature("sensor_1")
+    def evaluate(self):
+        """
+        Set the boiler state of every zone according to the thermostat switch, the thermostat settings of the zone
+        and its room temperature.
+        """
+        logger(FINEST, self.CLASS, "Checking ThermoSwitch state..")
+        thermo_switch = self.config.snapshot.thermo_switch
 
-            # We may sleep less than the exact seconds representation of the minutes,
-            # but we will always wake up at the start of the minute.
-            sleep_to_next_minute(self.thread_sleep_minutes)
+        logger(FINEST, self.CLASS, "Determining the 'Heating state' according to settings & environment..")
+        self.for_each_zone(lambda zone: zone.evaluate(thermo_switch))
+
+    def update_thermal_model(self):
+        """
+        Adds the temperature records since the last update to the thermal model of every zone.
+        """
+        self.for_each_zone(Zone.update_thermal_model)
 
-    def record_temperature(self, sensor: str):
+    def record_temperature(self):
         """
-        Make a record of the current temperature (if it time to do that).
+        Make a record of the current temperature of all sensors, one per zone with the heating time of the zone.
         For better presentation, the time when the temperature measurement is taken, is on the top of the hour,
         divided by the period specified in the property.
+        The sensors are sampled together in the background, hence the row costs no more than a single conversion.
         """
-        try:
-            thermo_record_interval = int(self.config.getBoilerryServer(CONST_TEMP_RECORD_INTERVAL, "30"))
-        except ValueError:
-            thermo_record_interval = 30
-            logger(FINEST, self.CLASS, "Recording temperature property '{}' is not an integer: {}.".format(
-                CONST_TEMP_RECORD_INTERVAL, self.config.getBoilerryServer(CONST_TEMP_RECORD_INTERVAL, "30")
-            ))
-
-        # Let's do some checks and let the user know if the settings look abnormal
-        if thermo_record_interval <= 0:
-            logger(FINER, self.CLASS, "Recording temperature is OFF.")
-        elif getCurrentTimeMinutes() % thermo_record_interval == 0:
-            logger(FINER, self.CLASS, "Recording temperature: current_minutes[{}] fits the interval[{}].".format(
-                getCurrentTimeMinutes(), self.config.getBoilerryServer(CONST_TEMP_RECORD_INTERVAL, "30")
-            ))
-            self.dao.save_temperature(
-                self.seconds_heating_on,
-                self.config.getBoilerryServer(CONST_TEMP_UNITS, "C"),
-                self.thermo_sensor.getTemp(
-                    self.config.getSensor(sensor + "_id"),
-                    int(self.config.getSensor(sensor + "_timeout")),
-                    self.config.getBoilerryServer(CONST_TEMP_UNITS, "C")
-                )
-            )
+        snapshot = self.config.snapshot
+        logger(FINER, self.CLASS, "Recording temperature: interval[{}].", snapshot.temp_record_interval)
 
-            # As soon as we write down the data, we start counting the seconds again
-            self.seconds_heating_on = 0
-        else:
-            logger(FINEST, self.CLASS, "Recording temperature is not yet to happen: current_minutes[{}] is not aligned with interval[{}].".format(
-                getCurrentTimeMinutes(), self.config.getBoilerryServer(CONST_TEMP_RECORD_INTERVAL, "30")
-            ))
+        temperatures = {}
+        for sensor in snapshot.sensors:
+            temperature = self.sampler.read(sensor, snapshot.temp_units)
+            temperatures[sensor] = None if temperature == SENSOR_FAILURE_TEMPERATURE else temperature
 
-        # Calculate the time (in seconds) the heating element is ON (consuming energy)
-        if self.gpio.getRelayState():
-            self.seconds_heating_on = self.seconds_heating_on + (self.thread_sleep_minutes * 60)
+        self.for_each_zone(lambda zone: zone.record_temperature(temperatures, snapshot.temp_units))
 
     def stop(self):
         """
@@ -169,3 +239,5 @@ class ThermoControl(threading.Thread):
         """
         logger(FINER, self.CLASS, "Stopping thermostat temperature control..")
         self.running = False
+        self.events.stop()
+        self.executor.shutdown(wait=False)
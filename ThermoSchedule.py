@@ -0,0 +1,190 @@
+#!/usr/bin/python
+###################################################################
+# Heating system control with Raspberry Pi
+# -----------------------------------------------------------------
+# (C) Copyright VAYAK Ltd (info@vayak.com). 2026
+# All Rights Reserved
+#
+# THIS IS UNPUBLISHED PROPRIETARY SOURCE CODE
+# The copyright notice above does not evidence any
+# actual or intended publication of such source code.
+#
+# RESTRICTED RIGHTS:
+# This file may have been supplied under a license.
+# It may be used, disclosed, and/or copied only as permitted
+# under such license agreement. Any copy must contain the
+# above copyright notice and this restricted rights notice.
+# Use, copying, and/or disclosure of the file is strictly
+# prohibited unless otherwise provided in the license agreement.
+###################################################################
+from datetime import datetime
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+from Clock import get_clock
+from Common import logger
+from Constants import WARNING, FINE, THERMO_DEFAULT_TEMPERATURE
+
+DAYS_OF_WEEK = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+DAY_ALL = "all"
+MANUAL_SLOT = ("00:00", "00:00")
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+
+class ScheduleSlot(NamedTuple):
+    """
+    One row of the thermostat table: maintain 'temperature' on 'day_of_week' (mon..sun, or all) from 'time_start'
+    to 'time_end' (HH:MM). A slot ending at or before its start runs past midnight, into the next day.
+    """
+    day_of_week: str
+    temperature: float
+    time_start: str
+    time_end: str
+
+
+def hhmm_to_minutes(hh_mm: str) -> int:
+    """
+    Converts "HH:MM" to minutes since midnight.
+
+    Raises:
+        ValueError: If the time is not valid.
+    """
+    hours, minutes = hh_mm.strip().split(":")
+    hours, minutes = int(hours), int(minutes)
+    if not (0 <= hours <= 24 and 0 <= minutes < 60) or hours * 60 + minutes > MINUTES_PER_DAY:
+        raise ValueError("Invalid time: {}".format(hh_mm))
+    return hours * 60 + minutes
+
+
+def minute_of_week(time_now: datetime) -> int:
+    return time_now.weekday() * MINUTES_PER_DAY + time_now.hour * 60 + time_now.minute
+
+
+class ThermoSchedule:
+    """
+    The timed thermostat settings (thermo_switch = 2), compiled into a table of the temperature to maintain for every
+    minute of the week. Looking up the temperature is a single index into the table, hence the control needs neither
+    a query nor a search per tick. The table is only compiled again when the thermostat table changes, which the
+    DatabaseDAO tells by its 'thermostat_version'.
+
+    The slots are validated when compiled: slots of the same kind (day specific, or every day) may not overlap,
+    and the overlapping slot is left out and reported. The day specific slots take precedence over the every day
+    ones. Outside the slots, the manual (Always ON) temperature is maintained.
+
+    Created: 17/10/2026
+    """
+
+    def __init__(self):
+        self.CLASS = "ThermoSchedule"
+        self.version = None
+        self.manual_temperature = THERMO_DEFAULT_TEMPERATURE
+        self.table: List[float] = [self.manual_temperature] * MINUTES_PER_WEEK
+        self.slots: List[ScheduleSlot] = []
+        self.errors: List[str] = []
+
+    def compile(self, rows: Iterable[Tuple], version: int = None) -> List[str]:
+        """
+        Compiles the rows of the thermostat table into the minute of the week table.
+
+        Args:
+            rows:       Tuples of (day_of_week, temperature, timeStart, timeEnd), as given by DatabaseDAO.get_thermostat().
+            version:    Version of the thermostat table, as given by DatabaseDAO.thermostat_version.
+        Returns:
+            list:       The reported problems with the slots, empty if all are valid.
+        """
+        errors = []
+        manual_temperature = THERMO_DEFAULT_TEMPERATURE
+        slots = []
+
+        for row in rows:
+            slot = ScheduleSlot(str(row[0] or DAY_ALL).lower(), row[1], str(row[2]), str(row[3]))
+            if (slot.time_start, slot.time_end) == MANUAL_SLOT:
+                manual_temperature = float(slot.temperature)
+                continue
+            try:
+                if slot.day_of_week != DAY_ALL and slot.day_of_week not in DAYS_OF_WEEK:
+                    raise ValueError("Invalid day of the week: {}".format(slot.day_of_week))
+                float(slot.temperature)
+                hhmm_to_minutes(slot.time_start)
+                hhmm_to_minutes(slot.time_end)
+                slots.append(slot)
+            except (TypeError, ValueError) as e:
+                errors.append("{}: {}".format(slot, e))
+
+        table = [manual_temperature] * MINUTES_PER_WEEK
+        compiled = []
+        # The every day slots go first, to be overwritten by the day specific ones.
+        for day_specific in (False, True):
+            taken = [False] * MINUTES_PER_WEEK
+            kind = [slot for slot in slots if (slot.day_of_week != DAY_ALL) == day_specific]
+
+            for slot in sorted(kind, key=lambda slot: (slot.day_of_week, hhmm_to_minutes(slot.time_start))):
+                ranges = self.slot_ranges(slot)
+                if any(taken[minute] for start, end in ranges for minute in range(start, end)):
+                    errors.append("{}: overlaps another slot".format(slot))
+                    continue
+                for start, end in ranges:
+                    table[start:end] = [float(slot.temperature)] * (end - start)
+                    taken[start:end] = [True] * (end - start)
+                compiled.append(slot)
+
+        for error in errors:
+            logger(WARNING, self.CLASS, "Thermostat slot left out: {}", error)
+
+        self.table = table
+        self.slots = compiled
+        self.manual_temperature = manual_temperature
+        self.errors = errors
+        self.version = version
+        logger(FINE, self.CLASS, "Compiled {} thermostat slots, version {}.", len(compiled), version)
+        return errors
+
+    @staticmethod
+    def slot_ranges(slot: ScheduleSlot) -> List[Tuple[int, int]]:
+        """
+        Returns the ranges [start, end) of the minutes of the week covered by the slot.
+        """
+        start = hhmm_to_minutes(slot.time_start)
+        end = hhmm_to_minutes(slot.time_end)
+        length = end - start if end > start else end + MINUTES_PER_DAY - start
+
+        days = range(7) if slot.day_of_week == DAY_ALL else (DAYS_OF_WEEK.index(slot.day_of_week),)
+        ranges = []
+        for day in days:
+            first = day * MINUTES_PER_DAY + start
+            last = first + length
+            if last <= MINUTES_PER_WEEK:
+                ranges.append((first, last))
+            else:
+                # Sunday night into Monday morning
+                ranges.append((first, MINUTES_PER_WEEK))
+                ranges.append((0, last - MINUTES_PER_WEEK))
+        return ranges
+
+    def is_current(self, version: int) -> bool:
+        return self.version is not None and self.version == version
+
+    def get_temperature(self, time_now: datetime = None) -> float:
+        """
+        Returns the temperature to maintain at the given time.
+
+        Args:
+            time_now:   The time. Default: now.
+        """
+        return self.table[minute_of_week(time_now or get_clock().now())]
+
+    def next_change(self, time_now: datetime = None) -> Optional[Tuple[int, float]]:
+        """
+        Returns the next change of the temperature to maintain within a week: the minutes until it, and the new
+        temperature, or None if the temperature is the same all week.
+
+        Args:
+            time_now:   The time. Default: now.
+        """
+        minute = minute_of_week(time_now or get_clock().now())
+        current = self.table[minute]
+        for offset in range(1, MINUTES_PER_WEEK):
+            temperature = self.table[(minute + offset) % MINUTES_PER_WEEK]
+            if temperature != current:
+                return offset, temperature
+        return None
@@ -17,17 +17,17 @@
 # Use, copying, and/or disclosure of the file is strictly
 # prohibited unless otherwise provided in the license agreement.
 ###################################################################
-from Common import read_temperature_now, logger
+from Common import logger
 from ConfigStore import ConfigStore
 from Constants import FINER, CONST_TEMP_HISTORY
 from Constants import CONST_THERMO_TEMPERATURE, CONST_THERMO_SWITCH, CONST_THERMO_RELAY, CONST_TEMP_NOW
-from DS18B20 import DS18B20
 from DatabaseDAO import DatabaseDAO
-from GPIO import GPIO
+from TemperatureSampler import TemperatureSampler
+from Zone import Zone
 
 
 class Thermostat:
-    def __init__(self, dao: DatabaseDAO, gpio: GPIO, sensor: DS18B20):
+    def __init__(self, dao: DatabaseDAO, zone: Zone, sampler: TemperatureSampler):
         """
         Create object and initializes the values with what's currently defined in the database.
         This object will be refreshed on demand at various parts of the code, rather than periodically.
@@ -36,8 +36,8 @@ class Thermostat:
 
         Args:
             dao:    Database Access Object.
-            gpio:   The RPi board pinout interface.
-            sensor: The temperature sensor.
+            zone:   The heating zone shown by the app.
+            sampler: The latest readings of the temperature sensors.
         Return:
             none
         Created:
@@ -46,48 +46,49 @@ class Thermostat:
         self.CLASS = "Thermostat"
         self.config = ConfigStore()
         self.dao = dao
-        self.gpio = gpio
-        self.thermo_sensor = sensor
+        self.zone = zone
+        self.relay = zone.relay
+        self.sampler = sampler
 
         logger(FINER, self.CLASS, "Initialising current state.")
 
-        self.thermo_relay = self.gpio.getRelayState()
-        self.thermo_switch = self.config.getBoilerryServer(CONST_THERMO_SWITCH, "1")
-        self.thermo_manual_temperature = self.dao.get_thermostat_manual()
-        self.temperature_now = read_temperature_now(self)
-        self.temperature_history = self.dao.get_temperature_history()
+        self.thermo_relay = self.relay.get_relay_state()
+        self.thermo_switch = str(self.config.snapshot.thermo_switch)
+        self.thermo_manual_temperature = self.dao.get_thermostat_manual(self.zone.name)
+        self.temperature_now = self.zone.read_temperature()
+        self.temperature_history = self.dao.get_temperature_history(zone=self.zone.name)
 
     def get_thermo_state(self):
         return self.thermo_relay
 
     def refresh_thermo_state(self):
         logger(FINER, self.CLASS, "Updating: {}.".format(CONST_THERMO_RELAY))
-        self.thermo_relay = self.gpio.getRelayState()
+        self.thermo_relay = self.relay.get_relay_state()
 
     def get_thermo_switch(self):
         return self.thermo_switch
 
     def refresh_thermo_switch(self):
         logger(FINER, self.CLASS, "Updating: {}.".format(CONST_THERMO_SWITCH))
-        self.thermo_switch = self.config.getBoilerryServer(CONST_THERMO_SWITCH, "1")
+        self.thermo_switch = str(self.config.snapshot.thermo_switch)
 
     def get_thermo_manual_temperature(self):
         return self.thermo_manual_temperature
 
     def refresh_thermo_manual_temperature(self):
         logger(FINER, self.CLASS, "Updating: {}.".format(CONST_THERMO_TEMPERATURE))
-        self.thermo_manual_temperature = self.dao.get_thermostat_manual()
+        self.thermo_manual_temperature = self.dao.get_thermostat_manual(self.zone.name)
 
     def get_temperature_now(self):
         return self.temperature_now
 
     def refresh_temperature_now(self):
         logger(FINER, self.CLASS, "Updating: {}.".format(CONST_TEMP_NOW))
-        self.temperature_now = read_temperature_now(self)
+        self.temperature_now = self.zone.read_temperature()
 
     def get_temperature_history(self):
         return self.temperature_history
 
     def refresh_temperature_history(self):
         logger(FINER, self.CLASS, "Updating: {}.".format(CONST_TEMP_HISTORY))
-        self.temperature_history = self.dao.get_temperature_history()
+        self.temperature_history = self.dao.get_temperature_history(zone=self.zone.name)
@@ -1,5 +1,7 @@
 #!/usr/bin/python
 # import requests
+import time
+
 from typing import List, Tuple
 
 import openmeteo_requests
@@ -14,6 +16,7 @@ from ConfigStore import ConfigStore
 from DatabaseDAO import DatabaseDAO
 from Constants import *
 from Common import logger, timestampToDatetime, timestampToDate, getCurrentDate, getCurrentTime
+from Metrics import MetricsRegistry
 
 
 class WeatherDAO:
@@ -32,12 +35,27 @@ class WeatherDAO:
         """
         self.config = config
         self.dao_db = dao_db
+        self.metrics = MetricsRegistry()
+
+        self.refresh(config.snapshot)
+        self.config.subscribe('weather', None, self.refresh)
 
-        self.latitude = config.getMetStation("latitude")
-        self.longitude = config.getMetStation("longitude")
-        self.unit_speed = config.getMetStation("unit_speed")
-        self.unit_temperature = config.getMetStation("unit_temperature")
-        self.min_days_history = config.getMetStation("min_days_history")
+    def refresh(self, snapshot) -> None:
+        """
+        Takes over the weather station settings. Called again by the config store when the [weather] settings change.
+
+        Args:
+            snapshot:           ConfigSnapshot with the weather settings.
+        Returns:
+            None
+        Created:
+            17/10/2026
+        """
+        self.latitude = snapshot.latitude
+        self.longitude = snapshot.longitude
+        self.unit_speed = snapshot.unit_speed
+        self.unit_temperature = snapshot.unit_temperature
+        self.min_days_history = snapshot.min_days_history
 
     def retrieve_and_store_weather_history_periodically(self) -> None:
         """
@@ -51,7 +69,7 @@ class WeatherDAO:
             20/04/2026
         """
         logger(FINE, "WeatherDAO", "Periodic retrieval of the weather history at '{}'."
-               .format(self.config.getMetStation("time_to_retrieve_weather_history")))
+               .format(self.config.snapshot.time_to_retrieve_weather_history))
         self.retrieve_and_store_weather_history()
 
     def retrieve_and_store_weather_history(self) -> None:
@@ -66,18 +84,22 @@ class WeatherDAO:
             19/10/2025
         """
         # Check the timestamp of the last weather record so that we can retrieve the history starting from then.
+        snapshot = self.config.snapshot
         last_weather_record_timestamp = int(
-            self.dao_db.get_last_weather_record_timestamp(int(self.config.getMetStation("min_days_history"))))
+            self.dao_db.get_last_weather_record_timestamp(snapshot.min_days_history))
 
         # We want to avoid hitting the API too often, hence we impose a minimum time period before we can send a request again.
-        min_hours_since_last_record = int(self.config.getMetStation("min_hours_since_last_record"))
+        min_hours_since_last_record = snapshot.min_hours_since_last_record
         if last_weather_record_timestamp > datetime.now().timestamp() - min_hours_since_last_record * 3600:
             logger(FINE, "WeatherDAO",
                    "Skipping weather history polling because the last record is less than {} hours ago: {}".format(
                        min_hours_since_last_record, timestampToDatetime(last_weather_record_timestamp)))
             return
 
-        match self.config.getMetStation("api"):
+        weather_api = snapshot.weather_api
+        time_start = time.perf_counter()
+
+        match weather_api:
             case "open-meteo":
                 weather_history = self.api_open_meteo(last_weather_record_timestamp)
             case "visual-crossing":
@@ -85,6 +107,11 @@ class WeatherDAO:
             case _:
                 return
 
+        self.metrics.histogram("weather_fetch_ms", weather_api).observe((time.perf_counter() - time_start) * 1000)
+        if weather_history is None:
+            self.metrics.counter("weather_fetch_failures", weather_api).inc()
+            return
+
         logger(FINE, "WeatherDAO", "Retrieved {} hourly weather data points".format(len(weather_history)))
 
         # Enrich all existing indoor temperature measurements with the weather data
@@ -164,7 +191,7 @@ class WeatherDAO:
         # A.) For maximum performance, we discard all elements for time earlier than the time now,
         # and older than 'last_weather_record_timestamp', because
         # these times are either yet not available in the database, or already updated.
-        # If we dont remove them, we would be updating the database unnecessary, loosing 0.5 sec per update.
+        # If we dont remove them, we would be writing the same hours to the weather_hourly table again.
         # 1. Ensure the first column is datetime (assuming it's the first column at index 0)
         first_col = hourly_dataframe.columns[0]
         hourly_dataframe[first_col] = pd.to_datetime(hourly_dataframe[first_col])
@@ -0,0 +1,262 @@
+#!/usr/bin/python
+###################################################################
+# Heating system control with Raspberry Pi
+# -----------------------------------------------------------------
+# (C) Copyright VAYAK Ltd (info@vayak.com). 2026
+# All Rights Reserved
+#
+# THIS IS UNPUBLISHED PROPRIETARY SOURCE CODE
+# The copyright notice above does not evidence any
+# actual or intended publication of such source code.
+#
+# RESTRICTED RIGHTS:
+# This file may have been supplied under a license.
+# It may be used, disclosed, and/or copied only as permitted
+# under such license agreement. Any copy must contain the
+# above copyright notice and this restricted rights notice.
+# Use, copying, and/or disclosure of the file is strictly
+# prohibited unless otherwise provided in the license agreement.
+###################################################################
+import json
+import os
+import threading
+import time
+
+from collections import OrderedDict
+from typing import List, Tuple
+
+from Common import logger
+from ConfigStore import ConfigStore
+from Constants import CRITICAL, WARNING, FINE, FINER, WRITE_BEHIND_MAX_BACKOFF
+from Metrics import MetricsRegistry
+
+
+class WriteBehindJournal(threading.Thread):
+    """
+    Write-behind buffer of the records inserted into the database (the temperature readings, the detected motion).
+
+    The callers only append the record to the journal, a local file of JSON lines, and never wait on the database.
+    The journal thread writes the records to the database in batches, one multi-row statement per table, every
+    'flush_interval' seconds or as soon as 'batch_size' records are waiting. Once written, the records are removed
+    from the journal. While the database is slow or down, the records stay in the journal, and they are replayed
+    after a restart, hence no reading is lost to an outage or a crash.
+
+    A record may be written twice if the process stops between the database write and the removal from the journal,
+    hence the writes should be idempotent where possible (e.g. the presence upsert).
+
+    A journal file is written by a single journal thread, shared by the DatabaseDAOs of the process: get() returns
+    the running journal of the file, or starts a new one, e.g. once the previous one was stopped.
+
+    Created: 17/10/2026
+    """
+
+    # The running journal of every journal file.
+    journals = {}
+    journals_lock = threading.Lock()
+
+    def __init__(self, dao):
+        """
+        Create the journal and load the records left over by the previous run. Call start() to start writing.
+
+        Args:
+            dao:    DatabaseDAO, writing the batches with write_batch().
+        """
+        super().__init__(name="WriteBehindJournal", daemon=True)
+        self.CLASS = "WriteBehindJournal"
+        self.dao = dao
+        self.config = ConfigStore()
+        self.metrics = MetricsRegistry()
+
+        self.condition = threading.Condition()
+        self.running = True
+        self.failing = False
+        self.failures = 0
+
+        self.path = self.config.snapshot.db_journal_file
+        self.refresh(self.config.snapshot)
+        self.config.subscribe('database', None, self.refresh)
+
+        self.pending: List[Tuple[str, list]] = self.load()
+        self.file = open(self.path, "a")
+
+        self.metrics.add_collector("write_behind", self.get_stats)
+
+    @classmethod
+    def get(cls, dao) -> "WriteBehindJournal":
+        """
+        Returns the running journal of the journal file set in the config, and starts one if there is none.
+
+        Args:
+            dao:    DatabaseDAO, writing the batches of a new journal.
+        Returns:
+            WriteBehindJournal: The running journal.
+        """
+        path = ConfigStore().snapshot.db_journal_file
+        with cls.journals_lock:
+            journal = cls.journals.get(path)
+            if journal is None or not journal.running:
+                if journal is not None:
+                    # The last flush of the stopped journal is done before the new one reads the file.
+                    journal.join()
+                journal = cls(dao)
+                journal.start()
+                cls.journals[path] = journal
+            return journal
+
+    def refresh(self, snapshot):
+        self.flush_interval = snapshot.db_flush_interval
+        self.batch_size = snapshot.db_batch_size
+
+    def load(self) -> List[Tuple[str, list]]:
+        """
+        Reads the records not yet written to the database. A line cut short by a crash is skipped.
+
+        Returns:
+            list:   Tuples of (table, row) in the order they were appended.
+        """
+        if not os.path.exists(self.path):
+            return []
+
+        records = []
+        with open(self.path, "r") as journal:
+            for line in journal:
+                try:
+                    record = json.loads(line)
+                    records.append((record["table"], record["row"]))
+                except (ValueError, KeyError, TypeError):
+                    logger(WARNING, self.CLASS, "Skipping an invalid journal line: {}", line.strip())
+
+        if records:
+            logger(FINE, self.CLASS, "Replaying {} records from the journal '{}'.", len(records), self.path)
+        return records
+
+    def append(self, table: str, row: list):
+        """
+        Appends a record for the database, and returns without waiting for it to be written.
+
+        Args:
+            table:  The table of the record, as known to DatabaseDAO.write_batch().
+            row:    The column values of the record, JSON serialisable.
+        """
+        line = json.dumps({"table": table, "row": row}) + "\n"
+        with self.condition:
+            self.file.write(line)
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.pending.append((table, row))
+            # While the database is down, the journal thread waits for its retry rather than for a full batch.
+            if len(self.pending) >= self.batch_size and not self.failing:
+                self.condition.notify()
+
+    def get_stats(self) -> dict:
+        return {"pending": len(self.pending), "failing": self.failing}
+
+    def run(self):
+        logger(FINE, self.CLASS, "Writing the journal '{}' to the database every {} seconds..",
+               self.path, self.flush_interval)
+
+        while self.running:
+            with self.condition:
+                if self.failing:
+                    # The database is down: try again later, rather than straight away for the records waiting.
+                    self.condition.wait(self.get_backoff())
+                elif len(self.pending) < self.batch_size:
+                    self.condition.wait(self.flush_interval)
+            self.flush()
+
+    def get_backoff(self) -> float:
+        """
+        Returns:
+            float:  The time (in seconds) to wait after a failed flush, doubled with every failure in a row,
+                    up to WRITE_BEHIND_MAX_BACKOFF.
+        """
+        backoff = self.flush_interval * 2 ** min(self.failures - 1, 16)
+        return max(min(backoff, WRITE_BEHIND_MAX_BACKOFF), self.flush_interval)
+
+    def flush(self) -> int:
+        """
+        Writes the waiting records to the database, batch by batch, and removes the written ones from the journal.
+        A failing write stops the flush, and its records are tried again at the next one.
+
+        Returns:
+            int:    Number of the written records.
+        """
+        written = 0
+        while True:
+            with self.condition:
+                batch = self.pending[:self.batch_size]
+            if not batch:
+                break
+
+            tables = OrderedDict()
+            for table, row in batch:
+                tables.setdefault(table, []).append(row)
+
+            # Every table is written on its own, hence its records leave the journal as soon as they are written,
+            # and a table failing after another one was written does not write the other one again.
+            remaining = len(batch)
+            for table, rows in tables.items():
+                time_start = time.perf_counter_ns()
+                try:
+                    self.dao.write_batch(table, rows)
+                except Exception as e:
+                    self.metrics.counter("write_behind_errors").inc()
+                    if not self.failing:
+                        logger(WARNING, self.CLASS, "Failed to write {} records, keeping them in the journal: {}",
+                               len(rows), e)
+                    self.failing = True
+                    self.failures += 1
+                    break
+
+                self.metrics.histogram("write_behind_ms").observe((time.perf_counter_ns() - time_start) / 1000000)
+                if self.failing:
+                    logger(FINE, self.CLASS, "Writing to the database again.")
+                    self.failing = False
+                    self.failures = 0
+
+                with self.condition:
+                    # The batch is still at the head of the records, those appended since are behind it.
+                    kept = [record for record in self.pending[:remaining] if record[0] != table]
+                    self.pending[:remaining] = kept
+                    remaining = len(kept)
+                    self.compact()
+                written += len(rows)
+
+            if self.failing:
+                break
+
+        if written:
+            logger(FINER, self.CLASS, "Wrote {} records to the database.", written)
+        return written
+
+    def compact(self):
+        """
+        Rewrites the journal with the records still waiting, i.e. those not written yet.
+        Called with the condition held.
+        """
+        try:
+            if not self.pending:
+                self.file.seek(0)
+                self.file.truncate()
+                return
+
+            self.file.close()
+            with open(self.path + ".tmp", "w") as journal:
+                for table, row in self.pending:
+                    journal.write(json.dumps({"table": table, "row": row}) + "\n")
+                journal.flush()
+                os.fsync(journal.fileno())
+            os.replace(self.path + ".tmp", self.path)
+            self.file = open(self.path, "a")
+        except (IOError, OSError) as e:
+            logger(CRITICAL, self.CLASS, "Failed to compact the journal '{}': {}", self.path, e)
+            if self.file.closed:
+                self.file = open(self.path, "a")
+
+    def stop(self):
+        """
+        Stops the journal thread, after a last flush. The records which could not be written stay in the journal.
+        """
+        self.running = False
+        with self.condition:
+            self.condition.notify()
@@ -0,0 +1,220 @@
+#!/usr/bin/python
+###################################################################
+# Heating system control with Raspberry Pi
+# -----------------------------------------------------------------
+# (C) Copyright VAYAK Ltd (info@vayak.com). 2026
+# All Rights Reserved
+#
+# THIS IS UNPUBLISHED PROPRIETARY SOURCE CODE
+# The copyright notice above does not evidence any
+# actual or intended publication of such source code.
+#
+# RESTRICTED RIGHTS:
+# This file may have been supplied under a license.
+# It may be used, disclosed, and/or copied only as permitted
+# under such license agreement. Any copy must contain the
+# above copyright notice and this restricted rights notice.
+# Use, copying, and/or disclosure of the file is strictly
+# prohibited unless otherwise provided in the license agreement.
+###################################################################
+from concurrent.futures import TimeoutError
+from datetime import timedelta
+
+from Clock import get_clock
+from Common import logger, read_temperature_now
+from ConfigStore import ConfigStore, ZoneConfig
+from Constants import WARNING, FINE, FINER, HEATING_STATE_OFF, HEATING_STATE_ON
+from Constants import SENSOR_FAILURE_TEMPERATURE, MODEL_HISTORY_DAYS
+from DatabaseDAO import DatabaseDAO
+from GPIO import GPIO
+from Metrics import MetricsRegistry
+from PreheatOptimizer import PreheatOptimizer
+from RelayController import RelayController
+from TemperatureSampler import TemperatureSampler
+from ThermalModel import ThermalModel
+from ThermoSchedule import ThermoSchedule
+
+
+class Zone:
+    """
+    One heating circuit: the sensors measuring its room temperature, its pair of relays with their controller,
+    and its own thermostat settings and thermal model. The zones share the database and the sensor sampler,
+    and are evaluated side by side by the ThermoControl on every control tick.
+
+    Created: 17/10/2026
+    """
+
+    def __init__(self, zone_config: ZoneConfig, dao: DatabaseDAO, sampler: TemperatureSampler, board=None):
+        """
+        Create the zone and start its relay controller.
+
+        Args:
+            zone_config:    The settings of the zone, [zone.<name>].
+            dao:            Database Access Object.
+            sampler:        The latest readings of the temperature sensors, shared by all zones.
+            board:          The board IO of the relays. Default: RPi.GPIO.
+        """
+        self.CLASS = "Zone"
+        self.name = zone_config.name
+        self.config = ConfigStore()
+        self.dao = dao
+        self.sampler = sampler
+        self.metrics = MetricsRegistry()
+
+        self.gpio = GPIO(self.name, board)
+        self.relay = RelayController(self.gpio)
+        self.relay.start()
+
+        # The thermostat settings of the zone, compiled again only when changed.
+        self.thermo_schedule = ThermoSchedule()
+        # The thermal behaviour of the zone, for the predictive mode.
+        self.thermal_model = ThermalModel()
+        self.preheat = PreheatOptimizer(self.thermal_model)
+        self.metrics.add_collector("thermal_model." + self.name, self.thermal_model.get_stats)
+
+    def get_sensors(self):
+        zone_config = self.config.snapshot.zones.get(self.name)
+        return zone_config.sensors if zone_config else ()
+
+    def read_temperature(self) -> float:
+        """
+        Returns the room temperature of the zone: the average of the valid readings of its sensors,
+        or SENSOR_FAILURE_TEMPERATURE if none of them has a valid reading.
+        """
+        readings = [temperature for temperature in (read_temperature_now(self, sensor) for sensor in self.get_sensors())
+                    if temperature != SENSOR_FAILURE_TEMPERATURE]
+        if not readings:
+            logger(WARNING, self.CLASS, "No valid room temperature in zone '{}': {}", self.name,
+                   [self.sampler.get_reading(sensor) for sensor in self.get_sensors()])
+            return SENSOR_FAILURE_TEMPERATURE
+        return sum(readings) / len(readings)
+
+    def evaluate(self, thermo_switch: int):
+        """
+        Set the boiler state of the zone according to the thermostat switch, its thermostat settings and its room
+        temperature. If the relay controller does not apply the change in time, the relays are left as they are.
+        """
+        try:
+            'Do the predictive magic'
+            if thermo_switch == 3:
+                self.predict_heating()
+
+            'Maintain the temperature of the current time slot'
+            if thermo_switch == 2:
+                self.maintain_temperature(self.preheat_temperature(self.get_thermo_schedule()))
+
+            'Maintain the Always ON temperature'
+            if thermo_switch == 1:
+                self.maintain_temperature(self.get_thermo_schedule().manual_temperature)
+
+            'Force switch off the heating'
+            if thermo_switch == 0:
+                logger(FINE, self.CLASS, "Thermostat  OFF")
+                self.relay.set_relay_state(HEATING_STATE_OFF, "ThermoControl")
+        except TimeoutError:
+            self.metrics.counter("relay_timeouts", self.name).inc()
+            logger(WARNING, self.CLASS, "Relays of zone '{}' did not switch in time, left as they are.", self.name)
+
+    def get_thermo_schedule(self) -> ThermoSchedule:
+        """
+        Returns the compiled thermostat settings, compiling them again if the thermostat table has changed.
+        """
+        if not self.thermo_schedule.is_current(self.dao.thermostat_version):
+            version = self.dao.thermostat_version
+            rows = self.dao.get_thermostat(self.name)
+            # On a failed query, the previous table stays in use, and the settings are read again at the next call.
+            if rows is not None:
+                self.thermo_schedule.compile(rows, version)
+        return self.thermo_schedule
+
+    def maintain_temperature(self, thermo_temperature: float):
+        """
+        Set the boiler state according to the temperature to maintain and the room temperature.
+        """
+        room_temperature = self.read_temperature()
+
+        # Without a valid reading we keep the relay as it is, rather than heat to -273 degrees.
+        if room_temperature != SENSOR_FAILURE_TEMPERATURE:
+            self.relay.temperature_to_relay_state(thermo_temperature, room_temperature, "ThermoControl")
+
+    def preheat_temperature(self, thermo_schedule: ThermoSchedule) -> float:
+        """
+        Returns the temperature to maintain now: the current thermostat setting, or the next one, once it is time
+        to start heating for it.
+        """
+        time_now = get_clock().now()
+        thermo_temperature = thermo_schedule.get_temperature(time_now)
+
+        room_temperature = self.read_temperature()
+        if room_temperature == SENSOR_FAILURE_TEMPERATURE:
+            return thermo_temperature
+
+        plan = self.preheat.plan(thermo_schedule, room_temperature, time_now)
+        if plan is not None and plan.is_due():
+            logger(FINE, self.CLASS, "Preheating zone '{}' for {} in {} minutes.", self.name, plan.target,
+                   round(plan.change_in / 60))
+            return plan.target
+        return thermo_temperature
+
+    def predict_heating(self):
+        """
+        Set the boiler state ahead of need: heat now if, without heating, the room would be colder than the
+        thermostat setting at the end of the horizon, or if it is time to start heating for the next setting.
+        Until the thermal model is fitted, the current thermostat setting is maintained as in the timed mode.
+        """
+        thermo_schedule = self.get_thermo_schedule()
+        horizon = self.config.snapshot.predictive_horizon * 60
+
+        if not self.thermal_model.is_ready():
+            self.maintain_temperature(thermo_schedule.get_temperature())
+            return
+
+        thermo_temperature = self.preheat_temperature(thermo_schedule)
+
+        room_temperature = self.read_temperature()
+        if room_temperature == SENSOR_FAILURE_TEMPERATURE:
+            return
+
+        # The model is fitted on the temperature table, which is in the same units as the readings.
+        predicted = self.thermal_model.predict(room_temperature, horizon, 0.0)
+        heating = predicted < thermo_temperature
+
+        logger(FINE, self.CLASS, "Zone '{}': predicted room temperature in {} minutes without heating: {:.2f}, "
+                                 "set[{}] -> {}", self.name, horizon // 60, predicted, thermo_temperature,
+               "ON" if heating else "OFF")
+        self.relay.set_relay_state(HEATING_STATE_ON if heating else HEATING_STATE_OFF, "ThermoControl")
+
+    def update_thermal_model(self):
+        """
+        Adds the temperature records of the zone since the last update to its thermal model.
+        """
+        since = self.thermal_model.get_last_datetime() or get_clock().now() - timedelta(days=MODEL_HISTORY_DAYS)
+        self.thermal_model.update(self.dao.get_temperature_rows(since, self.name, self.get_sensors()))
+
+    def record_temperature(self, temperatures: dict, temp_units: str):
+        """
+        Make a record of the temperature of the zone sensors, with the heating time of the zone since its last record.
+        The sensors of the other zones are left empty, while a single zone records all sensors, as it used to.
+
+        Args:
+            temperatures:   The sensor readings, {sensor: temperature or None}.
+            temp_units:     The units of the readings.
+        """
+        # The exact heating time since the last record, from the relay transitions.
+        seconds_heating_on = self.relay.journal.take_seconds_on()
+        logger(FINER, self.CLASS, "Recording temperature of zone '{}': time_state_on[{}].", self.name, seconds_heating_on)
+
+        if len(self.config.snapshot.zones) > 1:
+            temperatures = {sensor: temperatures.get(sensor) for sensor in self.get_sensors()}
+
+        self.dao.save_temperature(
+            seconds_heating_on,
+            temp_units,
+            temperatures.get("sensor_1"),
+            temperatures.get("sensor_2"),
+            temperatures.get("sensor_3"),
+            zone=self.name
+        )
+
+    def stop(self):
+        self.relay.stop()
@@ -31,39 +31,87 @@ modified		    TIMESTAMP				            # Time of account`s last modification
 );
 #
 # Name: temperature
-# Desc: Contains temperature measurements
-# Last: 03/06/2024
+# Desc: Contains temperature measurements, one record per heating zone
+# Last: 17/10/2026
 #
 CREATE TABLE temperature(
+id                  BIGINT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY,	# Record identity
 datetime		    TIMESTAMP NOT NULL DEFAULT NOW(),	# Date and time when the measurement was taken
+zone		        VARCHAR(20) NOT NULL DEFAULT 'main',	# Heating zone, as configured in [zone.<name>]
 time_state_on       SMALLINT NOT NULL DEFAULT 0,        # Shows the time in seconds for the interval between this and the previous reading, for which the boiler was heating.
 unit_speed          VARCHAR(3) NOT NULL DEFAULT 'kph',	# Wind speed unit - [kph|mph]
 unit_temperature    VARCHAR(1) NOT NULL DEFAULT 'C',	# Temperature unit - [C|F]
-temperature		    FLOAT,                              # Measured temperature outside
-windchill   	    FLOAT,                              # Windchill
-wspd                FLOAT,                              # Wind speed
 sensor_1            FLOAT,                              # Measured temperature for the given sensor
 sensor_2            FLOAT,                              # Measured temperature for the given sensor
-sensor_3            FLOAT                               # Measured temperature for the given sensor
+sensor_3            FLOAT,                              # Measured temperature for the given sensor
+INDEX idx_temperature_zone_datetime (zone, datetime)
+);
+#
+# Name: weather_hourly
+# Desc: Contains the outside weather, one record per hour, joined to the temperature records on the hour
+# Last: 17/10/2026
+#
+CREATE TABLE weather_hourly(
+hour		        DATETIME NOT NULL PRIMARY KEY,		# Start of the hour of the measurement
+unit_speed          VARCHAR(3) NOT NULL DEFAULT 'kph',	# Wind speed unit - [kph|mph]
+unit_temperature    VARCHAR(1) NOT NULL DEFAULT 'C',	# Temperature unit - [C|F]
+temperature		    FLOAT,                              # Measured temperature outside
+windchill   	    FLOAT,                              # Windchill
+wspd                FLOAT                               # Wind speed
+);
+#
+# Name: relay_transition
+# Desc: Contains the switches of the heating, for the exact heating time and the duty cycle statistics
+# Last: 17/10/2026
+#
+CREATE TABLE relay_transition(
+datetime		    TIMESTAMP(3) NOT NULL,	            # Date and time of the switch
+state		        BOOLEAN NOT NULL,	                # The heating state after the switch: 1 = ON, 0 = OFF
+source		        VARCHAR(20) NOT NULL DEFAULT '',	# Who switched the heating: ThermoControl | AndroidServer
+zone		        VARCHAR(20) NOT NULL DEFAULT 'main',	# Heating zone of the relays
+INDEX idx_relay_transition_datetime (datetime),
+INDEX idx_relay_transition_zone_datetime (zone, datetime)
 );
 #
 # Name: thermostat
-# Desc: Contains the temperature which the boiler should maintain
-# Last: 30/03/2025
+# Desc: Contains the temperature which the boiler should maintain, per heating zone
+# Last: 17/10/2026
 #
 CREATE TABLE thermostat(
-day_of_week		    VARCHAR(3),							# mon | tue | wed | thu | fri | sat | sun
+zone		        VARCHAR(20) NOT NULL DEFAULT 'main',	# Heating zone, as configured in [zone.<name>]
+day_of_week		    VARCHAR(3) NOT NULL DEFAULT 'all',	# mon | tue | wed | thu | fri | sat | sun | all
 temperature		    FLOAT,					           	# Temperature to maintain during this period
 timeStart		    VARCHAR(5) NOT NULL,	           	# Start of the time period in the format: "HH:MM"
-timeEnd 		    VARCHAR(5) NOT NULL	            	# End of the time period in the format: "HH:MM"
+timeEnd 		    VARCHAR(5) NOT NULL,	            	# End of the time period in the format: "HH:MM"
+UNIQUE KEY uq_thermostat_slot (zone, day_of_week, timeStart, timeEnd),
+INDEX idx_thermostat_zone (zone)
 );
 #
 # Name: presence
 # Desc: Contains detection of presence. First and last motion is determined by the settings.presenceInterval value.
-# Last: 21/01/2018
+# Last: 17/10/2026
 #
 CREATE TABLE presence(
 sensor			    VARCHAR(20) NOT NULL,           	# ID of the sensor
-datetimeFirst		TIMESTAMP,				        	# Time when the first motion was detected
-datetimeLast		TIMESTAMP				        	# Time when the measurement was taken
+motionFirst		    TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,	# Time when the first motion was detected
+motionLast		    TIMESTAMP NULL,			        	# Time when the last motion was detected
+activityRanking	    INT NOT NULL DEFAULT 0,	        	# Number of the motions detected within the period
+PRIMARY KEY (sensor, motionFirst)
+);
+#
+# Name: schema_version
+# Desc: Contains the applied schema migrations (the 'migrations' directory). This script creates the latest schema,
+#       hence it records all the migrations as applied: add the version of every new migration here.
+# Last: 17/10/2026
+#
+CREATE TABLE schema_version(
+version			    INT NOT NULL PRIMARY KEY,	        # Version of the migration: the number of the script
+name			    VARCHAR(100) NOT NULL,	        	# Name of the migration script
+applied			    TIMESTAMP NOT NULL DEFAULT NOW()	# Time when the migration was applied
 );
+INSERT INTO schema_version (version, name) VALUES
+(1, 'zone_columns'),
+(2, 'weather_hourly'),
+(3, 'presence_columns'),
+(4, 'keys_and_indexes'),
+(5, 'thermostat_slot_key');
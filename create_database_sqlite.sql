@@ -0,0 +1,71 @@
+--
+-- SQLite schema of the boilerry database, created by the SQLiteBackend when it opens the database file.
+-- The same tables as create_database.sql (the MySQL schema), and to be kept in step with it: every statement
+-- only creates what does not exist yet, hence the script runs at every start.
+-- The datetime values are stored as text: 'YYYY-MM-DD HH:MM:SS[.ffffff]'.
+-- Last: 17/10/2026
+--
+CREATE TABLE IF NOT EXISTS temperature(
+id                  INTEGER PRIMARY KEY,                -- Record identity
+datetime            TIMESTAMP NOT NULL,                 -- Date and time when the measurement was taken
+zone                VARCHAR(20) NOT NULL DEFAULT 'main',    -- Heating zone, as configured in [zone.<name>]
+time_state_on       SMALLINT NOT NULL DEFAULT 0,        -- Seconds the boiler was heating since the previous reading
+unit_speed          VARCHAR(3) NOT NULL DEFAULT 'kph',  -- Wind speed unit - [kph|mph]
+unit_temperature    VARCHAR(1) NOT NULL DEFAULT 'C',    -- Temperature unit - [C|F]
+sensor_1            FLOAT,                              -- Measured temperature for the given sensor
+sensor_2            FLOAT,                              -- Measured temperature for the given sensor
+sensor_3            FLOAT                               -- Measured temperature for the given sensor
+);
+CREATE INDEX IF NOT EXISTS idx_temperature_zone_datetime ON temperature (zone, datetime);
+
+CREATE TABLE IF NOT EXISTS weather_hourly(
+hour                DATETIME NOT NULL PRIMARY KEY,      -- Start of the hour of the measurement
+unit_speed          VARCHAR(3) NOT NULL DEFAULT 'kph',  -- Wind speed unit - [kph|mph]
+unit_temperature    VARCHAR(1) NOT NULL DEFAULT 'C',    -- Temperature unit - [C|F]
+temperature         FLOAT,                              -- Measured temperature outside
+windchill           FLOAT,                              -- Windchill
+wspd                FLOAT                               -- Wind speed
+);
+
+CREATE TABLE IF NOT EXISTS relay_transition(
+datetime            TIMESTAMP NOT NULL,                 -- Date and time of the switch
+state               BOOLEAN NOT NULL,                   -- The heating state after the switch: 1 = ON, 0 = OFF
+source              VARCHAR(20) NOT NULL DEFAULT '',    -- Who switched the heating: ThermoControl | AndroidServer
+zone                VARCHAR(20) NOT NULL DEFAULT 'main' -- Heating zone of the relays
+);
+CREATE INDEX IF NOT EXISTS idx_relay_transition_zone_datetime ON relay_transition (zone, datetime);
+
+CREATE TABLE IF NOT EXISTS thermostat(
+zone                VARCHAR(20) NOT NULL DEFAULT 'main',    -- Heating zone, as configured in [zone.<name>]
+day_of_week         VARCHAR(3) NOT NULL DEFAULT 'all',  -- mon | tue | wed | thu | fri | sat | sun | all
+temperature         FLOAT,                              -- Temperature to maintain during this period
+timeStart           VARCHAR(5) NOT NULL,                -- Start of the time period in the format: "HH:MM"
+timeEnd             VARCHAR(5) NOT NULL                 -- End of the time period in the format: "HH:MM"
+);
+CREATE INDEX IF NOT EXISTS idx_thermostat_zone ON thermostat (zone);
+-- A slot is unique per zone, day and period (migration 005). A database file created before the key keeps the last
+-- of its duplicated slots, and its slots without a day apply to all the days.
+UPDATE thermostat SET day_of_week = 'all' WHERE day_of_week IS NULL;
+DELETE FROM thermostat WHERE rowid NOT IN (
+    SELECT MAX(rowid) FROM thermostat GROUP BY zone, day_of_week, timeStart, timeEnd);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_thermostat_slot ON thermostat (zone, day_of_week, timeStart, timeEnd);
+
+CREATE TABLE IF NOT EXISTS presence(
+sensor              VARCHAR(20) NOT NULL,               -- ID of the sensor
+motionFirst         TIMESTAMP NOT NULL,                 -- Time when the first motion was detected
+motionLast          TIMESTAMP,                          -- Time when the last motion was detected
+activityRanking     INT NOT NULL DEFAULT 0,             -- Number of the motions detected within the period
+PRIMARY KEY (sensor, motionFirst)
+);
+
+CREATE TABLE IF NOT EXISTS schema_version(
+version             INT NOT NULL PRIMARY KEY,           -- Version of the MySQL migration this schema matches
+name                VARCHAR(100) NOT NULL,              -- Name of the migration script
+applied             TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP    -- Time when the migration was applied
+);
+INSERT OR IGNORE INTO schema_version (version, name) VALUES
+(1, 'zone_columns'),
+(2, 'weather_hourly'),
+(3, 'presence_columns'),
+(4, 'keys_and_indexes'),
+(5, 'thermostat_slot_key');
@@ -0,0 +1,13 @@
+#
+# Heating zones: the zone of the temperature and thermostat records, and the relay transitions.
+# Created: 17/10/2026
+#
+ALTER TABLE temperature ADD COLUMN zone VARCHAR(20) NOT NULL DEFAULT 'main' AFTER datetime;
+ALTER TABLE thermostat ADD COLUMN zone VARCHAR(20) NOT NULL DEFAULT 'main' FIRST;
+CREATE TABLE IF NOT EXISTS relay_transition(
+datetime		    TIMESTAMP(3) NOT NULL,
+state		        BOOLEAN NOT NULL,
+source		        VARCHAR(20) NOT NULL DEFAULT '',
+zone		        VARCHAR(20) NOT NULL DEFAULT 'main',
+INDEX idx_relay_transition_datetime (datetime)
+);
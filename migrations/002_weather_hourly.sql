@@ -0,0 +1,18 @@
+#
+# The outside weather moves from the temperature records to its own table, one record per hour.
+# Created: 17/10/2026
+#
+CREATE TABLE IF NOT EXISTS weather_hourly(
+hour		        DATETIME NOT NULL PRIMARY KEY,
+unit_speed          VARCHAR(3) NOT NULL DEFAULT 'kph',
+unit_temperature    VARCHAR(1) NOT NULL DEFAULT 'C',
+temperature		    FLOAT,
+windchill   	    FLOAT,
+wspd                FLOAT
+);
+INSERT INTO weather_hourly (hour, unit_speed, unit_temperature, temperature, windchill, wspd)
+SELECT DATE_FORMAT(datetime, '%Y-%m-%d %H:00:00') AS hour, MAX(unit_speed), MAX(unit_temperature),
+       AVG(temperature), AVG(windchill), AVG(wspd)
+FROM temperature WHERE temperature IS NOT NULL GROUP BY hour
+ON DUPLICATE KEY UPDATE temperature = VALUES(temperature), windchill = VALUES(windchill), wspd = VALUES(wspd);
+ALTER TABLE temperature DROP COLUMN temperature, DROP COLUMN windchill, DROP COLUMN wspd;
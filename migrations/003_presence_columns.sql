@@ -0,0 +1,9 @@
+#
+# The presence table takes the columns written by DatabaseDAO.save_motion(), keyed by the sensor and the first motion.
+# Created: 17/10/2026
+#
+ALTER TABLE presence
+    CHANGE datetimeFirst motionFirst TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    CHANGE datetimeLast motionLast TIMESTAMP NULL,
+    ADD COLUMN activityRanking INT NOT NULL DEFAULT 0,
+    ADD PRIMARY KEY (sensor, motionFirst);
@@ -0,0 +1,8 @@
+#
+# Keys and indexes for the queries by zone and time, for their cost to stay flat as the tables grow.
+# Created: 17/10/2026
+#
+ALTER TABLE temperature ADD COLUMN id BIGINT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY FIRST;
+ALTER TABLE temperature ADD INDEX idx_temperature_zone_datetime (zone, datetime);
+ALTER TABLE relay_transition ADD INDEX idx_relay_transition_zone_datetime (zone, datetime);
+ALTER TABLE thermostat ADD INDEX idx_thermostat_zone (zone);
@@ -0,0 +1,14 @@
+#
+# A thermostat slot is unique per zone, day of the week and time period, for DatabaseDAO.set_thermostat() to upsert
+# it. The duplicated slots are removed first, keeping the last one added, and the slots without a day of the week
+# apply to all the days.
+# Created: 17/10/2026
+#
+UPDATE thermostat SET day_of_week = 'all' WHERE day_of_week IS NULL;
+ALTER TABLE thermostat MODIFY COLUMN day_of_week VARCHAR(3) NOT NULL DEFAULT 'all';
+ALTER TABLE thermostat ADD COLUMN slot_id INT UNSIGNED NOT NULL AUTO_INCREMENT PRIMARY KEY;
+DELETE older FROM thermostat older JOIN thermostat newer
+    ON newer.zone = older.zone AND newer.day_of_week = older.day_of_week
+    AND newer.timeStart = older.timeStart AND newer.timeEnd = older.timeEnd AND newer.slot_id > older.slot_id;
+ALTER TABLE thermostat DROP COLUMN slot_id;
+ALTER TABLE thermostat ADD UNIQUE KEY uq_thermostat_slot (zone, day_of_week, timeStart, timeEnd);
@@ -0,0 +1,63 @@
+#!/usr/bin/python
+###################################################################
+# Heating system control with Raspberry Pi
+# -----------------------------------------------------------------
+# (C) Copyright VAYAK Ltd (info@vayak.com). 2026
+# All Rights Reserved
+#
+# THIS IS UNPUBLISHED PROPRIETARY SOURCE CODE
+# The copyright notice above does not evidence any
+# actual or intended publication of such source code.
+#
+# RESTRICTED RIGHTS:
+# This file may have been supplied under a license.
+# It may be used, disclosed, and/or copied only as permitted
+# under such license agreement. Any copy must contain the
+# above copyright notice and this restricted rights notice.
+# Use, copying, and/or disclosure of the file is strictly
+# prohibited unless otherwise provided in the license agreement.
+###################################################################
+"""
+Runs the tests against a copy of boilerry.ini in a temporary home directory, with an embedded SQLite database,
+and a fake 1-Wire devices directory.
+
+Created: 17/10/2026
+"""
+import configparser
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HOME_DIR = tempfile.mkdtemp(prefix="boilerry-test-")
+W1_DEVICES = os.path.join(HOME_DIR, "w1_devices")
+
+
+def write_config():
+    """
+    The config store is a singleton, read from BOILERRY_HOME the first time it is used, hence set up on import.
+    """
+    config = configparser.ConfigParser()
+    config.read(os.path.join(ROOT_DIR, "boilerry.ini"))
+    config.set("logging", "file", "stdout")
+    config.set("metrics", "dump_interval", "0")
+    config.set("database", "backend", "sqlite")
+    config.set("database", "sqlite_file", os.path.join(HOME_DIR, "boilerry.db"))
+    config.set("database", "journal_file", os.path.join(HOME_DIR, "write_behind.jsonl"))
+    config.set("temperature.sensor", "w1_devices", W1_DEVICES)
+
+    os.makedirs(W1_DEVICES, exist_ok=True)
+    with open(os.path.join(HOME_DIR, "boilerry.ini"), "w") as file:
+        config.write(file)
+
+
+write_config()
+os.environ["BOILERRY_HOME"] = HOME_DIR
+sys.path.insert(0, ROOT_DIR)
+
+
+@pytest.fixture
+def home_dir() -> str:
+    return HOME_DIR
@@ -0,0 +1,134 @@
+#!/usr/bin/python
+###################################################################
+# Heating system control with Raspberry Pi
+# -----------------------------------------------------------------
+# (C) Copyright VAYAK Ltd (info@vayak.com). 2026
+# All Rights Reserved
+#
+# THIS IS UNPUBLISHED PROPRIETARY SOURCE CODE
+# The copyright notice above does not evidence any
+# actual or intended publication of such source code.
+#
+# RESTRICTED RIGHTS:
+# This file may have been supplied under a license.
+# It may be used, disclosed, and/or copied only as permitted
+# under such license agreement. Any copy must contain the
+# above copyright notice and this restricted rights notice.
+# Use, copying, and/or disclosure of the file is strictly
+# prohibited unless otherwise provided in the license agreement.
+###################################################################
+"""
+Tests of the 1-Wire sensor registry against a fake sysfs devices directory.
+
+Created: 17/10/2026
+"""
+import os
+
+from ConfigStore import SensorConfig
+from Constants import SENSOR_FAILURE_TEMPERATURE, W1_SENSOR_AUTO
+from OneWireRegistry import OneWireRegistry, parse_w1_slave
+
+SENSOR_1 = "28-000000000001"
+SENSOR_2 = "28-000000000002"
+SENSOR_3 = "28-000000000003"
+
+
+def w1_slave(milli_celsius: int, crc: str = "YES") -> bytes:
+    return "72 01 4b 46 7f ff 0e 10 57 : crc=57 {}\n72 01 4b 46 7f ff 0e 10 57 t={}\n".format(
+        crc, milli_celsius).encode()
+
+
+def plug(devices_path: str, sensor_id: str, payload: bytes):
+    os.makedirs(os.path.join(devices_path, sensor_id), exist_ok=True)
+    with open(os.path.join(devices_path, sensor_id, "w1_slave"), "wb") as file:
+        file.write(payload)
+
+
+def unplug(devices_path: str, sensor_id: str):
+    os.remove(os.path.join(devices_path, sensor_id, "w1_slave"))
+    os.rmdir(os.path.join(devices_path, sensor_id))
+
+
+def test_parse_w1_slave():
+    assert parse_w1_slave(w1_slave(23125)) == 23125
+    assert parse_w1_slave(w1_slave(-10062)) == -10062
+    assert parse_w1_slave(w1_slave(23125, "NO")) is None
+    assert parse_w1_slave(w1_slave(23125)[:40]) is None
+    assert parse_w1_slave(w1_slave(23125).rpartition(b"=")[0] + b"=") is None
+    assert parse_w1_slave(b"") is None
+
+
+def test_scan_picks_up_added_and_removed_sensors(tmp_path):
+    devices_path = str(tmp_path)
+    plug(devices_path, SENSOR_1, w1_slave(21000))
+    os.makedirs(os.path.join(devices_path, "w1_bus_master1"))
+
+    registry = OneWireRegistry(devices_path)
+    assert registry.scan() == [SENSOR_1]
+    assert registry.read(SENSOR_1) == w1_slave(21000)
+
+    plug(devices_path, SENSOR_2, w1_slave(22000))
+    unplug(devices_path, SENSOR_1)
+    assert registry.scan() == [SENSOR_2]
+    assert parse_w1_slave(registry.read(SENSOR_2)) == 22000
+    registry.close()
+
+
+def test_auto_sensors_stay_pinned_across_hot_plug(tmp_path):
+    devices_path = str(tmp_path)
+    plug(devices_path, SENSOR_1, w1_slave(21000))
+    plug(devices_path, SENSOR_2, w1_slave(22000))
+
+    registry = OneWireRegistry(devices_path)
+    registry.scan()
+    assert registry.resolve(W1_SENSOR_AUTO, 1) == SENSOR_1
+    assert registry.resolve(W1_SENSOR_AUTO, 2) == SENSOR_2
+    assert registry.resolve(SENSOR_3, 3) == SENSOR_3
+
+    # The new sensor sorts after the remaining one, the remaining one must not move.
+    unplug(devices_path, SENSOR_1)
+    plug(devices_path, SENSOR_3, w1_slave(23000))
+    registry.scan()
+    assert registry.resolve(W1_SENSOR_AUTO, 2) == SENSOR_2
+    assert registry.resolve(W1_SENSOR_AUTO, 1) == SENSOR_3
+
+    # The sensor coming back does not take its place back either.
+    plug(devices_path, SENSOR_1, w1_slave(21000))
+    registry.scan()
+    assert registry.resolve(W1_SENSOR_AUTO, 1) == SENSOR_3
+    assert registry.resolve(W1_SENSOR_AUTO, 2) == SENSOR_2
+    registry.close()
+
+
+def test_read_keeps_the_file_of_a_removed_sensor_until_done(tmp_path):
+    devices_path = str(tmp_path)
+    plug(devices_path, SENSOR_1, w1_slave(21000))
+
+    registry = OneWireRegistry(devices_path)
+    registry.scan()
+    handle = registry.acquire(SENSOR_1)
+    unplug(devices_path, SENSOR_1)
+    registry.scan()
+
+    assert os.pread(handle.fd, 64, 0).startswith(b"72 01")
+    registry.release(handle)
+    assert handle.retired and handle.users == 0
+    registry.close()
+
+
+def test_get_temps_returns_partial_results(tmp_path):
+    from DS18B20 import DS18B20
+
+    devices_path = str(tmp_path)
+    plug(devices_path, SENSOR_1, w1_slave(21500))
+    plug(devices_path, SENSOR_2, w1_slave(22000, "NO"))
+
+    thermometer = DS18B20(devices_path)
+    temperatures = thermometer.getTemps([SensorConfig("sensor_1", W1_SENSOR_AUTO, 1),
+                                         SensorConfig("sensor_2", SENSOR_2, 1),
+                                         SensorConfig("sensor_3", SENSOR_3, 1)])
+
+    assert temperatures == {"sensor_1": 21.5,
+                            "sensor_2": SENSOR_FAILURE_TEMPERATURE,
+                            "sensor_3": SENSOR_FAILURE_TEMPERATURE}
+    thermometer.registry.close()
@@ -0,0 +1,95 @@
+#!/usr/bin/python
+###################################################################
+# Heating system control with Raspberry Pi
+# -----------------------------------------------------------------
+# (C) Copyright VAYAK Ltd (info@vayak.com). 2026
+# All Rights Reserved
+#
+# THIS IS UNPUBLISHED PROPRIETARY SOURCE CODE
+# The copyright notice above does not evidence any
+# actual or intended publication of such source code.
+#
+# RESTRICTED RIGHTS:
+# This file may have been supplied under a license.
+# It may be used, disclosed, and/or copied only as permitted
+# under such license agreement. Any copy must contain the
+# above copyright notice and this restricted rights notice.
+# Use, copying, and/or disclosure of the file is strictly
+# prohibited unless otherwise provided in the license agreement.
+###################################################################
+"""
+Tests of the DatabaseDAO on the embedded SQLite backend, in a temporary database file.
+
+Created: 17/10/2026
+"""
+import json
+import os
+from datetime import timedelta
+
+import pytest
+
+from Clock import get_clock
+from Constants import THERMO_DEFAULT_TEMPERATURE
+from DatabaseDAO import DatabaseDAO
+
+
+@pytest.fixture(scope="module")
+def dao() -> DatabaseDAO:
+    return DatabaseDAO()
+
+
+def write_batch_failing(table, rows):
+    raise OSError("database is down")
+
+
+def test_set_thermostat_updates_the_slot(dao):
+    version = dao.thermostat_version
+    assert dao.set_thermostat(20, "06:00", "08:00", "mon", zone="upsert")
+    assert dao.set_thermostat(22, "06:00", "08:00", "mon", zone="upsert")
+
+    assert dao.get_thermostat("upsert") == [("mon", 22, "06:00", "08:00")]
+    assert dao.thermostat_version == version + 2
+
+
+def test_get_thermostat_manual(dao):
+    assert dao.get_thermostat_manual("manual") == THERMO_DEFAULT_TEMPERATURE
+    dao.set_thermostat_manual(19, zone="manual")
+
+    assert dao.get_thermostat_manual("manual") == 19
+    assert dao.get_thermostat("manual") == [("all", 19, "00:00", "00:00")]
+
+
+def test_save_temperature_is_written_behind(dao):
+    since = get_clock().now() - timedelta(minutes=1)
+    dao.save_temperature(120, "C", 20.0, 22.0, None, zone="written")
+    assert dao.journal.flush() == 1
+
+    rows = dao.get_temperature_rows(since, "written", ("sensor_1", "sensor_2"))
+    assert [(time_state_on, room) for _, time_state_on, room, _, _ in rows] == [(120, 21.0)]
+
+    history = json.loads(dao.get_temperature_history(zone="written"))
+    assert [(record["sensor_1"], record["sensor_2"], record["sensor_3"]) for record in history] == [("20.0", "22.0", "")]
+
+
+def test_save_temperature_is_replayed(dao, monkeypatch, home_dir):
+    since = get_clock().now() - timedelta(minutes=1)
+    journal = dao.journal
+
+    # The database is down: the record stays in the journal, and the journal is stopped with it.
+    with monkeypatch.context() as patch:
+        patch.setattr(dao, "write_batch", write_batch_failing)
+        dao.save_temperature(60, "C", 18.0, zone="replayed")
+        assert journal.flush() == 0
+        journal.stop()
+        journal.join(5)
+    assert os.path.getsize(os.path.join(home_dir, "write_behind.jsonl")) > 0
+    assert dao.get_temperature_rows(since, "replayed") == []
+
+    # A new journal of the same file replays the record.
+    replayed = DatabaseDAO()
+    replayed.save_temperature(60, "C", 19.0, zone="replayed")
+    assert replayed.journal is not journal
+    assert replayed.journal.flush() == 2
+
+    rows = replayed.get_temperature_rows(since, "replayed")
+    assert [room for _, _, room, _, _ in rows] == [18.0, 19.0]